@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'mantenimiento.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -125,6 +126,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Django REST Framework
 REST_FRAMEWORK = {
+    # orjson si está instalado; con el mismo JSON que los de DRF (mantenimiento.renderers)
+    'DEFAULT_RENDERER_CLASSES': [
+        'mantenimiento.renderers.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'mantenimiento.parsers.JSONRapidoParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
@@ -158,3 +169,51 @@ SIMPLE_JWT = {
 }
 
 STATIC_URL = 'static/'
+
+# Mantenimiento
+# Máximo de elementos por colección anidada en los endpoints de detalle. Los
+# valores por defecto están en mantenimiento.serializers.LIMITES_ANIDADOS;
+# aquí basta indicar las colecciones que cambian, p. ej.:
+# MANTENIMIENTO_LIMITES_ANIDADOS = {'ordenes': 20}
+
+# Listados de equipos y órdenes leídos con values_list() (mantenimiento.listados_valores)
+MANTENIMIENTO_LISTADOS_VALORES = True
+
+# ETag y Last-Modified en los listados y el detalle (mantenimiento.condicionales)
+MANTENIMIENTO_PETICIONES_CONDICIONALES = True
+
+# Próxima fecha de los planes predictivos (mantenimiento.pronostico): confiabilidad
+# objetivo al vencer, máximo de días hacia adelante y recálculo al completar fallas u órdenes predictivas
+MANTENIMIENTO_PRONOSTICO_CONFIABILIDAD = 0.9
+MANTENIMIENTO_PRONOSTICO_MAX_DIAS = 365
+MANTENIMIENTO_PRONOSTICO_AUTOMATICO = True
+
+# Caché de respuestas de la API (mantenimiento.cache_respuestas). Para
+# compartirla entre procesos se puede usar, por ejemplo:
+#   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+#   'LOCATION': '/var/tmp/mantenimiento_cache',
+# o bien:
+#   'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#   'LOCATION': 'redis://127.0.0.1:6379',
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mantenimiento',
+    },
+}
+
+MANTENIMIENTO_CACHE_ALIAS = 'default'
+MANTENIMIENTO_CACHE_TIMEOUT = 300
+# Vigencia de /api/dashboard/ y de las acciones de confiabilidad en la caché
+# (segundos, acotada por MANTENIMIENTO_CACHE_TIMEOUT)
+MANTENIMIENTO_DASHBOARD_TIMEOUT = 60
+
+# Métricas por petición (mantenimiento.metricas), expuestas en /metrics
+MANTENIMIENTO_METRICAS = True
+# Peticiones más lentas que este umbral se registran con sus peores consultas
+MANTENIMIENTO_METRICAS_UMBRAL_LENTO_MS = 500
+MANTENIMIENTO_METRICAS_CONSULTAS_LENTAS = 5
+# /metrics responde a "Authorization: Bearer <token>" con este token y a los
+# usuarios is_staff; MANTENIMIENTO_METRICAS_PUBLICAS = True lo abre sin autenticación
+MANTENIMIENTO_METRICAS_TOKEN = None
+MANTENIMIENTO_METRICAS_PUBLICAS = False
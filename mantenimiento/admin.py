@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Empresa, Equipo, Tecnico, Plan, Orden
+from .models import Empresa, Equipo, Tecnico, Plan, Orden, SecuenciaOrden
 
 
 @admin.register(Empresa)
@@ -144,3 +144,9 @@ class OrdenAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(SecuenciaOrden)
+class SecuenciaOrdenAdmin(admin.ModelAdmin):
+    list_display = ['anio', 'ultimo_numero']
+    readonly_fields = ['anio', 'ultimo_numero']
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class MantenimientoConfig(AppConfig):
     name = 'mantenimiento'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,311 @@
+"""
+Asignación automática de técnicos a órdenes de trabajo.
+
+Las órdenes abiertas sin técnico se agrupan por empresa y, para cada grupo,
+se arma con NumPy una matriz de costos orden × técnico que se resuelve como
+un problema de asignación (``scipy.optimize.linear_sum_assignment`` si está
+instalado, o una implementación en NumPy del mismo algoritmo de caminos
+de aumento más cortos).
+
+Costo de asignar la orden ``i`` al técnico ``j``:
+
+- carga abierta actual del técnico en horas (``duracion_estimada_horas``
+  del plan de cada orden abierta, o ``DURACION_POR_DEFECTO``) más la
+  duración de la orden;
+- ``COSTO_NO_RECOMENDADO`` si el plan tiene técnicos recomendados y ``j``
+  no es uno de ellos;
+- ``COSTO_ESPECIALIDAD`` si la especialidad de ``j`` no está entre las de
+  los técnicos recomendados del plan, activos o no (la mitad si ``j`` es
+  ``general``).
+
+Son candidatos los técnicos activos de la empresa y los recomendados por el
+plan. Las órdenes ``urgente`` solo admiten técnicos con al menos
+``EXPERIENCIA_MINIMA_URGENTE`` años.
+
+La asignación se resuelve por rondas: en cada ronda participan los
+técnicos cuya carga no supera a la menor en más de una duración media,
+cada uno recibe a lo más una orden (un problema de asignación órdenes ×
+técnicos) y la duración asignada se suma a su carga. Así la carga se
+nivela sin replicar columnas por técnico. ``BONO_PRIORIDAD`` adelanta a
+las órdenes urgentes a las primeras rondas.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import DecimalField, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import cache_respuestas
+from .models import ESTADOS_ABIERTOS, Tecnico, Orden
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # pragma: no cover - depende del entorno
+    linear_sum_assignment = None
+
+DURACION_POR_DEFECTO = Decimal('1')
+EXPERIENCIA_MINIMA_URGENTE = 5
+
+# Penalizaciones, en horas equivalentes
+COSTO_NO_RECOMENDADO = 8.0
+COSTO_ESPECIALIDAD = 16.0
+COSTO_INFACTIBLE = 1e9
+
+# Descuento por prioridad: en cada ronda se asignan primero las más urgentes
+BONO_PRIORIDAD = {'urgente': 24.0, 'alta': 8.0}
+
+ESPECIALIDADES = [codigo for codigo, _ in Tecnico.ESPECIALIDAD_CHOICES]
+INDICE_ESPECIALIDAD = {codigo: indice for indice, codigo in enumerate(ESPECIALIDADES)}
+ESPECIALIDAD_GENERAL = INDICE_ESPECIALIDAD['general']
+
+
+def resolver_asignacion(costo):
+    """
+    Resuelve el problema de asignación de costo mínimo de una matriz
+    rectangular. Retorna (filas, columnas) como ``linear_sum_assignment``.
+    """
+    if linear_sum_assignment is not None:
+        return linear_sum_assignment(costo)
+    return _resolver_numpy(costo)
+
+
+def _resolver_numpy(costo):
+    """Algoritmo de caminos de aumento más cortos (Jonker-Volgenant)"""
+    costo = np.asarray(costo, dtype=float)
+    if costo.shape[0] > costo.shape[1]:
+        columnas, filas = _resolver_numpy(costo.T)
+        orden = np.argsort(filas)
+        return filas[orden], columnas[orden]
+
+    n, m = costo.shape
+    u = np.zeros(n)
+    v = np.zeros(m)
+    fila_de_columna = np.full(m, -1)
+    columna_de_fila = np.full(n, -1)
+
+    for fila_actual in range(n):
+        distancias = np.full(m, np.inf)
+        camino = np.full(m, -1)
+        filas_vistas = np.zeros(n, dtype=bool)
+        columnas_vistas = np.zeros(m, dtype=bool)
+        fila = fila_actual
+        minimo = 0.0
+        destino = -1
+
+        while destino == -1:
+            filas_vistas[fila] = True
+            reducido = minimo + costo[fila] - u[fila] - v
+            mejora = ~columnas_vistas & (reducido < distancias)
+            camino[mejora] = fila
+            distancias[mejora] = reducido[mejora]
+
+            pendientes = np.where(columnas_vistas, np.inf, distancias)
+            columna = int(np.argmin(pendientes))
+            minimo = pendientes[columna]
+            columnas_vistas[columna] = True
+            if fila_de_columna[columna] == -1:
+                destino = columna
+            else:
+                fila = fila_de_columna[columna]
+
+        u[fila_actual] += minimo
+        otras = filas_vistas.copy()
+        otras[fila_actual] = False
+        u[otras] += minimo - distancias[columna_de_fila[otras]]
+        v[columnas_vistas] -= minimo - distancias[columnas_vistas]
+
+        columna = destino
+        while True:
+            fila = camino[columna]
+            fila_de_columna[columna] = fila
+            columna_de_fila[fila], columna = columna, columna_de_fila[fila]
+            if fila == fila_actual:
+                break
+
+    return np.arange(n), columna_de_fila
+
+
+def _duracion():
+    return Coalesce(
+        'plan__duracion_estimada_horas', Value(DURACION_POR_DEFECTO),
+        output_field=DecimalField(max_digits=5, decimal_places=2),
+    )
+
+
+def _cargas_abiertas(tecnico_ids):
+    """Horas estimadas de las órdenes abiertas de cada técnico"""
+    filas = (
+        Orden.objects.filter(tecnico_asignado_id__in=tecnico_ids, estado__in=ESTADOS_ABIERTOS)
+        .order_by()
+        .values('tecnico_asignado_id')
+        .annotate(horas=Sum(_duracion()))
+        .values_list('tecnico_asignado_id', 'horas')
+    )
+    return {tecnico_id: float(horas) for tecnico_id, horas in filas}
+
+
+def _matriz_costos(ordenes, tecnicos, miembros, recomendados, requisitos):
+    """
+    Matriz (órdenes × técnicos) de costos del grupo de una empresa, sin la
+    carga de los técnicos.
+
+    ``ordenes``: filas (id, plan_id, prioridad, duracion); ``tecnicos``:
+    filas (id, especialidad, experiencia_anos); ``miembros``: ids de los
+    técnicos de la empresa; ``recomendados``: plan_id -> ids recomendados
+    activos; ``requisitos``: plan_id -> especialidades de sus recomendados.
+    """
+    m = len(tecnicos)
+    columna = {tecnico[0]: j for j, tecnico in enumerate(tecnicos)}
+    especialidad = np.array([INDICE_ESPECIALIDAD.get(t[1], 0) for t in tecnicos])
+    experiencia = np.array([t[2] for t in tecnicos])
+    es_miembro = np.array([t[0] in miembros for t in tecnicos])
+    duracion = np.array([orden[3] for orden in ordenes])
+    urgente = np.array([orden[2] == 'urgente' for orden in ordenes])
+
+    # Por plan: técnicos recomendados y especialidades requeridas
+    planes = sorted({orden[1] for orden in ordenes if orden[1] in requisitos})
+    indice_plan = {plan_id: p for p, plan_id in enumerate(planes, start=1)}
+    plan_recomienda = np.zeros((len(planes) + 1, m), dtype=bool)
+    for plan_id, p in indice_plan.items():
+        plan_recomienda[p, [columna[t] for t in recomendados.get(plan_id, ()) if t in columna]] = True
+    plan_requiere = np.zeros((len(planes) + 1, len(ESPECIALIDADES)), dtype=bool)
+    for plan_id, p in indice_plan.items():
+        plan_requiere[p, [INDICE_ESPECIALIDAD[codigo] for codigo in requisitos[plan_id]]] = True
+
+    fila_plan = np.array([indice_plan.get(orden[1], 0) for orden in ordenes])
+    recomendado = plan_recomienda[fila_plan]
+    con_recomendados = recomendado.any(axis=1)
+    requiere = plan_requiere[fila_plan]
+    sin_especialidad = requiere.any(axis=1)[:, None] & ~requiere[:, especialidad]
+
+    costo = np.repeat(duracion[:, None], m, axis=1)
+    costo = costo + COSTO_NO_RECOMENDADO * (con_recomendados[:, None] & ~recomendado)
+    penalizacion = np.where(especialidad == ESPECIALIDAD_GENERAL, COSTO_ESPECIALIDAD / 2, COSTO_ESPECIALIDAD)
+    costo = costo + sin_especialidad * penalizacion[None, :]
+
+    candidato = es_miembro[None, :] | recomendado
+    inexperto = urgente[:, None] & (experiencia < EXPERIENCIA_MINIMA_URGENTE)[None, :]
+    costo[~candidato | inexperto] = COSTO_INFACTIBLE
+    return costo
+
+
+def _asignar_grupo(ordenes, tecnicos, miembros, recomendados, requisitos, cargas):
+    """Retorna [(orden_id, tecnico_id)] de las órdenes de una empresa"""
+    if not ordenes or not tecnicos:
+        return []
+    base = _matriz_costos(ordenes, tecnicos, miembros, recomendados, requisitos)
+    carga = np.array([cargas.get(tecnico[0], 0.0) for tecnico in tecnicos])
+    duracion = np.array([orden[3] for orden in ordenes])
+    prioridad = np.array([BONO_PRIORIDAD.get(orden[2], 0.0) for orden in ordenes])
+
+    factible = base < COSTO_INFACTIBLE
+    incremento = float(duracion.mean())
+    asignaciones = []
+    pendientes = np.flatnonzero(factible.any(axis=1))
+    while pendientes.size:
+        utiles = factible[pendientes].any(axis=0)
+        # Participan los técnicos cuya carga no supera a la menor en más de
+        # una duración media; si ninguna orden les sirve, todos los útiles
+        banda = utiles & (carga <= carga[utiles].min() + incremento)
+        for columnas_ronda in (np.flatnonzero(banda), np.flatnonzero(utiles)):
+            costo = base[np.ix_(pendientes, columnas_ronda)] + carga[columnas_ronda] - prioridad[pendientes, None]
+            filas, columnas = resolver_asignacion(costo)
+            columnas = columnas_ronda[columnas]
+            factibles = factible[pendientes[filas], columnas]
+            if factibles.any():
+                break
+        else:
+            break
+        elegidas, columnas = pendientes[filas[factibles]], columnas[factibles]
+        asignaciones.extend(
+            (ordenes[fila][0], tecnicos[columna][0]) for fila, columna in zip(elegidas, columnas)
+        )
+        carga[columnas] += duracion[elegidas]
+        pendientes = np.setdiff1d(pendientes, elegidas, assume_unique=True)
+    return asignaciones
+
+
+def asignar_tecnicos(ordenes, simular=False):
+    """
+    Asigna técnicos a las órdenes abiertas y sin técnico de ``ordenes``
+    (queryset de Orden).
+
+    Retorna un diccionario con las ``asignaciones`` [{orden, tecnico}] y
+    los ids de las órdenes ``sin_asignar`` por no tener candidatos. Con
+    ``simular`` no se guarda ningún cambio.
+    """
+    with transaction.atomic():
+        pendientes = list(
+            ordenes.select_for_update(of=('self',))
+            .filter(tecnico_asignado__isnull=True, estado__in=ESTADOS_ABIERTOS)
+            .order_by('pk')
+            .values_list(
+                'pk', 'empresa_id', 'plan_id', 'prioridad',
+                _duracion(),
+            )
+        )
+        if not pendientes:
+            return {'asignadas': 0, 'asignaciones': [], 'sin_asignar': []}
+
+        empresas = {fila[1] for fila in pendientes}
+        planes = {fila[2] for fila in pendientes if fila[2] is not None}
+        recomendados = defaultdict(set)
+        requisitos = defaultdict(set)
+        for plan_id, tecnico_id, especialidad, activo in Tecnico.planes.through.objects.filter(
+            plan_id__in=planes
+        ).values_list('plan_id', 'tecnico_id', 'tecnico__especialidad', 'tecnico__activo'):
+            requisitos[plan_id].add(especialidad)
+            if activo:
+                recomendados[plan_id].add(tecnico_id)
+        miembros = defaultdict(set)
+        for empresa_id, tecnico_id in Tecnico.empresas.through.objects.filter(
+            empresa_id__in=empresas, tecnico__activo=True
+        ).values_list('empresa_id', 'tecnico_id'):
+            miembros[empresa_id].add(tecnico_id)
+
+        ids_tecnicos = set().union(*miembros.values(), *recomendados.values())
+        tecnicos = {
+            fila[0]: fila for fila in Tecnico.objects.filter(pk__in=ids_tecnicos)
+            .order_by('pk').values_list('pk', 'especialidad', 'experiencia_anos')
+        }
+        cargas = _cargas_abiertas(ids_tecnicos)
+
+        grupos = defaultdict(list)
+        for pk, empresa_id, plan_id, prioridad, duracion in pendientes:
+            grupos[empresa_id].append((pk, plan_id, prioridad, float(duracion)))
+
+        asignaciones = []
+        for empresa_id, ordenes_grupo in grupos.items():
+            candidatos = set(miembros[empresa_id]).union(
+                *(recomendados[orden[1]] for orden in ordenes_grupo if orden[1] in recomendados)
+            )
+            asignaciones.extend(_asignar_grupo(
+                ordenes_grupo, [tecnicos[pk] for pk in sorted(candidatos)],
+                miembros[empresa_id], recomendados, requisitos, cargas,
+            ))
+
+        if not simular and asignaciones:
+            ahora = timezone.now()
+            Orden.objects.bulk_update(
+                [
+                    Orden(pk=orden_id, tecnico_asignado_id=tecnico_id, fecha_actualizacion=ahora)
+                    for orden_id, tecnico_id in asignaciones
+                ],
+                ['tecnico_asignado', 'fecha_actualizacion'],
+                batch_size=1000,
+            )
+            # El técnico asignado no interviene en las estadísticas por empresa o equipo
+            cache_respuestas.invalidar({'orden'})
+
+    asignadas = {orden_id for orden_id, _ in asignaciones}
+    return {
+        'asignadas': len(asignaciones),
+        'asignaciones': [
+            {'orden': orden_id, 'tecnico': tecnico_id}
+            for orden_id, tecnico_id in sorted(asignaciones)
+        ],
+        'sin_asignar': [fila[0] for fila in pendientes if fila[0] not in asignadas],
+    }
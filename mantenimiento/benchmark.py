@@ -0,0 +1,608 @@
+"""
+Medición de tiempos y consultas de todas las rutas de la API.
+
+``rutas_api`` recorre las rutas registradas en el ``DefaultRouter`` de
+``mantenimiento.urls`` (acciones estándar y ``@action``) y ``ejecutar``
+llama a cada una con el cliente de pruebas de DRF contra la base de datos
+configurada, normalmente poblada con ``seed_scale``.
+
+- Las rutas de lectura se miden ``repeticiones`` veces tras un
+  calentamiento; las consultas se cuentan en una llamada aparte.
+- Las escrituras se ejecutan dentro de una transacción que se revierte,
+  con un cuerpo mínimo por acción (``cuerpos``) armado desde los objetos de
+  ``muestras``: ``create`` copia los campos obligatorios de la muestra con
+  valores únicos propios, ``update`` reenvía los de la misma muestra y las
+  transiciones usan una orden en un estado de origen válido.
+  ``partial_update`` envía un PATCH vacío.
+- Las lecturas usan los objetos con más datos relacionados y ``destroy`` el
+  de menos, para no medir una cascada sobre millones de filas.
+- Las exportaciones completas se omiten salvo que se pidan.
+
+El resultado es un diccionario serializable a JSON para comparar
+ejecuciones entre commits.
+
+``concurrencia`` compara el rendimiento de las lecturas síncronas (WSGI,
+un hilo por petición concurrente) con las de ``/api/async/`` (ASGI, un
+event loop) bajo la misma cantidad de peticiones simultáneas. Ambos lados
+corren sin caché de respuestas ni ETag; las diferencias que quedan se
+informan en ``DIFERENCIAS_CONCURRENCIA``.
+
+``listados`` mide los listados de equipos y órdenes con el serializador y
+con ``values_list()`` (``listados_valores``), con el mismo tamaño de página.
+
+``renderizado`` mide el ``JSONRenderer`` / ``JSONParser`` de DRF contra
+``JSONRapidoRenderer`` / ``JSONRapidoParser`` sobre páginas grandes de
+``OrdenSerializer``.
+
+``confiabilidad_flota`` mide la carga de los intervalos de falla de toda la
+flota y el cálculo de sus indicadores de confiabilidad por agrupación.
+"""
+import asyncio
+import io
+import itertools
+import re
+import statistics
+import subprocess
+import threading
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, connections, transaction
+from django.db.models import Count, F
+from django.test import AsyncClient, Client, override_settings
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .confiabilidad import AGRUPACIONES, VENTANAS, calcular, cargar_intervalos
+from .consultas import planificar_consulta
+from .metricas import Medicion
+from .models import Empresa, Equipo, EquipoEstadistica, Tecnico, Plan, Orden
+from .parsers import JSONRapidoParser
+from .renderers import JSONRapidoRenderer
+from .serializers import OrdenSerializer
+from .transiciones import TRANSICIONES
+
+REPETICIONES = 5
+
+# Parámetros obligatorios de las acciones, como claves de ``muestras``
+PARAMETROS = {
+    'por_empresa': {'empresa': 'empresa'},
+    'por_equipo': {'equipo': 'equipo'},
+    'por_tecnico': {'tecnico': 'tecnico'},
+    'por_plan': {'plan': 'plan'},
+    'por_especialidad': {'especialidad': 'especialidad'},
+    'estadisticas_multiples': {'ids': 'empresas'},
+}
+
+MODELOS = {'empresa': Empresa, 'equipo': Equipo, 'tecnico': Tecnico, 'plan': Plan, 'orden': Orden}
+
+# Campos obligatorios de cada recurso, para los cuerpos de ``create`` y ``update``
+CAMPOS_ESCRITURA = {
+    'empresa': ('nombre', 'rut'),
+    'equipo': ('empresa', 'nombre', 'codigo', 'tipo'),
+    'tecnico': ('nombre', 'apellido', 'rut', 'email', 'telefono', 'especialidad'),
+    'plan': ('empresa', 'equipo', 'nombre', 'frecuencia', 'tareas', 'fecha_inicio'),
+    'orden': ('empresa', 'equipo', 'descripcion', 'fecha_programada'),
+}
+
+# Valores de los campos únicos en los cuerpos de ``create``
+CAMPOS_UNICOS = {
+    'empresa': {'nombre': 'Empresa benchmark', 'rut': 'BENCHMARK'},
+    'equipo': {'codigo': 'BENCHMARK'},
+    'tecnico': {'rut': 'BENCHMARK', 'email': 'benchmark@example.com'},
+    'plan': {'nombre': 'Plan benchmark'},
+}
+
+# Escrituras sin cuerpo
+ESCRITURAS_SIN_CUERPO = {'partial_update', 'destroy'}
+
+FILAS_CARGA_MASIVA = 100
+
+ACCIONES_EXPORTACION = {'export'}
+
+# Lo que distingue a ambos lados de ``concurrencia`` además del modelo de ejecución
+DIFERENCIAS_CONCURRENCIA = [
+    'wsgi: despacho completo de DRF (autenticación, negociación, permisos) con un Client por hilo',
+    'asgi: vistas de /api/async/ con AsyncClient sobre un solo event loop',
+    'ambos: sin caché de respuestas ni ETag/Last-Modified, clientes de prueba en el mismo proceso',
+]
+
+_GRUPO = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+
+
+class _Revertir(Exception):
+    pass
+
+
+def rutas_api():
+    """
+    Rutas del router: una entrada por método y acción, con la plantilla
+    de la URL (``{pk}`` en las rutas de detalle).
+    """
+    from .urls import router
+
+    rutas = []
+    for patron in router.urls:
+        funcion = patron.callback
+        acciones = getattr(funcion, 'actions', None)
+        regex = patron.pattern.regex
+        if not acciones or 'format' in regex.groupindex:
+            continue
+        plantilla = '/api/' + _GRUPO.sub(lambda grupo: '{%s}' % grupo.group(1), regex.pattern.strip('^$'))
+        for metodo, accion in acciones.items():
+            rutas.append({
+                'ruta': plantilla,
+                'vista': funcion.cls.__name__,
+                'basename': funcion.initkwargs.get('basename'),
+                'accion': accion,
+                'metodo': metodo,
+                'detalle': bool(funcion.initkwargs.get('detail')),
+            })
+    return rutas
+
+
+def muestras():
+    """Objetos usados en las rutas: los de mayor volumen de datos relacionados"""
+    valores = {
+        'empresa': Empresa.objects.annotate(n=Count('equipos')).order_by('-n', 'pk').values_list('pk', flat=True).first(),
+        'equipo': (
+            EquipoEstadistica.objects.order_by('-total_ordenes', 'pk').values_list('equipo_id', flat=True).first()
+            or Equipo.objects.order_by('pk').values_list('pk', flat=True).first()
+        ),
+        'tecnico': (
+            Orden.objects.filter(tecnico_asignado__isnull=False).values('tecnico_asignado')
+            .annotate(n=Count('pk')).order_by('-n').values_list('tecnico_asignado', flat=True).first()
+            or Tecnico.objects.order_by('pk').values_list('pk', flat=True).first()
+        ),
+        'plan': Plan.objects.order_by('pk').values_list('pk', flat=True).first(),
+        'orden': Orden.objects.order_by('-fecha_programada', '-pk').values_list('pk', flat=True).first(),
+        'especialidad': 'mecanico',
+    }
+    valores['empresas'] = ','.join(
+        str(pk) for pk in Empresa.objects.order_by('pk').values_list('pk', flat=True)[:10]
+    )
+    valores['livianos'] = {
+        'empresa': Empresa.objects.annotate(n=Count('equipos')).order_by('n', '-pk').values_list('pk', flat=True).first(),
+        'equipo': (
+            EquipoEstadistica.objects.order_by('total_ordenes', '-pk').values_list('equipo_id', flat=True).first()
+            or Equipo.objects.order_by('-pk').values_list('pk', flat=True).first()
+        ),
+        'tecnico': Tecnico.objects.order_by('-pk').values_list('pk', flat=True).first(),
+        'plan': Plan.objects.order_by('-pk').values_list('pk', flat=True).first(),
+        'orden': Orden.objects.order_by('-pk').values_list('pk', flat=True).first(),
+    }
+    # Una orden en un estado de origen válido para cada transición; sin iniciar o la
+    # iniciada más recientemente, para que las horas calculadas al completar quepan en el campo
+    valores['transiciones'] = {
+        accion: Orden.objects.filter(estado__in=transicion['origen'])
+        .order_by(F('fecha_inicio').desc(nulls_first=True), '-pk')
+        .values_list('pk', flat=True).first()
+        for accion, transicion in TRANSICIONES.items()
+    }
+    return valores
+
+
+def cuerpos(valores):
+    """Cuerpo mínimo de cada escritura, como ``{(basename, acción): cuerpo}``"""
+    resultado = {}
+    for basename, campos in CAMPOS_ESCRITURA.items():
+        pk = valores.get(basename)
+        muestra = MODELOS[basename].objects.filter(pk=pk).values(*campos).first() if pk is not None else None
+        if muestra is None:
+            continue
+        resultado[(basename, 'update')] = muestra
+        resultado[(basename, 'create')] = {**muestra, **CAMPOS_UNICOS.get(basename, {})}
+
+    orden = resultado.get(('orden', 'create'))
+    if orden is not None:
+        resultado[('orden', 'bulk')] = [orden] * FILAS_CARGA_MASIVA
+    if valores.get('empresa') is not None:
+        resultado[('plan', 'generar_ordenes')] = {'horizonte_dias': 7, 'empresa': valores['empresa']}
+        resultado[('orden', 'asignar_automatico')] = {'empresa': valores['empresa']}
+    if valores.get('equipo') is not None:
+        resultado[('orden', 'transicion_masiva')] = {
+            'accion': 'cancelar', 'equipo': valores['equipo'], 'estado': 'programada',
+        }
+    for accion in TRANSICIONES:
+        resultado[('orden', accion)] = {}
+    return resultado
+
+
+def url_de_ruta(ruta, valores):
+    """URL concreta de una ruta o ``None`` si falta un objeto de muestra"""
+    if ruta['accion'] == 'destroy':
+        pk = valores.get('livianos', {}).get(ruta['basename'])
+    elif ruta['basename'] == 'orden' and ruta['accion'] in TRANSICIONES:
+        pk = valores.get('transiciones', {}).get(ruta['accion'])
+    else:
+        pk = valores.get(ruta['basename'])
+    if ruta['detalle'] and pk is None:
+        return None
+    url = ruta['ruta'].replace('{pk}', str(pk))
+    parametros = PARAMETROS.get(ruta['accion'], {})
+    if any(valores.get(clave) in (None, '') for clave in parametros.values()):
+        return None
+    if parametros:
+        url += '?' + '&'.join(f'{nombre}={valores[clave]}' for nombre, clave in parametros.items())
+    return url
+
+
+def cliente_administrador():
+    """Cliente autenticado como superusuario sin crear filas en la base"""
+    cliente = APIClient()
+    cliente.force_authenticate(User(username='benchmark', is_staff=True, is_superuser=True))
+    return cliente
+
+
+def _llamar(cliente, metodo, url, cuerpo=None):
+    if metodo in ('get', 'head', 'options'):
+        return getattr(cliente, metodo)(url)
+    try:
+        with transaction.atomic():
+            respuesta = getattr(cliente, metodo)(url, {} if cuerpo is None else cuerpo, format='json')
+            raise _Revertir(respuesta)
+    except _Revertir as revertida:
+        return revertida.args[0]
+
+
+def _tamano(respuesta):
+    if respuesta.streaming:
+        return sum(len(parte) for parte in respuesta.streaming_content)
+    return len(respuesta.content)
+
+
+def contar_consultas(cliente, metodo, url, cuerpo=None):
+    """Respuesta y cantidad de consultas de una llamada"""
+    # Contador sin el límite de queries_log, para las cascadas grandes
+    medicion = Medicion(0)
+    with connection.execute_wrapper(medicion):
+        respuesta = _llamar(cliente, metodo, url, cuerpo)
+        _tamano(respuesta)
+    return respuesta, medicion.consultas
+
+
+def medir_ruta(cliente, metodo, url, repeticiones=REPETICIONES, cuerpo=None):
+    """Tiempos (ms), consultas y tamaño de la respuesta de una ruta"""
+    _tamano(_llamar(cliente, metodo, url, cuerpo))
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        respuesta = _llamar(cliente, metodo, url, cuerpo)
+        tamano = _tamano(respuesta)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    _, consultas = contar_consultas(cliente, metodo, url, cuerpo)
+    return {
+        'estado': respuesta.status_code,
+        'consultas': consultas,
+        'ms_min': round(min(tiempos), 3),
+        'ms_mediana': round(statistics.median(tiempos), 3),
+        'ms_max': round(max(tiempos), 3),
+        'bytes': tamano,
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ejecutar(repeticiones=REPETICIONES, filtro=None, exportaciones=False, con_cache=False, informar=None):
+    """Mide todas las rutas; ``filtro`` es una expresión regular sobre la ruta o la acción"""
+    informar = informar or (lambda mensaje: None)
+    valores = muestras()
+    cuerpos_escritura = cuerpos(valores)
+    cliente = cliente_administrador()
+    resultados = []
+    # Sin caché de respuestas se mide el trabajo real de cada vista
+    ajustes = {} if con_cache else {'MANTENIMIENTO_CACHE_TIMEOUT': 0}
+    # El cliente de pruebas usa el host "testserver"
+    hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+    with override_settings(ALLOWED_HOSTS=hosts, MANTENIMIENTO_METRICAS=False, **ajustes):
+        for ruta in rutas_api():
+            nombre = f"{ruta['metodo'].upper()} {ruta['ruta']} ({ruta['vista']}.{ruta['accion']})"
+            if filtro and not re.search(filtro, nombre):
+                continue
+            resultado = {**ruta, 'url': url_de_ruta(ruta, valores)}
+            escritura = ruta['metodo'] not in ('get', 'head') and ruta['accion'] not in ESCRITURAS_SIN_CUERPO
+            cuerpo = cuerpos_escritura.get((ruta['basename'], ruta['accion'])) if escritura else None
+            if ruta['accion'] in ACCIONES_EXPORTACION and not exportaciones:
+                resultado['omitida'] = 'exportación completa'
+            elif resultado['url'] is None or (escritura and cuerpo is None):
+                resultado['omitida'] = 'sin datos de muestra'
+            else:
+                resultado.update(medir_ruta(cliente, ruta['metodo'], resultado['url'], repeticiones, cuerpo))
+                informar(f"{nombre}: {resultado['ms_mediana']} ms, {resultado['consultas']} consultas")
+            resultados.append(resultado)
+
+    return {
+        'fecha': timezone.now().isoformat(),
+        'commit': _commit(),
+        'base_de_datos': connection.vendor,
+        'repeticiones': repeticiones,
+        'tamanos': {
+            modelo._meta.model_name: modelo.objects.count()
+            for modelo in (Empresa, Equipo, Tecnico, Plan, Orden)
+        },
+        'rutas': resultados,
+    }
+
+
+def rutas_lectura(valores):
+    """Listado, detalle y estadísticas de los cinco recursos, como rutas síncronas"""
+    from .urls import RECURSOS_ASYNC
+
+    rutas = []
+    for prefijo, _, basename in RECURSOS_ASYNC:
+        rutas.append(f'/api/{prefijo}/')
+        if valores.get(basename) is not None:
+            rutas.append(f'/api/{prefijo}/{valores[basename]}/')
+    for prefijo, basename in (('empresas', 'empresa'), ('equipos', 'equipo')):
+        if valores.get(basename) is not None:
+            rutas.append(f'/api/{prefijo}/{valores[basename]}/estadisticas/')
+    return rutas
+
+
+def _percentil(ordenados, fraccion):
+    return round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * fraccion))] * 1000, 3)
+
+
+def _resumen(tiempos, errores, duracion):
+    tiempos = sorted(tiempos)
+    return {
+        'peticiones': len(tiempos),
+        'errores': errores,
+        'segundos': round(duracion, 3),
+        'peticiones_por_segundo': round(len(tiempos) / duracion, 1) if duracion else None,
+        'ms_p50': _percentil(tiempos, 0.5) if tiempos else None,
+        'ms_p95': _percentil(tiempos, 0.95) if tiempos else None,
+    }
+
+
+def carga_wsgi(urls, concurrencia, total):
+    """``total`` peticiones repartidas en ``concurrencia`` hilos con el cliente WSGI"""
+    siguiente = itertools.count()
+    tiempos = []
+    errores = []
+
+    def trabajador():
+        cliente = Client()
+        try:
+            while (indice := next(siguiente)) < total:
+                inicio = time.perf_counter()
+                respuesta = cliente.get(urls[indice % len(urls)])
+                tiempos.append(time.perf_counter() - inicio)
+                if respuesta.status_code != 200:
+                    errores.append(respuesta.status_code)
+        finally:
+            connection.close()
+
+    hilos = [threading.Thread(target=trabajador) for _ in range(concurrencia)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return _resumen(tiempos, len(errores), time.perf_counter() - inicio)
+
+
+def carga_asgi(urls, concurrencia, total):
+    """``total`` peticiones con ``concurrencia`` tareas sobre un event loop con el cliente ASGI"""
+    siguiente = itertools.count()
+    tiempos = []
+    errores = []
+
+    async def trabajador(cliente):
+        while (indice := next(siguiente)) < total:
+            inicio = time.perf_counter()
+            respuesta = await cliente.get(urls[indice % len(urls)])
+            tiempos.append(time.perf_counter() - inicio)
+            if respuesta.status_code != 200:
+                errores.append(respuesta.status_code)
+
+    async def principal():
+        cliente = AsyncClient()
+        inicio = time.perf_counter()
+        try:
+            await asyncio.gather(*(trabajador(cliente) for _ in range(concurrencia)))
+        finally:
+            duracion = time.perf_counter() - inicio
+            await sync_to_async(connections.close_all)()
+        return duracion
+
+    duracion = asyncio.run(principal())
+    return _resumen(tiempos, len(errores), duracion)
+
+
+def concurrencia(niveles=(1, 8, 32, 64), peticiones=200, informar=None):
+    """
+    Peticiones por segundo y latencias p50/p95 de las lecturas síncronas y
+    asíncronas para cada nivel de concurrencia, sin caché de respuestas ni
+    validadores condicionales (las rutas asíncronas no los calculan).
+    """
+    informar = informar or (lambda mensaje: None)
+    urls = rutas_lectura(muestras())
+    resultados = []
+    hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+    with override_settings(ALLOWED_HOSTS=hosts, MANTENIMIENTO_METRICAS=False, MANTENIMIENTO_CACHE_TIMEOUT=0,
+                           MANTENIMIENTO_PETICIONES_CONDICIONALES=False):
+        # Calentamiento de ambos caminos (imports, planes de consulta, conexión)
+        carga_wsgi(urls, 1, len(urls))
+        carga_asgi([url.replace('/api/', '/api/async/', 1) for url in urls], 1, len(urls))
+        for nivel in niveles:
+            for modo, funcion, rutas in (
+                ('wsgi', carga_wsgi, urls),
+                ('asgi', carga_asgi, [url.replace('/api/', '/api/async/', 1) for url in urls]),
+            ):
+                resultado = {'modo': modo, 'concurrencia': nivel, **funcion(rutas, nivel, peticiones)}
+                informar(
+                    f"{modo} x{nivel}: {resultado['peticiones_por_segundo']} req/s, "
+                    f"p50 {resultado['ms_p50']} ms, p95 {resultado['ms_p95']} ms"
+                )
+                resultados.append(resultado)
+
+    return {
+        'fecha': timezone.now().isoformat(),
+        'commit': _commit(),
+        'base_de_datos': connection.vendor,
+        'rutas': urls,
+        'diferencias': DIFERENCIAS_CONCURRENCIA,
+        'resultados': resultados,
+    }
+
+
+def rutas_listados(valores):
+    """Listados servidos con ``ListadoValoresMixin``"""
+    rutas = ['/api/equipos/', '/api/equipos/operativos/', '/api/ordenes/', '/api/ordenes/pendientes/',
+             '/api/ordenes/?paginacion=cursor']
+    if valores.get('empresa') is not None:
+        rutas.append(f"/api/ordenes/por_empresa/?empresa={valores['empresa']}")
+    return rutas
+
+
+def listados(tamano_pagina=100, repeticiones=REPETICIONES, informar=None):
+    """Mediana (ms) de cada listado con el serializador y con ``values_list()``"""
+    informar = informar or (lambda mensaje: None)
+    cliente = cliente_administrador()
+    resultados = []
+    hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+    with override_settings(ALLOWED_HOSTS=hosts, MANTENIMIENTO_METRICAS=False, MANTENIMIENTO_CACHE_TIMEOUT=0):
+        for ruta in rutas_listados(muestras()):
+            separador = '&' if '?' in ruta else '?'
+            url = f'{ruta}{separador}page_size={tamano_pagina}'
+            resultado = {'ruta': ruta}
+            for modo, activos in (('serializador', False), ('valores', True)):
+                with override_settings(MANTENIMIENTO_LISTADOS_VALORES=activos):
+                    medida = medir_ruta(cliente, 'get', url, repeticiones)
+                resultado[modo] = {clave: medida[clave] for clave in ('estado', 'consultas', 'ms_mediana', 'bytes')}
+            antes, despues = resultado['serializador']['ms_mediana'], resultado['valores']['ms_mediana']
+            resultado['aceleracion'] = round(antes / despues, 2) if despues else None
+            informar(f"{ruta}: {antes} -> {despues} ms (x{resultado['aceleracion']})")
+            resultados.append(resultado)
+
+    return {
+        'fecha': timezone.now().isoformat(),
+        'commit': _commit(),
+        'base_de_datos': connection.vendor,
+        'tamano_pagina': tamano_pagina,
+        'repeticiones': repeticiones,
+        'resultados': resultados,
+    }
+
+
+def _mediana_ms(funcion, repeticiones):
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def renderizado(filas=1000, repeticiones=REPETICIONES, informar=None):
+    """
+    Mediana (ms) y MB/s de renderizar y decodificar una página de ``filas``
+    órdenes serializadas con ``OrdenSerializer``, con DRF y con orjson.
+    """
+    informar = informar or (lambda mensaje: None)
+    serializer = OrdenSerializer()
+    ordenes = planificar_consulta(Orden.objects.order_by('-fecha_programada', '-id'), serializer)[:filas]
+    datos = {'count': filas, 'next': None, 'previous': None,
+             'results': OrdenSerializer(ordenes, many=True).data}
+    contenido = JSONRenderer().render(datos)
+    megabytes = len(contenido) / 1e6
+
+    resultados = []
+    for operacion, base, rapido in (
+        ('render', lambda: JSONRenderer().render(datos), lambda: JSONRapidoRenderer().render(datos)),
+        ('parse', lambda: JSONParser().parse(io.BytesIO(contenido)),
+         lambda: JSONRapidoParser().parse(io.BytesIO(contenido))),
+    ):
+        resultado = {'operacion': operacion}
+        for modo, funcion in (('drf', base), ('rapido', rapido)):
+            mediana = _mediana_ms(funcion, repeticiones)
+            resultado[modo] = {
+                'ms_mediana': round(mediana, 3),
+                'mb_por_segundo': round(megabytes / (mediana / 1000), 1) if mediana else None,
+            }
+        antes, despues = resultado['drf']['ms_mediana'], resultado['rapido']['ms_mediana']
+        resultado['aceleracion'] = round(antes / despues, 2) if despues else None
+        informar(f"{operacion}: {antes} -> {despues} ms (x{resultado['aceleracion']})")
+        resultados.append(resultado)
+
+    return {
+        'fecha': timezone.now().isoformat(),
+        'commit': _commit(),
+        'filas': len(datos['results']),
+        'bytes': len(contenido),
+        'identico': JSONRapidoRenderer().render(datos) == contenido,
+        'repeticiones': repeticiones,
+        'resultados': resultados,
+    }
+
+
+def confiabilidad_flota(ventanas=VENTANAS, repeticiones=REPETICIONES, informar=None):
+    """
+    Mediana (ms) de cargar los intervalos de falla de toda la flota para la
+    ventana más larga y de calcular los indicadores por cada agrupación.
+    """
+    informar = informar or (lambda mensaje: None)
+    hasta = timezone.now()
+    desde = hasta - timedelta(days=max(ventanas))
+    equipos = Equipo.objects.all()
+    intervalos = cargar_intervalos(equipos, desde, hasta)
+    carga = _mediana_ms(lambda: cargar_intervalos(equipos, desde, hasta), repeticiones)
+    informar(f'carga: {len(intervalos.inicio)} fallas en {carga:.1f} ms')
+
+    resultados = [{'operacion': 'carga', 'ms_mediana': round(carga, 3)}]
+    for agrupar in AGRUPACIONES:
+        mediana = _mediana_ms(
+            lambda: calcular(intervalos, ventanas=ventanas, agrupar=agrupar, hasta=hasta), repeticiones
+        )
+        informar(f'cálculo por {agrupar}: {mediana:.1f} ms')
+        resultados.append({'operacion': f'calculo_{agrupar}', 'ms_mediana': round(mediana, 3)})
+
+    return {
+        'fecha': timezone.now().isoformat(),
+        'commit': _commit(),
+        'base_de_datos': connection.vendor,
+        'ordenes': Orden.objects.count(),
+        'equipos': len(intervalos.equipos),
+        'fallas': len(intervalos.inicio),
+        'ventanas': list(ventanas),
+        'repeticiones': repeticiones,
+        'resultados': resultados,
+    }
+
+
+def comparar(anterior, actual):
+    """Diferencias de mediana y consultas por ruta entre dos resultados"""
+    def clave(resultado):
+        return (resultado['metodo'], resultado['ruta'], resultado['accion'])
+
+    previos = {clave(resultado): resultado for resultado in anterior['rutas'] if 'ms_mediana' in resultado}
+    diferencias = []
+    for resultado in actual['rutas']:
+        previo = previos.get(clave(resultado))
+        if previo is None or 'ms_mediana' not in resultado:
+            continue
+        diferencias.append({
+            'metodo': resultado['metodo'],
+            'ruta': resultado['ruta'],
+            'accion': resultado['accion'],
+            'ms_antes': previo['ms_mediana'],
+            'ms_despues': resultado['ms_mediana'],
+            'variacion': round(resultado['ms_mediana'] / previo['ms_mediana'] - 1, 4) if previo['ms_mediana'] else None,
+            'consultas_antes': previo['consultas'],
+            'consultas_despues': resultado['consultas'],
+        })
+    return diferencias
@@ -0,0 +1,239 @@
+"""
+Índice de búsqueda de texto completo.
+
+Cada Empresa, Equipo, Técnico, Plan y Orden tiene un documento
+desnormalizado en ``DocumentoBusqueda`` con el texto de sus campos
+buscables (incluidos los de relaciones, como el nombre del equipo de una
+orden). Los documentos se mantienen desde señales y se consultan con:
+
+- SQLite: tabla virtual FTS5 ``mantenimiento_busqueda_fts`` sincronizada
+  por triggers, ordenada por ``bm25``.
+- PostgreSQL: columna ``tsvector`` generada con índice GIN, ordenada por
+  ``ts_rank``.
+
+En otros motores ``disponible()`` retorna False y el filtro de búsqueda
+vuelve al ``SearchFilter`` con ``icontains``.
+
+Los textos y los términos se guardan y consultan sin tildes
+(``normalizar``): la configuración ``simple`` de PostgreSQL no las quita
+y así no depende de la extensión ``unaccent``.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import DocumentoBusqueda
+
+TABLA_FTS = 'mantenimiento_busqueda_fts'
+
+# Campos que forman el documento de cada modelo (admiten rutas con "__")
+CAMPOS_DOCUMENTO = {
+    'empresa': ['nombre', 'rut', 'email', 'ciudad'],
+    'equipo': ['nombre', 'codigo', 'tipo', 'marca'],
+    'tecnico': ['nombre', 'apellido', 'rut', 'email', 'especialidad'],
+    'plan': ['nombre', 'tipo', 'frecuencia'],
+    'orden': ['numero_orden', 'equipo__nombre', 'descripcion'],
+}
+
+# Documentos que incluyen datos de otro modelo: modelo -> [(modelo dependiente, campo FK)]
+DEPENDENCIAS = {
+    'equipo': [('orden', 'equipo')],
+}
+
+TAMANO_LOTE = 1000
+
+RE_PALABRA = re.compile(r'\w+', re.UNICODE)
+
+_tablas_fts = {}
+
+
+def nombre_modelo(modelo):
+    return modelo._meta.model_name
+
+
+def disponible():
+    """Indica si el motor actual tiene índice de texto completo"""
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor != 'sqlite':
+        return False
+    clave = connection.settings_dict['NAME']
+    if clave not in _tablas_fts:
+        _tablas_fts[clave] = TABLA_FTS in connection.introspection.table_names()
+    return _tablas_fts[clave]
+
+
+def normalizar(texto):
+    """Quita tildes y diéresis (``Centrífuga`` queda ``Centrifuga``)"""
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(caracter for caracter in descompuesto if not unicodedata.combining(caracter))
+
+
+def construir_texto(valores):
+    return normalizar(' '.join(str(valor) for valor in valores if valor not in (None, '')))
+
+
+def _valor(instancia, ruta):
+    for atributo in ruta.split('__'):
+        if instancia is None:
+            return None
+        instancia = getattr(instancia, atributo)
+    return instancia
+
+
+def _guardar(nombre, textos):
+    """Guarda los textos ``{objeto_id: texto}`` que cambiaron y retorna sus ids"""
+    actuales = dict(
+        DocumentoBusqueda.objects.filter(modelo=nombre, objeto_id__in=list(textos))
+        .values_list('objeto_id', 'texto')
+    )
+    documentos = [
+        DocumentoBusqueda(modelo=nombre, objeto_id=pk, texto=texto)
+        for pk, texto in textos.items()
+        if actuales.get(pk) != texto
+    ]
+    DocumentoBusqueda.objects.bulk_create(
+        documentos,
+        update_conflicts=True,
+        unique_fields=['modelo', 'objeto_id'],
+        update_fields=['texto'],
+    )
+    return [documento.objeto_id for documento in documentos]
+
+
+def _indexar_dependientes(nombre, cambiados):
+    from django.apps import apps
+
+    for dependiente, campo in DEPENDENCIAS.get(nombre, []):
+        if not cambiados:
+            return
+        modelo_dependiente = apps.get_model('mantenimiento', dependiente)
+        ids_dependientes = modelo_dependiente._default_manager.filter(
+            **{f'{campo}__in': cambiados}
+        ).values_list('pk', flat=True)
+        indexar(modelo_dependiente, ids_dependientes.iterator(chunk_size=TAMANO_LOTE))
+
+
+def indexar_objeto(instancia):
+    """
+    Actualiza el documento de una instancia recién guardada a partir de sus
+    valores en memoria, sin volver a leerla.
+    """
+    nombre = nombre_modelo(instancia)
+    texto = construir_texto(_valor(instancia, campo) for campo in CAMPOS_DOCUMENTO[nombre])
+    cambiados = _guardar(nombre, {instancia.pk: texto})
+    _indexar_dependientes(nombre, cambiados)
+    return cambiados
+
+
+def indexar(modelo, ids):
+    """
+    Crea o actualiza los documentos de los objetos ``ids`` de ``modelo``.
+
+    Retorna los ids cuyo texto cambió.
+    """
+    nombre = nombre_modelo(modelo)
+    campos = CAMPOS_DOCUMENTO[nombre]
+    ids = list(ids)
+    cambiados = []
+    for inicio in range(0, len(ids), TAMANO_LOTE):
+        lote = ids[inicio:inicio + TAMANO_LOTE]
+        textos = {
+            pk: construir_texto(valores)
+            for pk, *valores in (
+                modelo._default_manager.filter(pk__in=lote).order_by().values_list('pk', *campos)
+            )
+        }
+        cambiados.extend(_guardar(nombre, textos))
+    _indexar_dependientes(nombre, cambiados)
+    return cambiados
+
+
+def eliminar(modelo, ids):
+    """Elimina los documentos de los objetos ``ids`` de ``modelo``"""
+    DocumentoBusqueda.objects.filter(modelo=nombre_modelo(modelo), objeto_id__in=list(ids)).delete()
+
+
+def reindexar(modelo, tamano_lote=TAMANO_LOTE):
+    """Reconstruye todos los documentos de ``modelo``"""
+    ids = modelo._default_manager.order_by('pk').values_list('pk', flat=True)
+    DocumentoBusqueda.objects.filter(modelo=nombre_modelo(modelo)).exclude(
+        objeto_id__in=modelo._default_manager.values('pk')
+    ).delete()
+    total = 0
+    lote = []
+    for pk in ids.iterator(chunk_size=tamano_lote):
+        lote.append(pk)
+        if len(lote) == tamano_lote:
+            total += len(indexar(modelo, lote))
+            lote = []
+    if lote:
+        total += len(indexar(modelo, lote))
+    return total
+
+
+def _consulta_fts5(nombre, terminos):
+    frases = ['texto:"{}"*'.format(termino.replace('"', '""')) for termino in terminos]
+    return ' AND '.join([f'modelo:"{nombre}"'] + frases)
+
+
+def _consulta_tsquery(terminos):
+    palabras = [palabra for termino in terminos for palabra in RE_PALABRA.findall(termino)]
+    return ' & '.join(f'{palabra}:*' for palabra in palabras)
+
+
+def _coincidencias(nombre, terminos):
+    """SQL y parámetros de los ``objeto_id`` que coinciden, sin límite"""
+    tabla = DocumentoBusqueda._meta.db_table
+    if connection.vendor == 'postgresql':
+        return (
+            f"SELECT objeto_id FROM {tabla} WHERE modelo = %s AND vector @@ to_tsquery('simple', %s)",
+            [nombre, _consulta_tsquery(terminos)],
+        )
+    return (
+        f"SELECT d.objeto_id FROM {TABLA_FTS} f JOIN {tabla} d ON d.id = f.rowid WHERE {TABLA_FTS} MATCH %s",
+        [_consulta_fts5(nombre, terminos)],
+    )
+
+
+def _relevancia(modelo, nombre, terminos):
+    """
+    Expresión correlacionada con la relevancia de cada fila (menor es más
+    relevante). Se evalúa solo sobre las filas que ya pasaron el filtro.
+    """
+    tabla = DocumentoBusqueda._meta.db_table
+    columna = f'{connection.ops.quote_name(modelo._meta.db_table)}.{connection.ops.quote_name(modelo._meta.pk.column)}'
+    if connection.vendor == 'postgresql':
+        return RawSQL(
+            f"(SELECT -ts_rank(d.vector, to_tsquery('simple', %s)) FROM {tabla} d "
+            f"WHERE d.modelo = %s AND d.objeto_id = {columna})",
+            [_consulta_tsquery(terminos), nombre],
+        )
+    # rowid constante por fila: FTS5 evalúa la coincidencia solo para ese documento
+    return RawSQL(
+        f"(SELECT rank FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s AND rowid = "
+        f"(SELECT d.id FROM {tabla} d WHERE d.modelo = %s AND d.objeto_id = {columna}))",
+        [_consulta_fts5(nombre, terminos), nombre],
+    )
+
+
+def filtrar(queryset, terminos, ordenar=True):
+    """
+    Filtra ``queryset`` a los objetos cuyos documentos coinciden con
+    ``terminos`` (todos deben coincidir, por prefijo), con una subconsulta
+    sin límite dentro de la misma consulta. Con ``ordenar`` los resultados
+    quedan ordenados por relevancia y luego por id.
+    """
+    modelo = queryset.model
+    nombre = nombre_modelo(modelo)
+    terminos = [normalizar(termino) for termino in terminos if RE_PALABRA.search(termino)]
+    if not terminos:
+        return queryset.none()
+
+    sql, parametros = _coincidencias(nombre, terminos)
+    queryset = queryset.filter(pk__in=RawSQL(sql, parametros))
+    if ordenar:
+        queryset = queryset.order_by(_relevancia(modelo, nombre, terminos).asc(), 'pk')
+    return queryset
@@ -0,0 +1,219 @@
+"""
+Caché de respuestas de lectura de la API.
+
+Las respuestas se guardan en el backend de caché configurado en
+``MANTENIMIENTO_CACHE_ALIAS`` (local en memoria por defecto; puede ser
+``FileBasedCache`` o ``RedisCache`` para compartirla entre procesos).
+
+La clave de cada respuesta incluye la vista y acción, el host, la ruta con
+sus parámetros ordenados, el usuario y las versiones actuales de las
+*etiquetas* de las que depende, por ejemplo ``equipo`` (cualquier equipo)
+o ``equipo:12`` (el equipo 12 y sus planes y órdenes). Las señales de
+``Empresa``, ``Equipo``, ``Tecnico``, ``Plan`` y ``Orden`` renuevan las
+versiones de las etiquetas afectadas, con lo que las entradas antiguas
+dejan de usarse y expiran solas. Las operaciones masivas que no disparan
+señales llaman a ``invalidar`` directamente.
+"""
+import functools
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+PREFIJO = 'mant'
+
+# Campos FK de cada modelo que generan etiquetas de objeto
+RELACIONES_ETIQUETAS = {
+    'empresa': (),
+    'equipo': ('empresa',),
+    'tecnico': (),
+    'plan': ('empresa', 'equipo'),
+    'orden': ('empresa', 'equipo'),
+}
+
+# Vistas cacheadas ("ViewSet.accion"), para informar sus contadores
+_vistas = set()
+
+
+def obtener_cache():
+    return caches[getattr(settings, 'MANTENIMIENTO_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'MANTENIMIENTO_CACHE_TIMEOUT', 300)
+
+
+def _clave_version(etiqueta):
+    return f'{PREFIJO}:v:{etiqueta}'
+
+
+def _clave_contador(vista, tipo):
+    return f'{PREFIJO}:contador:{vista}:{tipo}'
+
+
+def _renovar(etiquetas):
+    obtener_cache().set_many(
+        {_clave_version(etiqueta): uuid.uuid4().hex for etiqueta in etiquetas},
+        timeout=None,
+    )
+
+
+def invalidar(etiquetas):
+    """
+    Renueva las versiones de ``etiquetas``. Si hay una transacción en curso
+    se renuevan otra vez al confirmarla, para descartar respuestas
+    calculadas con datos anteriores al commit.
+    """
+    etiquetas = set(etiquetas)
+    if not etiquetas:
+        return
+    _renovar(etiquetas)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _renovar(etiquetas))
+
+
+def versiones(etiquetas):
+    """Versiones actuales de ``etiquetas``; crea las que falten"""
+    cache = obtener_cache()
+    claves = {etiqueta: _clave_version(etiqueta) for etiqueta in etiquetas}
+    actuales = cache.get_many(list(claves.values()))
+    faltantes = {clave: uuid.uuid4().hex for clave in claves.values() if clave not in actuales}
+    if faltantes:
+        cache.set_many(faltantes, timeout=None)
+        actuales.update(faltantes)
+    return [actuales[claves[etiqueta]] for etiqueta in sorted(etiquetas)]
+
+
+def etiquetas_objeto(modelo, pk, relaciones=None):
+    """Etiquetas que cambian al modificar un objeto de ``modelo``"""
+    etiquetas = {modelo, f'{modelo}:{pk}'}
+    for relacion, relacionado_id in (relaciones or {}).items():
+        if relacionado_id is not None:
+            etiquetas.add(f'{relacion}:{relacionado_id}')
+    return etiquetas
+
+
+def etiquetas_instancia(instancia):
+    """Etiquetas de una instancia con sus valores actuales y los leídos de la base"""
+    modelo = instancia._meta.model_name
+    cargados = getattr(instancia, '_valores_cargados', {})
+    etiquetas = set()
+    for valores in (cargados, None):
+        relaciones = {
+            relacion: (getattr(instancia, f'{relacion}_id') if valores is None else valores.get(f'{relacion}_id'))
+            for relacion in RELACIONES_ETIQUETAS[modelo]
+        }
+        etiquetas |= etiquetas_objeto(modelo, instancia.pk, relaciones)
+    return etiquetas
+
+
+def etiquetas_ordenes(filas):
+    """Etiquetas de órdenes dadas como pares (empresa_id, equipo_id)"""
+    etiquetas = {'orden'}
+    for empresa_id, equipo_id in filas:
+        etiquetas.add(f'empresa:{empresa_id}')
+        etiquetas.add(f'equipo:{equipo_id}')
+    return etiquetas
+
+
+def _contar(vista, tipo):
+    cache = obtener_cache()
+    clave = _clave_contador(vista, tipo)
+    cache.add(clave, 0, timeout=None)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        # La clave expiró o fue desalojada entre add e incr
+        cache.set(clave, 1, timeout=None)
+
+
+def contadores():
+    """Aciertos y fallos por vista cacheada"""
+    cache = obtener_cache()
+    claves = [_clave_contador(vista, tipo) for vista in sorted(_vistas) for tipo in ('hit', 'miss')]
+    valores = cache.get_many(claves)
+    resultado = {}
+    for vista in sorted(_vistas):
+        aciertos = valores.get(_clave_contador(vista, 'hit'), 0)
+        fallos = valores.get(_clave_contador(vista, 'miss'), 0)
+        total = aciertos + fallos
+        resultado[vista] = {
+            'hits': aciertos,
+            'misses': fallos,
+            'hit_ratio': round(aciertos / total, 4) if total else None,
+        }
+    return resultado
+
+
+def reiniciar_contadores():
+    obtener_cache().delete_many(
+        [_clave_contador(vista, tipo) for vista in _vistas for tipo in ('hit', 'miss')]
+    )
+
+
+def etiqueta_detalle(modelo):
+    """Etiquetas de una acción de detalle: el objeto de la URL"""
+    return lambda request, kwargs: [f"{modelo}:{kwargs.get('pk')}"]
+
+
+def etiquetas_parametro(modelo, parametro):
+    """Etiquetas de los objetos indicados en ``?parametro=1,2,3``"""
+    def etiquetas(request, kwargs):
+        valores = request.query_params.get(parametro, '').split(',')
+        return [f'{modelo}:{valor.strip()}' for valor in valores if valor.strip()]
+    return etiquetas
+
+
+def _clave_respuesta(vista, request, etiquetas):
+    usuario = request.user.pk if request.user.is_authenticated else 'anon'
+    parametros = sorted(request.query_params.lists())
+    partes = [vista, request.get_host(), request.path, repr(parametros), str(usuario), *versiones(etiquetas)]
+    resumen = hashlib.sha256('|'.join(partes).encode('utf-8')).hexdigest()
+    return f'{PREFIJO}:r:{vista}:{resumen}'
+
+
+def cachear_respuesta(modelos=(), etiquetas=None, timeout=None):
+    """
+    Cachea las respuestas 200 de una acción de lectura de un ViewSet.
+
+    ``modelos`` son etiquetas de modelo completas (p. ej. ``('equipo',
+    'empresa')``); ``etiquetas`` es una función ``(request, kwargs)`` que
+    retorna etiquetas adicionales, p. ej. ``etiqueta_detalle('equipo')``.
+    ``timeout`` (segundos o función sin argumentos) reemplaza a
+    ``MANTENIMIENTO_CACHE_TIMEOUT``.
+    """
+    def decorador(metodo):
+        vista = metodo.__qualname__
+        _vistas.add(vista)
+
+        @functools.wraps(metodo)
+        def envoltura(self, request, *args, **kwargs):
+            dependencias = set(modelos)
+            if etiquetas is not None:
+                dependencias.update(etiquetas(request, kwargs))
+
+            cache = obtener_cache()
+            clave = _clave_respuesta(vista, request, dependencias)
+            guardado = cache.get(clave)
+            if guardado is not None:
+                _contar(vista, 'hit')
+                respuesta = Response(guardado)
+                respuesta['X-Cache'] = 'HIT'
+                return respuesta
+
+            _contar(vista, 'miss')
+            respuesta = metodo(self, request, *args, **kwargs)
+            if respuesta.status_code == status.HTTP_200_OK and isinstance(respuesta, Response):
+                if timeout is None:
+                    duracion = _timeout()
+                else:
+                    duracion = timeout() if callable(timeout) else timeout
+                cache.set(clave, respuesta.data, timeout=duracion)
+            respuesta['X-Cache'] = 'MISS'
+            return respuesta
+        return envoltura
+    return decorador
@@ -0,0 +1,129 @@
+"""
+Carga masiva de órdenes de trabajo.
+
+Las filas se validan por lotes: para cada lote se precargan con una sola
+consulta por modelo las empresas, equipos, planes y técnicos referenciados,
+y las órdenes válidas se insertan con ``bulk_create`` usando un bloque de
+números reservado de una vez.
+"""
+from django.db import transaction
+
+from . import busqueda, cache_respuestas, pronostico, rollups
+from .models import Empresa, Equipo, Tecnico, Plan, Orden
+from .secuencias import reservar_numeros_orden
+from .serializers import OrdenCargaMasivaSerializer
+
+MODO_PARCIAL = 'parcial'
+MODO_ATOMICO = 'atomico'
+MODOS = (MODO_PARCIAL, MODO_ATOMICO)
+
+TAMANO_LOTE = 500
+
+# Campo de la fila -> modelo referenciado
+RELACIONES = {
+    'empresa': Empresa,
+    'equipo': Equipo,
+    'plan': Plan,
+    'tecnico_asignado': Tecnico,
+}
+
+
+def _precargar(filas):
+    """Obtiene en una consulta por modelo las instancias referenciadas"""
+    ids = {modelo: set() for modelo in RELACIONES.values()}
+    for fila in filas:
+        if not isinstance(fila, dict):
+            continue
+        for campo, modelo in RELACIONES.items():
+            valor = fila.get(campo)
+            if isinstance(valor, bool):
+                continue
+            try:
+                ids[modelo].add(int(valor))
+            except (TypeError, ValueError):
+                pass
+    return {
+        modelo: modelo.objects.in_bulk(pks) if pks else {}
+        for modelo, pks in ids.items()
+    }
+
+
+def _validar_lote(filas, desplazamiento):
+    """Valida un lote y retorna (ordenes válidas, errores) con su índice de fila"""
+    contexto = {'precargados': _precargar(filas)}
+    validas, errores = [], []
+    for indice, fila in enumerate(filas, start=desplazamiento):
+        if not isinstance(fila, dict):
+            errores.append({'indice': indice, 'errores': {'non_field_errors': ['Se esperaba un objeto JSON.']}})
+            continue
+        serializer = OrdenCargaMasivaSerializer(data=fila, context=contexto)
+        if serializer.is_valid():
+            validas.append((indice, Orden(**serializer.validated_data)))
+        else:
+            errores.append({'indice': indice, 'errores': serializer.errors})
+    return validas, errores
+
+
+def _insertar(validas):
+    """Asigna números de orden reservados en bloque e inserta las órdenes"""
+    if not validas:
+        return []
+    numeros = reservar_numeros_orden(len(validas))
+    ordenes = []
+    for (_, orden), numero in zip(validas, numeros):
+        orden.numero_orden = numero
+        ordenes.append(orden)
+    with transaction.atomic():
+        Orden.objects.bulk_create(ordenes, batch_size=TAMANO_LOTE)
+        # bulk_create no dispara señales: se recalculan los resúmenes afectados y
+        # los planes predictivos de los equipos con órdenes completadas, se
+        # indexan las nuevas órdenes y se invalida la caché de respuestas
+        rollups.recalcular_equipos({orden.equipo_id for orden in ordenes})
+        if pronostico.automatico():
+            pronostico.actualizar_equipos({orden.equipo_id for orden in ordenes if orden.estado == 'completada'})
+        if busqueda.disponible():
+            busqueda.indexar(Orden, [orden.pk for orden in ordenes])
+        cache_respuestas.invalidar(cache_respuestas.etiquetas_ordenes(
+            (orden.empresa_id, orden.equipo_id) for orden in ordenes
+        ))
+    return [
+        {'indice': indice, 'id': orden.pk, 'numero_orden': orden.numero_orden}
+        for (indice, orden) in validas
+    ]
+
+
+def cargar_ordenes(filas, modo=MODO_PARCIAL, tamano_lote=TAMANO_LOTE):
+    """
+    Valida e inserta ``filas`` (lista de diccionarios).
+
+    En modo ``parcial`` se insertan las filas válidas de cada lote y se
+    informan los errores del resto. En modo ``atomico`` basta un error para
+    que no se inserte ninguna orden.
+
+    Retorna un diccionario con ``creadas``, ``errores`` y los ``resultados``
+    por fila, ordenados por índice.
+    """
+    if modo not in MODOS:
+        raise ValueError(f'Modo inválido: {modo}')
+
+    creadas, errores = [], []
+    if modo == MODO_ATOMICO:
+        validas = []
+        for inicio in range(0, len(filas), tamano_lote):
+            lote_validas, lote_errores = _validar_lote(filas[inicio:inicio + tamano_lote], inicio)
+            validas.extend(lote_validas)
+            errores.extend(lote_errores)
+        if not errores:
+            creadas = _insertar(validas)
+    else:
+        for inicio in range(0, len(filas), tamano_lote):
+            lote_validas, lote_errores = _validar_lote(filas[inicio:inicio + tamano_lote], inicio)
+            creadas.extend(_insertar(lote_validas))
+            errores.extend(lote_errores)
+
+    return {
+        'modo': modo,
+        'creadas': len(creadas),
+        'errores': len(errores),
+        'resultados': sorted(creadas + errores, key=lambda r: r['indice']),
+    }
@@ -0,0 +1,182 @@
+"""
+Validadores (ETag y Last-Modified) para peticiones condicionales.
+
+Los validadores se calculan sin serializar, con una sola consulta de
+agregados sobre ``fecha_actualizacion``:
+
+- Listados: ``Max`` y ``Count`` del queryset filtrado (índice de
+  ``fecha_actualizacion``), más el ``Max`` de la tabla completa de cada
+  relación que el serializador carga con ``select_related`` (p. ej. el
+  nombre de la empresa de cada equipo). Para las relaciones se usa la
+  tabla completa porque se resuelve con el índice sin recorrer el
+  listado; el ETag cambia de más, nunca de menos. Las colecciones a
+  muchos que se precargan (p. ej. ``?expand=empresas``) agregan el ``Max``
+  y el ``Count`` de sus filas relacionadas con el listado.
+- Detalle: ``fecha_actualizacion`` del objeto y de sus relaciones directas,
+  más ``Max`` y ``Count`` de cada colección que el serializador incluye.
+
+El ETag es fuerte: resume además la ruta, los parámetros y el formato de
+la respuesta. Una baja en un listado no cambia ``Last-Modified`` pero sí el
+``Count`` y por lo tanto el ETag.
+
+Con ``MANTENIMIENTO_PETICIONES_CONDICIONALES = False`` las lecturas no
+calculan validadores (``If-Match`` en las escrituras se sigue respetando).
+"""
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Count, F, ForeignObjectRel, Func, Max, OuterRef, Subquery
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .consultas import plan_para
+
+CAMPO_FECHA = 'fecha_actualizacion'
+
+
+def activos():
+    return getattr(settings, 'MANTENIMIENTO_PETICIONES_CONDICIONALES', True)
+
+
+class Validadores:
+    """ETag y fecha de última modificación de una respuesta"""
+
+    def __init__(self, etag, ultima_modificacion):
+        self.etag = etag
+        self.ultima_modificacion = ultima_modificacion
+
+    def aplicar(self, respuesta):
+        respuesta['ETag'] = self.etag
+        if self.ultima_modificacion is not None:
+            respuesta['Last-Modified'] = http_date(self.ultima_modificacion.timestamp())
+        return respuesta
+
+
+def _rutas_relaciones(serializer):
+    return sorted(plan_para(serializer).select)
+
+
+def _modelo_ruta(modelo, ruta):
+    for nombre in ruta.split('__'):
+        modelo = modelo._meta.get_field(nombre).related_model
+    return modelo
+
+
+def _ultima_de_tabla(modelo):
+    """Subconsulta con el último ``fecha_actualizacion`` de la tabla (un acceso al índice)"""
+    return Subquery(
+        modelo._default_manager.order_by(f'-{CAMPO_FECHA}').values(CAMPO_FECHA)[:1]
+    )
+
+
+def _colecciones(modelo, serializer):
+    """Relaciones a muchos que serializa el detalle (precargadas o acotadas)"""
+    if hasattr(serializer, 'child'):
+        serializer = serializer.child
+    nombres = set(ruta for ruta in plan_para(serializer).prefetch if '__' not in ruta)
+    if hasattr(serializer, 'get_colecciones'):
+        nombres.update(serializer.get_colecciones())
+    return [modelo._meta.get_field(nombre) for nombre in sorted(nombres)]
+
+
+def _subconsultas(campo):
+    """Subconsultas de Max(fecha_actualizacion) y Count de una colección"""
+    if isinstance(campo, ForeignObjectRel):
+        filtro = campo.field.name
+    else:
+        filtro = campo.related_query_name()
+    base = (
+        campo.related_model._default_manager.filter(**{filtro: OuterRef('pk')})
+        .order_by().values(filtro)
+    )
+    return (
+        Subquery(base.annotate(u=Max(CAMPO_FECHA)).values('u')),
+        Subquery(base.annotate(n=Count('pk')).values('n')),
+    )
+
+
+def _subconsultas_listado(campo, queryset):
+    """Subconsultas de Max(fecha_actualizacion) y Count de una colección de todas las filas del listado"""
+    if isinstance(campo, ForeignObjectRel):
+        filtro = campo.field.name
+    else:
+        filtro = campo.related_query_name()
+    base = campo.related_model._default_manager.filter(
+        **{f'{filtro}__in': queryset.order_by().values('pk')}
+    ).order_by()
+    return (
+        Subquery(base.order_by(f'-{CAMPO_FECHA}').values(CAMPO_FECHA)[:1]),
+        # Func en vez de Count: un solo agregado sin GROUP BY dentro de la subconsulta
+        Subquery(base.annotate(n=Func(F('pk'), function='COUNT')).values('n')),
+    )
+
+
+def _etag(partes):
+    resumen = hashlib.sha256(repr(partes).encode('utf-8')).hexdigest()
+    return quote_etag(resumen[:40])
+
+
+def _ultima(valores):
+    fechas = [valor for valor in valores if isinstance(valor, datetime.datetime)]
+    return max(fechas) if fechas else None
+
+
+def _contexto(request):
+    formato = getattr(getattr(request, 'accepted_renderer', None), 'format', None)
+    return (request.path, sorted(request.query_params.lists()), formato)
+
+
+def validadores_listado(request, queryset, serializer):
+    """Validadores de un listado a partir del queryset ya filtrado"""
+    agregados = {'_u': Max(CAMPO_FECHA), '_n': Count('pk')}
+    modelos = {_modelo_ruta(queryset.model, ruta) for ruta in _rutas_relaciones(serializer)}
+    for indice, modelo in enumerate(sorted(modelos, key=lambda modelo: modelo._meta.label)):
+        agregados[f'_r{indice}'] = Max(_ultima_de_tabla(modelo))
+    for indice, campo in enumerate(_colecciones(queryset.model, serializer)):
+        ultima, cantidad = _subconsultas_listado(campo, queryset)
+        agregados[f'_c{indice}u'], agregados[f'_c{indice}n'] = Max(ultima), Max(cantidad)
+    valores = queryset.order_by().aggregate(**agregados)
+    valores = [valores[clave] for clave in sorted(valores)]
+    return Validadores(_etag((_contexto(request), valores)), _ultima(valores))
+
+
+def validadores_detalle(request, queryset, pk, serializer):
+    """Validadores del detalle del objeto ``pk``, o ``None`` si no existe"""
+    columnas = [CAMPO_FECHA] + [f'{ruta}__{CAMPO_FECHA}' for ruta in _rutas_relaciones(serializer)]
+    anotaciones = {}
+    for indice, campo in enumerate(_colecciones(queryset.model, serializer)):
+        anotaciones[f'_c{indice}u'], anotaciones[f'_c{indice}n'] = _subconsultas(campo)
+    try:
+        fila = (
+            queryset.filter(pk=pk).order_by()
+            .annotate(**anotaciones)
+            .values_list(*columnas, *sorted(anotaciones))
+            .first()
+        )
+    except (ValueError, TypeError, ValidationError):
+        # pk con formato inválido: el detalle responderá 404
+        return None
+    if fila is None:
+        return None
+    valores = list(fila)
+    return Validadores(_etag((_contexto(request), valores)), _ultima(valores))
+
+
+def etag_coincide(cabecera, etag):
+    """Compara una cabecera If-Match / If-None-Match con un ETag"""
+    if cabecera is None:
+        return False
+    etiquetas = [valor.strip() for valor in cabecera.split(',')]
+    return '*' in etiquetas or etag in etiquetas
+
+
+def no_modificado(request, validadores):
+    """Indica si la petición GET/HEAD puede responderse con 304"""
+    si_no_coincide = request.headers.get('If-None-Match')
+    if si_no_coincide is not None:
+        return etag_coincide(si_no_coincide, validadores.etag)
+    desde = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    if desde is None or validadores.ultima_modificacion is None:
+        return False
+    return int(validadores.ultima_modificacion.timestamp()) <= desde
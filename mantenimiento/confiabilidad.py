@@ -0,0 +1,257 @@
+"""
+Indicadores de confiabilidad (MTBF, MTTR, disponibilidad y tasa de fallas)
+desde el historial de órdenes.
+
+Una *falla* es una orden correctiva iniciada (con ``fecha_inicio``) y no
+cancelada: sin plan (falla reportada) o de un plan ``correctivo``. El
+equipo está detenido desde ``fecha_inicio`` hasta ``fecha_termino`` (o
+``fecha_inicio + horas_trabajadas`` si falta el término); las fallas aún
+abiertas lo detienen hasta el final de la ventana.
+
+``cargar_intervalos`` lee los intervalos con una sola consulta recorrida
+por lotes del cursor, con las fechas convertidas a segundos en SQL
+(``Epoca``), y los deja en arreglos de NumPy ordenados por equipo e
+inicio. ``calcular`` evalúa cada ventana móvil ``[hasta - dias, hasta)``
+sin recorrer filas en Python:
+
+- Los intervalos se recortan a la ventana y se unen por equipo (las
+  detenciones superpuestas cuentan una vez) con un máximo acumulado.
+- Fallas, reparaciones y horas se suman por equipo con ``np.bincount`` y
+  luego por tipo de equipo o empresa.
+- Horas de operación = horas de la ventana (desde la instalación del
+  equipo, si es posterior) menos horas detenido.
+- MTBF = horas de operación / fallas; MTTR = horas de reparación /
+  reparaciones terminadas en la ventana; disponibilidad = horas de
+  operación / horas de la ventana; tasa de fallas = fallas por 1.000 horas
+  de operación.
+
+Los indicadores sin datos (p. ej. MTBF sin fallas) se informan como ``None``.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import NotSupportedError
+from django.db.models import FloatField, Func, Q
+from django.db.models.functions import Cast
+from django.db.models.sql.constants import MULTI
+from django.utils import timezone
+
+from .models import Equipo, Orden
+
+AGRUPACIONES = ('empresa', 'tipo', 'equipo')
+VENTANAS = (30, 90, 365)
+TAMANO_LOTE = 100_000
+SEGUNDOS_HORA = 3600.0
+
+
+class Epoca(Func):
+    """Segundos desde 1970-01-01 UTC de una fecha, como número de punto flotante"""
+    arity = 1
+    output_field = FloatField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        sql, parametros = compiler.compile(self.get_source_expressions()[0])
+        return f'((julianday({sql}) - 2440587.5) * 86400.0)', parametros
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        sql, parametros = compiler.compile(self.get_source_expressions()[0])
+        return f'EXTRACT(EPOCH FROM {sql})::double precision', parametros
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        sql, parametros = compiler.compile(self.get_source_expressions()[0])
+        return f'UNIX_TIMESTAMP({sql})', parametros
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(f'Epoca no está implementado para {connection.vendor}')
+
+
+def fallas():
+    """Queryset de las órdenes que cuentan como fallas"""
+    return Orden.objects.filter(
+        Q(plan__isnull=True) | Q(plan__tipo='correctivo'),
+        fecha_inicio__isnull=False,
+    ).exclude(estado='cancelada')
+
+
+def leer_arreglo(filas, columnas, tamano_lote=TAMANO_LOTE):
+    """
+    Arreglo ``(filas, columnas)`` de un ``values_list`` numérico, leído por
+    lotes de tuplas del cursor sin convertir cada fila en Python. ``None``
+    se convierte en NaN.
+    """
+    compilador = filas.query.get_compiler(using=filas.db)
+    lotes = [
+        np.array(lote, dtype=np.float64)
+        for lote in compilador.execute_sql(MULTI, chunked_fetch=True, chunk_size=tamano_lote)
+    ]
+    return np.concatenate(lotes) if lotes else np.empty((0, columnas))
+
+
+class Intervalos:
+    """Detenciones por falla de un conjunto de equipos, en arreglos de NumPy"""
+
+    def __init__(self, equipos, empresas, tipos, instalacion, equipo, inicio, fin, reparada):
+        # Por equipo (ordenados por id)
+        self.equipos = equipos
+        self.empresas = empresas
+        self.tipos = tipos
+        self.instalacion = instalacion
+        # Por falla (ordenadas por equipo e inicio); ``equipo`` es la posición en ``equipos``
+        self.equipo = equipo
+        self.inicio = inicio
+        self.fin = fin
+        self.reparada = reparada
+
+
+def cargar_intervalos(equipos, desde, hasta, tamano_lote=TAMANO_LOTE):
+    """
+    ``Intervalos`` de los equipos del queryset ``equipos`` que se superponen
+    con ``[desde, hasta)``.
+    """
+    filas_equipos = list(
+        equipos.order_by('pk').values_list('pk', 'empresa_id', 'tipo', Epoca('fecha_instalacion'))
+    )
+    ids = np.array([fila[0] for fila in filas_equipos], dtype=np.int64)
+    empresas = np.array([fila[1] for fila in filas_equipos], dtype=np.int64)
+    tipos = np.array([fila[2] for fila in filas_equipos], dtype=object)
+    instalacion = np.array([fila[3] for fila in filas_equipos], dtype=np.float64)
+
+    ordenes = fallas().filter(
+        Q(fecha_termino__isnull=True) | Q(fecha_termino__gte=desde),
+        fecha_inicio__lt=hasta,
+    )
+    if equipos.query.has_filters():
+        # Sin filtros (toda la flota) se recorre la tabla sin buscar cada equipo en el índice
+        ordenes = ordenes.filter(equipo__in=equipos.values('pk'))
+    ordenes = ordenes.order_by().values_list(
+        'equipo_id', Epoca('fecha_inicio'), Epoca('fecha_termino'), Cast('horas_trabajadas', FloatField()),
+    )
+
+    datos = leer_arreglo(ordenes, 4, tamano_lote)
+
+    equipo = np.searchsorted(ids, datos[:, 0].astype(np.int64))
+    inicio = datos[:, 1]
+    fin = np.where(np.isnan(datos[:, 2]), inicio + datos[:, 3] * SEGUNDOS_HORA, datos[:, 2])
+    reparada = ~np.isnan(fin)
+    # Fallas abiertas: detenidas hasta el final de cualquier ventana
+    fin = np.where(reparada, np.maximum(fin, inicio), np.inf)
+
+    orden = np.lexsort((inicio, equipo))
+    return Intervalos(ids, empresas, tipos, instalacion, equipo[orden], inicio[orden], fin[orden], reparada[orden])
+
+
+def _detencion_unida(equipo, inicio, fin, cantidad):
+    """Segundos detenidos por equipo, contando una vez los intervalos superpuestos"""
+    if not len(inicio):
+        return np.zeros(cantidad)
+    # Desplazar cada equipo para que el máximo acumulado no cruce de un equipo al siguiente
+    desplazamiento = equipo * (np.max(fin - inicio.min()) + 1.0) - inicio.min()
+    inicio_d = inicio + desplazamiento
+    fin_d = fin + desplazamiento
+    hasta_ahora = np.maximum.accumulate(fin_d)
+    previo = np.concatenate(([-np.inf], hasta_ahora[:-1]))
+    aporte = np.clip(fin_d - np.maximum(inicio_d, previo), 0, None)
+    return np.bincount(equipo, weights=aporte, minlength=cantidad)
+
+
+def _sumas_ventana(intervalos, dias, hasta):
+    """Sumas por equipo de una ventana: segundos, detención, fallas, reparaciones y horas de reparación"""
+    fin_ventana = hasta.timestamp()
+    inicio_ventana = fin_ventana - dias * 86400.0
+    cantidad = len(intervalos.equipos)
+
+    comienzo = np.fmax(intervalos.instalacion, inicio_ventana)
+    segundos = np.clip(fin_ventana - comienzo, 0, None)
+
+    equipo, inicio, fin = intervalos.equipo, intervalos.inicio, intervalos.fin
+    superpuestos = (fin > inicio_ventana) & (inicio < fin_ventana)
+    recorte_inicio = np.maximum(inicio[superpuestos], comienzo[equipo[superpuestos]])
+    recorte_fin = np.minimum(fin[superpuestos], fin_ventana)
+    detencion = _detencion_unida(
+        equipo[superpuestos], recorte_inicio, np.maximum(recorte_fin, recorte_inicio), cantidad
+    )
+
+    en_ventana = (inicio >= inicio_ventana) & (inicio < fin_ventana)
+    reparadas = en_ventana & intervalos.reparada & (fin <= fin_ventana)
+    return {
+        'segundos': segundos,
+        'detencion': np.minimum(detencion, segundos),
+        'fallas': np.bincount(equipo[en_ventana], minlength=cantidad),
+        'reparaciones': np.bincount(equipo[reparadas], minlength=cantidad),
+        'reparacion': np.bincount(equipo[reparadas], weights=(fin - inicio)[reparadas], minlength=cantidad),
+    }
+
+
+def _indicadores(segundos, detencion, fallas, reparaciones, reparacion):
+    """Indicadores por grupo desde sus sumas (arreglos), como listas de diccionarios"""
+    horas = segundos / SEGUNDOS_HORA
+    operacion = (segundos - detencion) / SEGUNDOS_HORA
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mtbf = np.where(fallas > 0, operacion / fallas, np.nan)
+        mttr = np.where(reparaciones > 0, reparacion / SEGUNDOS_HORA / reparaciones, np.nan)
+        disponibilidad = np.where(horas > 0, operacion / horas, np.nan)
+        tasa = np.where(operacion > 0, fallas / operacion * 1000, np.nan)
+
+    def valor(numero, decimales):
+        return None if np.isnan(numero) else round(float(numero), decimales)
+
+    return [
+        {
+            'fallas': int(fallas[i]),
+            'reparaciones': int(reparaciones[i]),
+            'horas_operacion': round(float(operacion[i]), 2),
+            'horas_detencion': round(float(detencion[i] / SEGUNDOS_HORA), 2),
+            'mtbf_horas': valor(mtbf[i], 2),
+            'mttr_horas': valor(mttr[i], 2),
+            'disponibilidad': valor(disponibilidad[i], 4),
+            'tasa_fallas': valor(tasa[i], 4),
+        }
+        for i in range(len(segundos))
+    ]
+
+
+def _claves(intervalos, agrupar):
+    """(claves ordenadas, grupo de cada equipo)"""
+    if agrupar == 'equipo':
+        return intervalos.equipos.tolist(), np.arange(len(intervalos.equipos))
+    valores = intervalos.empresas if agrupar == 'empresa' else intervalos.tipos.astype(str)
+    claves, grupos = np.unique(valores, return_inverse=True)
+    return claves.tolist(), grupos
+
+
+def calcular(intervalos, ventanas=VENTANAS, agrupar='equipo', hasta=None):
+    """
+    Indicadores por grupo (``empresa``, ``tipo`` o ``equipo``) y por ventana.
+
+    Retorna ``{'grupos': [{'grupo': clave, 'ventanas': [...]}], 'flota':
+    [...]}``, con los grupos ordenados por clave (id de la
+    empresa o del equipo, o tipo de equipo).
+    """
+    if agrupar not in AGRUPACIONES:
+        raise ValueError(f'Agrupación inválida: {agrupar}')
+    hasta = hasta or timezone.now()
+    claves, grupos = _claves(intervalos, agrupar)
+    cantidad = len(claves)
+
+    resultados = [{'grupo': clave, 'ventanas': []} for clave in claves]
+    flota = []
+    for dias in ventanas:
+        sumas = _sumas_ventana(intervalos, dias, hasta)
+        por_grupo = {
+            nombre: np.bincount(grupos, weights=valores, minlength=cantidad) if cantidad else np.zeros(0)
+            for nombre, valores in sumas.items()
+        }
+        for resultado, indicadores in zip(resultados, _indicadores(**por_grupo)):
+            resultado['ventanas'].append({'dias': dias, **indicadores})
+        totales = {nombre: np.array([valores.sum()]) for nombre, valores in sumas.items()}
+        flota.append({'dias': dias, **_indicadores(**totales)[0]})
+    return {'grupos': resultados, 'flota': flota}
+
+
+def evaluar(equipos=None, ventanas=VENTANAS, agrupar='equipo', hasta=None):
+    """Carga los intervalos de ``equipos`` (todos por defecto) y calcula sus indicadores"""
+    hasta = hasta or timezone.now()
+    equipos = Equipo.objects.all() if equipos is None else equipos
+    desde = hasta - timedelta(days=max(ventanas))
+    intervalos = cargar_intervalos(equipos, desde, hasta)
+    return calcular(intervalos, ventanas=ventanas, agrupar=agrupar, hasta=hasta)
@@ -0,0 +1,147 @@
+"""
+Planificación automática de consultas a partir de los serializadores.
+
+``planificar_consulta`` recorre los campos de un serializador (incluidos
+los anidados) y deduce desde sus rutas ``source`` qué relaciones deben
+cargarse con ``select_related``, cuáles con ``prefetch_related`` y qué
+columnas necesita cada modelo para aplicar ``only()``.
+"""
+import re
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+RE_DISPLAY = re.compile(r'^get_(\w+)_display$')
+
+
+def _unir(ruta, atributo):
+    return f'{ruta}__{atributo}' if ruta else atributo
+
+
+class PlanConsulta:
+    """Relaciones y columnas que requiere un serializador sobre un modelo"""
+
+    def __init__(self, modelo):
+        self.modelo = modelo
+        self.select = set()
+        self.prefetch = {}
+        # ruta -> (modelo, columnas); columnas None significa "todas"
+        self.columnas = {'': (modelo, set())}
+
+    def columna(self, ruta, nombre):
+        modelo, columnas = self.columnas[ruta]
+        if columnas is not None:
+            columnas.add(nombre)
+
+    def todas(self, ruta):
+        modelo, _ = self.columnas[ruta]
+        self.columnas[ruta] = (modelo, None)
+
+    def relacion(self, ruta, modelo):
+        self.select.add(ruta)
+        self.columnas.setdefault(ruta, (modelo, set()))
+
+    def anidado(self, ruta, modelo):
+        if ruta not in self.prefetch:
+            self.prefetch[ruta] = PlanConsulta(modelo)
+        return self.prefetch[ruta]
+
+    def only(self):
+        campos = []
+        for ruta, (modelo, columnas) in self.columnas.items():
+            if columnas is None:
+                columnas = [f.name for f in modelo._meta.concrete_fields]
+            campos.extend(_unir(ruta, columna) for columna in columnas)
+        return campos
+
+    def aplicar(self, queryset):
+        if self.select:
+            queryset = queryset.select_related(*sorted(self.select))
+        for ruta, subplan in sorted(self.prefetch.items()):
+            modelo = subplan.modelo
+            queryset = queryset.prefetch_related(
+                Prefetch(ruta, queryset=subplan.aplicar(modelo._default_manager.all()))
+            )
+        return queryset.only(*self.only())
+
+
+def _analizar(modelo, serializer, plan, ruta=''):
+    for campo in serializer.fields.values():
+        if campo.write_only:
+            continue
+        if isinstance(campo, serializers.SerializerMethodField) or campo.source == '*':
+            # El acceso a datos es desconocido: se cargan todas las columnas
+            plan.todas(ruta)
+            continue
+        _analizar_campo(modelo, campo, plan, ruta)
+
+
+def _analizar_campo(modelo, campo, plan, ruta):
+    atributos = campo.source_attrs
+    actual = modelo
+    for indice, atributo in enumerate(atributos):
+        ultimo = indice == len(atributos) - 1
+        try:
+            field = actual._meta.get_field(atributo)
+        except FieldDoesNotExist:
+            display = RE_DISPLAY.match(atributo)
+            if ultimo and display:
+                plan.columna(ruta, display.group(1))
+            else:
+                # Propiedad o método del modelo: no se sabe qué columnas usa
+                plan.todas(ruta)
+            return
+
+        if not field.is_relation:
+            plan.columna(ruta, field.name)
+            return
+
+        if field.many_to_many or field.one_to_many:
+            subplan = plan.anidado(_unir(ruta, atributo), field.related_model)
+            if field.one_to_many:
+                # Clave foránea necesaria para asociar los objetos precargados
+                subplan.columna('', field.field.name)
+            if ultimo and isinstance(campo, serializers.ListSerializer):
+                _analizar(field.related_model, campo.child, subplan)
+            elif not ultimo:
+                subplan.todas('')
+            return
+
+        if field.concrete:
+            plan.columna(ruta, field.name)
+        if ultimo and not isinstance(campo, serializers.BaseSerializer):
+            # PrimaryKeyRelatedField: basta la columna de la clave foránea
+            return
+
+        ruta = _unir(ruta, atributo)
+        actual = field.related_model
+        plan.relacion(ruta, actual)
+        if ultimo:
+            _analizar(actual, campo, plan, ruta)
+
+
+def plan_para(serializer):
+    """Construye el ``PlanConsulta`` de una instancia de serializador"""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    modelo = serializer.Meta.model
+    plan = PlanConsulta(modelo)
+    _analizar(modelo, serializer, plan)
+    return plan
+
+
+def planificar_consulta(queryset, serializer):
+    """
+    Aplica a ``queryset`` los ``select_related``, ``prefetch_related`` y
+    ``only()`` que requiere ``serializer``.
+
+    Los serializadores pueden completar el plan automático definiendo
+    ``optimizar_queryset(queryset)``, por ejemplo para colecciones que
+    se obtienen con ``SerializerMethodField``.
+    """
+    queryset = plan_para(serializer).aplicar(queryset)
+    optimizar = getattr(serializer, 'optimizar_queryset', None)
+    if optimizar is not None:
+        queryset = optimizar(queryset)
+    return queryset
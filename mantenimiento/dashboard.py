@@ -0,0 +1,149 @@
+"""
+Panel de operaciones de todas las empresas activas (``/api/dashboard/``).
+
+``datos_dashboard`` arma el panel con cinco consultas agrupadas, sin
+importar cuántas empresas haya:
+
+1. Empresas activas.
+2. Equipos por empresa y estado.
+3. Órdenes abiertas, vencidas y urgentes por empresa (los mismos criterios
+   que ``/ordenes/pendientes/``, ``/vencidas/`` y ``/urgentes/``).
+4. Órdenes completadas en el mes en curso por empresa, con su costo y horas.
+5. Próximos mantenimientos de los planes activos: los ``limite`` primeros de
+   cada empresa dentro de ``dias``, numerados con una función de ventana.
+
+La vista se cachea con ``MANTENIMIENTO_DASHBOARD_TIMEOUT`` (60 segundos por
+defecto, nunca más que ``MANTENIMIENTO_CACHE_TIMEOUT``), ya que las órdenes
+vencidas dependen de la hora y no solo de las escrituras.
+"""
+import datetime
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, F, Q, Sum, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .models import ESTADOS_ABIERTOS, Empresa, Equipo, Orden, Plan
+
+ESTADOS_EQUIPO = [estado for estado, _ in Equipo.ESTADO_CHOICES]
+
+# Estados de las órdenes vencidas, como en ``OrdenViewSet.vencidas``
+ESTADOS_VENCIBLES = ['programada', 'pendiente']
+
+
+def timeout():
+    return min(
+        getattr(settings, 'MANTENIMIENTO_DASHBOARD_TIMEOUT', 60),
+        getattr(settings, 'MANTENIMIENTO_CACHE_TIMEOUT', 300),
+    )
+
+
+def _inicio_mes(ahora):
+    hoy = timezone.localdate(ahora)
+    return timezone.make_aware(datetime.datetime.combine(hoy.replace(day=1), datetime.time.min))
+
+
+def _conteos_equipos():
+    conteos = defaultdict(lambda: dict.fromkeys(ESTADOS_EQUIPO, 0))
+    filas = (
+        Equipo.objects.filter(empresa__activa=True)
+        .order_by()
+        .values_list('empresa_id', 'estado')
+        .annotate(total=Count('pk'))
+    )
+    for empresa_id, estado, total in filas:
+        conteos[empresa_id][estado] = total
+    return conteos
+
+
+def _ordenes_abiertas(ahora):
+    filas = (
+        Orden.objects.filter(empresa__activa=True, estado__in=[*ESTADOS_ABIERTOS, *ESTADOS_VENCIBLES])
+        .order_by()
+        .values('empresa_id')
+        .annotate(
+            abiertas=Count('pk', filter=Q(estado__in=ESTADOS_ABIERTOS)),
+            vencidas=Count('pk', filter=Q(estado__in=ESTADOS_VENCIBLES, fecha_programada__lt=ahora)),
+            urgentes=Count('pk', filter=Q(estado__in=ESTADOS_ABIERTOS, prioridad='urgente')),
+        )
+    )
+    return {fila.pop('empresa_id'): fila for fila in filas}
+
+
+def _ordenes_mes(inicio):
+    filas = (
+        Orden.objects.filter(empresa__activa=True, estado='completada', fecha_termino__gte=inicio)
+        .order_by()
+        .values('empresa_id')
+        .annotate(ordenes_completadas=Count('pk'), costo=Sum('costo_real'), horas=Sum('horas_trabajadas'))
+    )
+    return {fila.pop('empresa_id'): fila for fila in filas}
+
+
+def _proximos_mantenimientos(hoy, dias, limite):
+    filas = (
+        Plan.objects.filter(
+            activo=True, empresa__activa=True,
+            fecha_proximo_mantenimiento__gte=hoy,
+            fecha_proximo_mantenimiento__lte=hoy + timedelta(days=dias),
+        )
+        .annotate(
+            posicion=Window(
+                RowNumber(), partition_by=F('empresa_id'),
+                order_by=[F('fecha_proximo_mantenimiento').asc(), F('pk').asc()],
+            ),
+            total=Window(Count('pk'), partition_by=F('empresa_id')),
+        )
+        .filter(posicion__lte=limite)
+        .order_by('empresa_id', 'posicion')
+        .values_list('empresa_id', 'total', 'pk', 'nombre', 'tipo', 'equipo_id', 'equipo__nombre',
+                     'fecha_proximo_mantenimiento')
+    )
+    proximos = defaultdict(lambda: {'total': 0, 'planes': []})
+    for empresa_id, total, pk, nombre, tipo, equipo_id, equipo_nombre, fecha in filas:
+        proximos[empresa_id]['total'] = total
+        proximos[empresa_id]['planes'].append({
+            'plan': pk, 'nombre': nombre, 'tipo': tipo, 'equipo': equipo_id,
+            'equipo_nombre': equipo_nombre, 'fecha': fecha,
+        })
+    return proximos
+
+
+def datos_dashboard(dias=30, limite=5, ahora=None):
+    """Datos de ``DashboardSerializer`` para todas las empresas activas"""
+    ahora = ahora or timezone.now()
+    hoy = timezone.localdate(ahora)
+    inicio = _inicio_mes(ahora)
+
+    empresas = list(Empresa.objects.filter(activa=True).order_by('nombre').values_list('pk', 'nombre'))
+    equipos = _conteos_equipos()
+    abiertas = _ordenes_abiertas(ahora)
+    mes = _ordenes_mes(inicio)
+    proximos = _proximos_mantenimientos(hoy, dias, limite)
+
+    sin_ordenes = {'abiertas': 0, 'vencidas': 0, 'urgentes': 0}
+    resultado = []
+    for pk, nombre in empresas:
+        por_estado = equipos.get(pk) or dict.fromkeys(ESTADOS_EQUIPO, 0)
+        del_mes = mes.get(pk, {})
+        resultado.append({
+            'empresa': pk,
+            'nombre': nombre,
+            'equipos': {'total': sum(por_estado.values()), 'por_estado': por_estado},
+            'ordenes': abiertas.get(pk, sin_ordenes),
+            'mes': {
+                'ordenes_completadas': del_mes.get('ordenes_completadas', 0),
+                'costo': del_mes.get('costo') or Decimal('0'),
+                'horas': del_mes.get('horas') or Decimal('0'),
+            },
+            'proximos_mantenimientos': proximos.get(pk, {'total': 0, 'planes': []}),
+        })
+    return {
+        'generado': ahora,
+        'inicio_mes': inicio,
+        'dias': dias,
+        'empresas': resultado,
+    }
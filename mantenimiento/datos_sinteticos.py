@@ -0,0 +1,332 @@
+"""
+Generación de datos sintéticos a escala de producción.
+
+``poblar`` crea empresas, equipos, técnicos, planes y órdenes con
+``bulk_create`` por lotes, con distribuciones sesgadas como las reales:
+pocas empresas concentran la mayoría de los equipos (Zipf), algunos
+equipos concentran la mayoría de las órdenes (log-normal) y los estados
+de las órdenes dependen de su fecha programada.
+
+Los valores únicos (RUT, códigos, correos) llevan ``prefijo`` para no
+chocar con datos existentes. Como ``bulk_create`` no dispara señales, al
+terminar se reconstruyen los resúmenes por equipo y el índice de
+búsqueda, y se invalida la caché de respuestas.
+"""
+import datetime
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from . import busqueda, cache_respuestas, rollups
+from .models import Empresa, Equipo, Tecnico, Plan, Orden
+from .secuencias import reservar_numeros_orden
+from .signals import MODELOS_BUSCABLES
+
+TAMANOS = {
+    'empresas': 1_000,
+    'equipos': 100_000,
+    'tecnicos': 5_000,
+    'planes': 200_000,
+    'ordenes': 10_000_000,
+}
+
+TAMANO_LOTE = 10_000
+PREFIJO = 'SEED'
+
+CIUDADES = ['Santiago', 'Antofagasta', 'Concepción', 'Valparaíso', 'Calama', 'Rancagua', 'Temuco']
+TIPOS_EQUIPO = (
+    ['Bomba', 'Motor', 'Compresor', 'Correa transportadora', 'Chancador', 'Generador', 'Válvula'],
+    [0.25, 0.25, 0.15, 0.1, 0.05, 0.1, 0.1],
+)
+ESTADOS_EQUIPO = (
+    ['operativo', 'mantenimiento', 'reparacion', 'fuera_servicio', 'inactivo'],
+    [0.8, 0.08, 0.05, 0.04, 0.03],
+)
+ESPECIALIDADES = (
+    ['mecanico', 'electrico', 'hidraulico', 'electromecanico', 'general', 'otro'],
+    [0.3, 0.25, 0.1, 0.15, 0.15, 0.05],
+)
+FRECUENCIAS = (
+    ['diaria', 'semanal', 'quincenal', 'mensual', 'trimestral', 'semestral', 'anual'],
+    [0.02, 0.1, 0.08, 0.4, 0.2, 0.12, 0.08],
+    [1, 7, 15, 30, 90, 180, 365],
+)
+TIPOS_PLAN = (['preventivo', 'predictivo', 'correctivo'], [0.75, 0.15, 0.1])
+TAREAS = ['Lubricación', 'Inspección', 'Cambio de filtros', 'Alineamiento', 'Termografía', 'Análisis de vibraciones']
+PRIORIDADES = (['baja', 'media', 'alta', 'urgente'], [0.2, 0.5, 0.22, 0.08])
+# Estados de las órdenes con fecha programada pasada
+ESTADOS_PASADOS = (
+    ['completada', 'cancelada', 'en_progreso', 'pausada', 'programada'],
+    [0.85, 0.05, 0.03, 0.02, 0.05],
+)
+
+DIAS_HISTORIA = 3 * 365
+DIAS_FUTURO = 60
+
+
+def _pesos_zipf(cantidad, exponente=1.1):
+    pesos = 1.0 / np.arange(1, cantidad + 1) ** exponente
+    return pesos / pesos.sum()
+
+
+def _elegir(rng, opciones, cantidad):
+    valores, pesos = opciones[0], opciones[1]
+    return np.asarray(valores, dtype=object)[rng.choice(len(valores), size=cantidad, p=pesos)]
+
+
+def _lotes(total, tamano):
+    for inicio in range(0, total, tamano):
+        yield inicio, min(inicio + tamano, total)
+
+
+def _grupos(claves, valores):
+    """Agrupa ``valores`` por ``claves``: (valores ordenados, inicio y largo por clave)"""
+    orden = np.argsort(claves, kind='stable')
+    claves_ordenadas = claves[orden]
+    unicas, inicios, largos = np.unique(claves_ordenadas, return_index=True, return_counts=True)
+    return unicas, inicios, largos, valores[orden]
+
+
+def _elegir_en_grupo(rng, grupos, claves, sin_grupo=None):
+    """Un valor al azar del grupo de cada clave (``sin_grupo`` si no tiene)"""
+    unicas, inicios, largos, valores = grupos
+    if not len(unicas):
+        return np.full(len(claves), sin_grupo), np.zeros(len(claves), dtype=bool)
+    posicion = np.searchsorted(unicas, claves)
+    posicion = np.minimum(posicion, len(unicas) - 1)
+    encontrada = unicas[posicion] == claves
+    desplazamiento = (rng.random(len(claves)) * largos[posicion]).astype(np.int64)
+    elegidos = valores[inicios[posicion] + desplazamiento]
+    return np.where(encontrada, elegidos, sin_grupo), encontrada
+
+
+def _ids(modelo, **filtro):
+    return np.fromiter(
+        modelo.objects.filter(**filtro).order_by('pk').values_list('pk', flat=True).iterator(),
+        dtype=np.int64,
+    )
+
+
+class Generador:
+    """Estado compartido entre las etapas de generación"""
+
+    def __init__(self, tamanos, prefijo=PREFIJO, semilla=0, tamano_lote=TAMANO_LOTE, informar=None):
+        self.tamanos = {**TAMANOS, **tamanos}
+        self.prefijo = prefijo
+        self.rng = np.random.default_rng(semilla)
+        self.tamano_lote = tamano_lote
+        self.informar = informar or (lambda mensaje: None)
+        self.hoy = timezone.localdate()
+        self.ahora = timezone.now()
+
+    def _crear(self, modelo, total, construir):
+        for inicio, fin in _lotes(total, self.tamano_lote):
+            with transaction.atomic():
+                modelo.objects.bulk_create(construir(inicio, fin), batch_size=self.tamano_lote)
+            self.informar(f'{modelo._meta.verbose_name_plural}: {fin}/{total}')
+
+    def empresas(self):
+        total = self.tamanos['empresas']
+        ciudades = self.rng.choice(CIUDADES, size=total)
+        activas = self.rng.random(total) < 0.95
+
+        def construir(inicio, fin):
+            return [
+                Empresa(
+                    nombre=f'{self.prefijo} Empresa {i:05d}', rut=f'{self.prefijo}-E{i:05d}',
+                    ciudad=ciudades[i], activa=bool(activas[i]),
+                )
+                for i in range(inicio, fin)
+            ]
+        self._crear(Empresa, total, construir)
+        self.empresa_ids = _ids(Empresa, rut__startswith=f'{self.prefijo}-E')
+
+    def equipos(self):
+        total = self.tamanos['equipos']
+        rng = self.rng
+        # Las primeras empresas concentran la mayor parte de los equipos
+        empresas = self.empresa_ids[rng.choice(len(self.empresa_ids), size=total, p=_pesos_zipf(len(self.empresa_ids)))]
+        tipos = _elegir(rng, TIPOS_EQUIPO, total)
+        estados = _elegir(rng, ESTADOS_EQUIPO, total)
+        criticos = rng.random(total) < 0.1
+        instalacion = rng.integers(30, 10 * 365, size=total)
+
+        def construir(inicio, fin):
+            return [
+                Equipo(
+                    empresa_id=int(empresas[i]), codigo=f'{self.prefijo}-Q{i:07d}',
+                    nombre=f'{tipos[i]} {i:07d}', tipo=tipos[i], estado=estados[i],
+                    critical=bool(criticos[i]), activo=estados[i] != 'inactivo',
+                    ubicacion=f'Planta {i % 12 + 1}',
+                    fecha_instalacion=self.hoy - datetime.timedelta(days=int(instalacion[i])),
+                )
+                for i in range(inicio, fin)
+            ]
+        self._crear(Equipo, total, construir)
+        filas = np.array(
+            list(Equipo.objects.filter(codigo__startswith=f'{self.prefijo}-Q')
+                 .order_by('pk').values_list('pk', 'empresa_id', 'critical').iterator()),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        self.equipo_ids, self.equipo_empresas = filas[:, 0], filas[:, 1]
+        # Carga de trabajo por equipo: log-normal, el doble para los críticos
+        carga = rng.lognormal(0, 1.0, size=len(self.equipo_ids)) * np.where(filas[:, 2] == 1, 2.0, 1.0)
+        self.pesos_equipos = carga / carga.sum()
+
+    def tecnicos(self):
+        total = self.tamanos['tecnicos']
+        rng = self.rng
+        especialidades = _elegir(rng, ESPECIALIDADES, total)
+        experiencia = np.minimum(rng.geometric(0.12, size=total) - 1, 40)
+        activos = rng.random(total) < 0.92
+
+        def construir(inicio, fin):
+            return [
+                Tecnico(
+                    nombre=f'Técnico {i:06d}', apellido=f'{self.prefijo} {i:06d}',
+                    rut=f'{self.prefijo}-T{i:06d}', email=f'{self.prefijo.lower()}.t{i:06d}@example.com',
+                    telefono='+56900000000', especialidad=especialidades[i],
+                    experiencia_anos=int(experiencia[i]), activo=bool(activos[i]),
+                )
+                for i in range(inicio, fin)
+            ]
+        self._crear(Tecnico, total, construir)
+        self.tecnico_ids = _ids(Tecnico, rut__startswith=f'{self.prefijo}-T')
+
+        # Una empresa principal (sesgada como los equipos) y hasta dos adicionales
+        cantidad = len(self.tecnico_ids)
+        principal = self.empresa_ids[rng.choice(len(self.empresa_ids), size=cantidad, p=_pesos_zipf(len(self.empresa_ids)))]
+        extras = rng.integers(0, 3, size=cantidad)
+        tecnicos = [self.tecnico_ids, np.repeat(self.tecnico_ids, extras)]
+        empresas = [principal, self.empresa_ids[rng.integers(0, len(self.empresa_ids), size=int(extras.sum()))]]
+        pares = np.unique(np.column_stack([np.concatenate(tecnicos), np.concatenate(empresas)]), axis=0)
+        Relacion = Tecnico.empresas.through
+        for inicio, fin in _lotes(len(pares), self.tamano_lote):
+            Relacion.objects.bulk_create(
+                [Relacion(tecnico_id=int(t), empresa_id=int(e)) for t, e in pares[inicio:fin]],
+                batch_size=self.tamano_lote,
+            )
+        self.tecnicos_por_empresa = _grupos(pares[:, 1], pares[:, 0])
+
+    def planes(self):
+        total = self.tamanos['planes']
+        rng = self.rng
+        posiciones = rng.choice(len(self.equipo_ids), size=total, p=self.pesos_equipos)
+        posiciones.sort(kind='stable')
+        equipos = self.equipo_ids[posiciones]
+        # Número correlativo del plan dentro de su equipo, para (equipo, nombre) único
+        _, inicios, largos = np.unique(equipos, return_index=True, return_counts=True)
+        correlativos = np.arange(total) - np.repeat(inicios, largos)
+
+        indices_frecuencia = rng.choice(len(FRECUENCIAS[0]), size=total, p=FRECUENCIAS[1])
+        dias = np.asarray(FRECUENCIAS[2])[indices_frecuencia]
+        tipos = _elegir(rng, TIPOS_PLAN, total)
+        activos = rng.random(total) < 0.9
+        inicio_plan = rng.integers(0, DIAS_HISTORIA, size=total)
+        proximo = (rng.random(total) * (dias + 10)).astype(np.int64) - 10
+        duracion = np.round(rng.uniform(0.5, 8, size=total) * 2) / 2
+
+        def construir(inicio, fin):
+            return [
+                Plan(
+                    empresa_id=int(self.equipo_empresas[posiciones[i]]), equipo_id=int(equipos[i]),
+                    nombre=f'{TAREAS[correlativos[i] % len(TAREAS)]} {correlativos[i] + 1}',
+                    tipo=tipos[i], frecuencia=FRECUENCIAS[0][indices_frecuencia[i]],
+                    frequency_days=int(dias[i]), tareas=TAREAS[correlativos[i] % len(TAREAS)],
+                    duracion_estimada_horas=Decimal(str(duracion[i])), activo=bool(activos[i]),
+                    fecha_inicio=self.hoy - datetime.timedelta(days=int(inicio_plan[i])),
+                    fecha_proximo_mantenimiento=self.hoy + datetime.timedelta(days=int(proximo[i])),
+                )
+                for i in range(inicio, fin)
+            ]
+        self._crear(Plan, total, construir)
+
+        filas = np.array(
+            list(Plan.objects.filter(equipo__codigo__startswith=f'{self.prefijo}-Q')
+                 .order_by('pk').values_list('pk', 'equipo_id', 'empresa_id').iterator()),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        self.planes_por_equipo = _grupos(filas[:, 1], filas[:, 0])
+
+        # Un técnico recomendado de la misma empresa
+        tecnicos, encontrado = _elegir_en_grupo(rng, self.tecnicos_por_empresa, filas[:, 2], sin_grupo=0)
+        Relacion = Plan.tecnicos_recomendados.through
+        pares = np.column_stack([filas[:, 0], tecnicos])[encontrado]
+        for inicio, fin in _lotes(len(pares), self.tamano_lote):
+            Relacion.objects.bulk_create(
+                [Relacion(plan_id=int(p), tecnico_id=int(t)) for p, t in pares[inicio:fin]],
+                batch_size=self.tamano_lote,
+            )
+
+    def _lote_ordenes(self, cantidad):
+        rng = self.rng
+        posiciones = rng.choice(len(self.equipo_ids), size=cantidad, p=self.pesos_equipos)
+        equipos = self.equipo_ids[posiciones]
+        empresas = self.equipo_empresas[posiciones]
+
+        planes, con_plan = _elegir_en_grupo(rng, self.planes_por_equipo, equipos, sin_grupo=0)
+        con_plan &= rng.random(cantidad) < 0.6
+        tecnicos, con_tecnico = _elegir_en_grupo(rng, self.tecnicos_por_empresa, empresas, sin_grupo=0)
+        con_tecnico &= rng.random(cantidad) < 0.8
+
+        desfase = rng.uniform(-DIAS_HISTORIA, DIAS_FUTURO, size=cantidad)
+        pasadas = desfase < 0
+        estados = np.where(pasadas, _elegir(rng, ESTADOS_PASADOS, cantidad), 'programada')
+        prioridades = _elegir(rng, PRIORIDADES, cantidad)
+        horas = np.round(np.minimum(rng.lognormal(1.0, 0.6, size=cantidad), 99), 2)
+        costos = np.round(horas * rng.uniform(15_000, 60_000, size=cantidad), 2)
+        espera = rng.uniform(0, 48, size=cantidad)
+        numeros = reservar_numeros_orden(cantidad)
+
+        ordenes = []
+        for i in range(cantidad):
+            programada = self.ahora + datetime.timedelta(days=float(desfase[i]))
+            estado = estados[i]
+            orden = Orden(
+                empresa_id=int(empresas[i]), equipo_id=int(equipos[i]),
+                plan_id=int(planes[i]) if con_plan[i] else None,
+                tecnico_asignado_id=int(tecnicos[i]) if con_tecnico[i] else None,
+                numero_orden=numeros[i], descripcion='Mantenimiento programado' if con_plan[i] else 'Falla reportada',
+                estado=estado, prioridad=prioridades[i], fecha_programada=programada,
+            )
+            if estado in ('completada', 'en_progreso', 'pausada'):
+                orden.fecha_inicio = programada + datetime.timedelta(hours=float(espera[i]))
+            if estado == 'completada':
+                orden.fecha_termino = orden.fecha_inicio + datetime.timedelta(hours=float(horas[i]))
+                orden.horas_trabajadas = Decimal(str(horas[i]))
+                orden.costo_real = Decimal(str(costos[i]))
+            ordenes.append(orden)
+        return ordenes
+
+    def ordenes(self):
+        total = self.tamanos['ordenes']
+        self._crear(Orden, total, lambda inicio, fin: self._lote_ordenes(fin - inicio))
+
+    def finalizar(self, indice_busqueda=True):
+        self.informar('Reconstruyendo resúmenes por equipo')
+        rollups.reconstruir()
+        if indice_busqueda and busqueda.disponible():
+            for modelo in MODELOS_BUSCABLES:
+                self.informar(f'Indexando {modelo._meta.verbose_name_plural}')
+                busqueda.reindexar(modelo)
+        cache_respuestas.invalidar(cache_respuestas.RELACIONES_ETIQUETAS)
+
+
+def poblar(tamanos=None, prefijo=PREFIJO, semilla=0, tamano_lote=TAMANO_LOTE,
+           indice_busqueda=True, informar=None):
+    """
+    Genera los datos sintéticos. ``tamanos`` reemplaza cantidades de
+    ``TAMANOS``; retorna las cantidades creadas por modelo.
+    """
+    if Empresa.objects.filter(rut__startswith=f'{prefijo}-E').exists():
+        raise ValueError(f'Ya existen datos generados con el prefijo {prefijo}')
+    generador = Generador(tamanos or {}, prefijo, semilla, tamano_lote, informar)
+    generador.empresas()
+    generador.equipos()
+    generador.tecnicos()
+    generador.planes()
+    generador.ordenes()
+    generador.finalizar(indice_busqueda=indice_busqueda)
+    return generador.tamanos
@@ -0,0 +1,87 @@
+"""
+Consultas de estadísticas agregadas.
+
+Las estadísticas se calculan como anotaciones sobre el queryset del modelo
+principal, de modo que una o muchas empresas se resuelven en una sola
+consulta con agregación condicional.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Equipo, Plan
+
+
+def _contar_por_empresa(modelo):
+    """Subconsulta correlacionada que cuenta las filas de ``modelo`` por empresa"""
+    conteo = (
+        modelo.objects.filter(empresa=OuterRef('pk'))
+        .order_by()
+        .values('empresa')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(conteo, output_field=IntegerField()), 0)
+
+
+def _sumar(campo, max_digits, decimal_places):
+    salida = DecimalField(max_digits=max_digits, decimal_places=decimal_places)
+    return Coalesce(Sum(campo), Value(Decimal('0')), output_field=salida)
+
+
+def agregados_ordenes(prefijo=''):
+    """
+    Conteos y sumas de órdenes de ``EstadisticasEmpresaSerializer``.
+    ``prefijo`` es la ruta a la orden desde el modelo consultado, p. ej.
+    ``'ordenes__'`` desde Empresa o ``''`` sobre Orden.
+    """
+    conteo = prefijo[:-2] if prefijo else 'pk'
+    return {
+        'total_ordenes': Count(conteo),
+        'ordenes_pendientes': Count(conteo, filter=Q(**{f'{prefijo}estado': 'programada'})),
+        'ordenes_en_progreso': Count(conteo, filter=Q(**{f'{prefijo}estado': 'en_progreso'})),
+        'ordenes_completadas': Count(conteo, filter=Q(**{f'{prefijo}estado': 'completada'})),
+        'costo_total_ordenes': _sumar(f'{prefijo}costo_real', 12, 2),
+        'horas_totales_trabajadas': _sumar(f'{prefijo}horas_trabajadas', 10, 2),
+    }
+
+
+def anotar_estadisticas_empresa(queryset):
+    """
+    Anota sobre un queryset de Empresa los campos que espera
+    ``EstadisticasEmpresaSerializer``.
+
+    Equipos y planes se cuentan con subconsultas para no multiplicar las
+    filas del JOIN con órdenes.
+    """
+    return queryset.annotate(
+        total_equipos=_contar_por_empresa(Equipo),
+        total_planes=_contar_por_empresa(Plan),
+        **agregados_ordenes('ordenes__'),
+    )
+
+
+def proximo_plan_activo(equipo):
+    """Queryset con la próxima fecha de mantenimiento del primer plan activo de ``equipo``"""
+    return Plan.objects.filter(
+        equipo=equipo, activo=True
+    ).order_by('nombre').values('fecha_proximo_mantenimiento')[:1]
+
+
+def datos_estadisticas_equipo(equipo, resumen, proxima_mantencion):
+    """Datos de ``EstadisticasEquipoSerializer`` desde el resumen materializado"""
+    dias_sin_mantenimiento = 0
+    if equipo.fecha_ultimo_mantenimiento:
+        dias_sin_mantenimiento = (timezone.now().date() - equipo.fecha_ultimo_mantenimiento).days
+    return {
+        'nombre_equipo': equipo.nombre,
+        'total_ordenes': resumen.total_ordenes,
+        'ordenes_completadas': resumen.ordenes_completadas,
+        'dias_sin_mantenimiento': dias_sin_mantenimiento,
+        'proxima_mantencion': proxima_mantencion,
+        'costo_total_mantenimiento': resumen.costo_total,
+        'horas_totales_trabajadas': resumen.horas_totales,
+        'fecha_ultima_completada': resumen.fecha_ultima_completada,
+    }
@@ -0,0 +1,88 @@
+"""
+Exportación de listados completos en CSV o NDJSON.
+
+Las filas se leen con ``values()`` e ``iterator(chunk_size=...)`` (cursor
+del lado del servidor en PostgreSQL) y se escriben a medida que se generan
+en una ``StreamingHttpResponse``, por lo que la memoria usada no depende de
+la cantidad de filas exportadas.
+"""
+import csv
+import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+FORMATO_CSV = 'csv'
+FORMATO_NDJSON = 'ndjson'
+FORMATOS = {
+    FORMATO_CSV: 'text/csv; charset=utf-8',
+    FORMATO_NDJSON: 'application/x-ndjson',
+}
+
+TAMANO_LOTE = 2000
+
+# Columnas exportadas por modelo (admiten rutas con "__")
+COLUMNAS_ORDEN = [
+    'id', 'numero_orden', 'empresa_id', 'empresa__nombre', 'equipo_id', 'equipo__codigo',
+    'equipo__nombre', 'plan_id', 'tecnico_asignado_id', 'descripcion', 'estado', 'prioridad',
+    'fecha_programada', 'fecha_inicio', 'fecha_termino', 'horas_trabajadas', 'costo_real',
+    'fecha_creacion', 'fecha_actualizacion',
+]
+
+COLUMNAS_EQUIPO = [
+    'id', 'codigo', 'nombre', 'empresa_id', 'empresa__nombre', 'tipo', 'marca', 'modelo',
+    'serie', 'ubicacion', 'estado', 'critical', 'activo', 'fecha_adquisicion',
+    'fecha_instalacion', 'fecha_ultimo_mantenimiento', 'fecha_creacion', 'fecha_actualizacion',
+]
+
+
+class _Eco:
+    """Pseudo-archivo que retorna lo escrito en lugar de guardarlo"""
+
+    def write(self, valor):
+        return valor
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def filas_csv(filas, columnas):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(columnas)
+    for fila in filas:
+        yield escritor.writerow([_valor_csv(fila[columna]) for columna in columnas])
+
+
+def filas_ndjson(filas, columnas):
+    codificador = DjangoJSONEncoder(ensure_ascii=False)
+    for fila in filas:
+        yield codificador.encode(fila) + '\n'
+
+
+GENERADORES = {
+    FORMATO_CSV: filas_csv,
+    FORMATO_NDJSON: filas_ndjson,
+}
+
+
+def respuesta_exportacion(queryset, columnas, formato, nombre, tamano_lote=TAMANO_LOTE):
+    """
+    Construye la respuesta de exportación de ``queryset``.
+
+    ``queryset`` conserva los filtros y el orden del listado; solo se leen
+    las ``columnas`` indicadas.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f'Formato inválido: {formato}')
+    filas = queryset.values(*columnas).iterator(chunk_size=tamano_lote)
+    respuesta = StreamingHttpResponse(
+        GENERADORES[formato](filas, columnas),
+        content_type=FORMATOS[formato],
+    )
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}.{formato}"'
+    return respuesta
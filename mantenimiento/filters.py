@@ -0,0 +1,24 @@
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from . import busqueda
+
+
+class BusquedaTextoFilter(filters.SearchFilter):
+    """
+    Búsqueda con el índice de texto completo (``mantenimiento.busqueda``).
+
+    Cada término coincide por prefijo de palabra, sin distinguir mayúsculas
+    ni tildes, y todos los términos deben coincidir. Si no se indica
+    ``ordering``, los resultados se ordenan por relevancia. En motores sin
+    índice de texto se usa la búsqueda ``icontains`` de ``SearchFilter``.
+    """
+    def filter_queryset(self, request, queryset, view):
+        terminos = self.get_search_terms(request)
+        if not terminos:
+            return queryset
+        if not busqueda.disponible():
+            return super().filter_queryset(request, queryset, view)
+
+        ordenar = not request.query_params.get(api_settings.ORDERING_PARAM)
+        return busqueda.filtrar(queryset, terminos, ordenar=ordenar)
@@ -0,0 +1,187 @@
+"""
+Serialización de listados desde ``values_list()`` sin instanciar modelos.
+
+``compilar`` traduce los campos de un serializador (ya filtrados con
+``?fields=``) a columnas de ``values_list`` y a una función de formato por
+campo, calculadas una sola vez por petición:
+
+- Columnas propias y de relaciones (``empresa.nombre`` → ``empresa__nombre``,
+  con el JOIN que agrega ``values_list``).
+- ``get_<campo>_display`` con un diccionario precalculado de las choices.
+- Propiedades del modelo registradas en ``PROPIEDADES`` (p. ej.
+  ``Tecnico.nombre_completo``), armadas desde sus columnas.
+- Cadenas, enteros, booleanos e ids se copian tal cual; decimales y fechas
+  usan el ``to_representation`` del campo de DRF, de modo que el JSON es
+  idéntico al del serializador.
+
+Si algún campo no se puede traducir (``SerializerMethodField``,
+serializadores anidados, relaciones a muchos o propiedades desconocidas)
+``compilar`` retorna ``None`` y el listado usa el serializador normal.
+"""
+import re
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from .models import Tecnico
+
+RE_DISPLAY = re.compile(r'^get_(\w+)_display$')
+
+# Propiedades calculables desde columnas: (modelo, nombre) -> (columnas, función)
+PROPIEDADES = {
+    (Tecnico, 'nombre_completo'): (('nombre', 'apellido'), lambda nombre, apellido: f'{nombre} {apellido}'),
+}
+
+# Campo que se omite de la respuesta y serializador que no se puede traducir
+OMITIR = object()
+NO_TRADUCIBLE = object()
+
+# Campos de DRF cuyo valor de la base ya es el de la respuesta
+CAMPOS_DIRECTOS = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+    serializers.ChoiceField, PrimaryKeyRelatedField,
+)
+
+
+def activos():
+    return getattr(settings, 'MANTENIMIENTO_LISTADOS_VALORES', True)
+
+
+class PlanValores:
+    """Columnas de ``values_list`` y formato de cada campo de un serializador"""
+
+    def __init__(self, columnas, campos):
+        self.columnas = columnas
+        # [(nombre, índices, función o None, índices de relaciones, valor si falta la relación)]
+        self.campos = campos
+
+    def queryset(self, queryset, extra=()):
+        """Queryset de filas con nombre (``pk`` y ``extra`` disponibles como atributos)"""
+        # Las columnas extra van al final: los índices de ``campos`` no cambian
+        columnas = self.columnas + [columna for columna in extra if columna not in self.columnas]
+        return queryset.prefetch_related(None).values_list(*columnas, named=True)
+
+    def serializar(self, filas):
+        datos = []
+        for fila in filas:
+            item = {}
+            for nombre, indices, formato, relaciones, ausente in self.campos:
+                if relaciones and any(fila[indice] is None for indice in relaciones):
+                    if ausente is not OMITIR:
+                        item[nombre] = ausente
+                    continue
+                if len(indices) == 1:
+                    valor = fila[indices[0]]
+                    item[nombre] = valor if formato is None or valor is None else formato(valor)
+                else:
+                    valores = [fila[indice] for indice in indices]
+                    item[nombre] = None if valores[0] is None else formato(*valores)
+            datos.append(item)
+        return datos
+
+
+class SerializadorValores:
+    """Reemplazo de ``get_serializer(pagina, many=True)`` para las filas de ``PlanValores``"""
+
+    def __init__(self, plan, filas):
+        self.plan = plan
+        self.filas = filas
+
+    @property
+    def data(self):
+        return ReturnList(self.plan.serializar(self.filas), serializer=self)
+
+
+def _ausente(campo):
+    """
+    Valor del campo cuando una relación de su ``source`` es nula, como en
+    ``Field.get_attribute``: ``None`` con ``allow_null`` o se omite si no es
+    requerido. Con un default o si DRF levantaría un error: ``NO_TRADUCIBLE``.
+    """
+    if campo.default is not empty:
+        return NO_TRADUCIBLE
+    if campo.allow_null:
+        return None
+    if not campo.required:
+        return OMITIR
+    return NO_TRADUCIBLE
+
+
+def _traducir(modelo, campo):
+    """(rutas de columnas, función de formato, rutas de relaciones nulables) de un campo, o ``None``"""
+    atributos = campo.source_attrs
+    ruta, relaciones = [], []
+    for indice, atributo in enumerate(atributos):
+        ultimo = indice == len(atributos) - 1
+        try:
+            field = modelo._meta.get_field(atributo)
+        except FieldDoesNotExist:
+            if not ultimo:
+                return None
+            prefijo = '__'.join(ruta + [''])
+            display = RE_DISPLAY.match(atributo)
+            if display:
+                try:
+                    choices = dict(modelo._meta.get_field(display.group(1)).flatchoices)
+                except FieldDoesNotExist:
+                    return None
+                return [prefijo + display.group(1)], (lambda valor: str(choices.get(valor, valor))), relaciones
+            if (modelo, atributo) in PROPIEDADES:
+                columnas, funcion = PROPIEDADES[(modelo, atributo)]
+                return [prefijo + columna for columna in columnas], funcion, relaciones
+            return None
+
+        ruta.append(atributo)
+        if field.is_relation and not (field.many_to_one or (field.one_to_one and field.concrete)):
+            # Relaciones a muchos y relaciones inversas
+            return None
+        if not ultimo:
+            if not field.is_relation:
+                return None
+            if field.null:
+                relaciones.append('__'.join(ruta))
+            modelo = field.related_model
+            continue
+        if isinstance(campo, CAMPOS_DIRECTOS):
+            return ['__'.join(ruta)], None, relaciones
+        return ['__'.join(ruta)], campo.to_representation, relaciones
+    return None
+
+
+def _indice(columnas, ruta):
+    if ruta not in columnas:
+        columnas.append(ruta)
+    return columnas.index(ruta)
+
+
+def compilar(serializer):
+    """``PlanValores`` de un serializador de modelo, o ``None`` si no es traducible"""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    modelo = serializer.Meta.model
+    columnas, campos = [], []
+    for nombre, campo in serializer.fields.items():
+        if campo.write_only:
+            continue
+        if (isinstance(campo, (serializers.SerializerMethodField, serializers.BaseSerializer, ManyRelatedField))
+                or campo.source == '*'):
+            return None
+        traduccion = _traducir(modelo, campo)
+        if traduccion is None:
+            return None
+        rutas, formato, relaciones = traduccion
+        ausente = _ausente(campo) if relaciones else None
+        if ausente is NO_TRADUCIBLE:
+            return None
+        campos.append((
+            nombre,
+            [_indice(columnas, ruta) for ruta in rutas],
+            formato,
+            [_indice(columnas, ruta) for ruta in relaciones],
+            ausente,
+        ))
+    return PlanValores(columnas, campos)
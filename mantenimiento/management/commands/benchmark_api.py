@@ -0,0 +1,72 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mantenimiento import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Mide tiempo y consultas de cada ruta de la API y guarda el resultado en JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--salida', default='benchmark.json',
+            help='Archivo JSON de resultados ("-" para la salida estándar)'
+        )
+        parser.add_argument(
+            '--repeticiones', type=int, default=benchmark.REPETICIONES,
+            help='Llamadas medidas por ruta, además del calentamiento'
+        )
+        parser.add_argument(
+            '--filtro', default=None,
+            help='Expresión regular sobre "MÉTODO ruta (Vista.accion)" para medir solo algunas rutas'
+        )
+        parser.add_argument(
+            '--exportaciones', action='store_true',
+            help='Medir también las exportaciones completas (recorren toda la tabla)'
+        )
+        parser.add_argument(
+            '--con-cache', action='store_true',
+            help='Mantener la caché de respuestas activa durante la medición'
+        )
+        parser.add_argument(
+            '--comparar', default=None,
+            help='Resultado JSON anterior con el que comparar las medianas'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser al menos 1')
+        anterior = None
+        if options['comparar']:
+            try:
+                with open(options['comparar'], encoding='utf-8') as archivo:
+                    anterior = json.load(archivo)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'No se pudo leer {options["comparar"]}: {error}')
+
+        resultado = benchmark.ejecutar(
+            repeticiones=options['repeticiones'],
+            filtro=options['filtro'],
+            exportaciones=options['exportaciones'],
+            con_cache=options['con_cache'],
+            informar=self.stderr.write if options['verbosity'] > 1 else None,
+        )
+        texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+        if options['salida'] == '-':
+            self.stdout.write(texto)
+        else:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(texto + '\n')
+            medidas = sum(1 for ruta in resultado['rutas'] if 'ms_mediana' in ruta)
+            self.stdout.write(self.style.SUCCESS(f'{medidas} rutas medidas, resultados en {options["salida"]}'))
+
+        if anterior is not None:
+            for diferencia in benchmark.comparar(anterior, resultado):
+                variacion = diferencia['variacion']
+                self.stdout.write(
+                    f"{diferencia['metodo'].upper():6} {diferencia['ruta']} ({diferencia['accion']}): "
+                    f"{diferencia['ms_antes']} -> {diferencia['ms_despues']} ms"
+                    + (f' ({variacion:+.1%})' if variacion is not None else '')
+                    + f", consultas {diferencia['consultas_antes']} -> {diferencia['consultas_despues']}"
+                )
@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mantenimiento import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara peticiones por segundo y latencias de las lecturas síncronas (WSGI) '
+        'y de /api/async/ (ASGI) con distintos niveles de concurrencia'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrencia', default='1,8,32,64',
+            help='Niveles de peticiones simultáneas separados por coma'
+        )
+        parser.add_argument(
+            '--peticiones', type=int, default=200,
+            help='Peticiones por modo y nivel de concurrencia'
+        )
+        parser.add_argument(
+            '--salida', default=None,
+            help='Archivo JSON donde guardar el resultado ("-" para la salida estándar)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            niveles = [int(valor) for valor in options['concurrencia'].split(',') if valor.strip()]
+        except ValueError:
+            raise CommandError('--concurrencia debe ser una lista de enteros separados por coma')
+        if not niveles or min(niveles) < 1 or options['peticiones'] < 1:
+            raise CommandError('La concurrencia y las peticiones deben ser al menos 1')
+
+        resultado = benchmark.concurrencia(
+            niveles=niveles,
+            peticiones=options['peticiones'],
+            informar=self.stderr.write if options['verbosity'] > 1 else None,
+        )
+        if options['salida'] == '-':
+            self.stdout.write(json.dumps(resultado, ensure_ascii=False, indent=2))
+            return
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(json.dumps(resultado, ensure_ascii=False, indent=2) + '\n')
+
+        for diferencia in resultado['diferencias']:
+            self.stdout.write(f'- {diferencia}')
+        self.stdout.write(f"{'modo':6} {'concurrencia':>12} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'errores':>8}")
+        for fila in resultado['resultados']:
+            self.stdout.write(
+                f"{fila['modo']:6} {fila['concurrencia']:>12} {fila['peticiones_por_segundo']:>10} "
+                f"{fila['ms_p50']:>10} {fila['ms_p95']:>10} {fila['errores']:>8}"
+            )
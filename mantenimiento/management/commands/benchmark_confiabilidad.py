@@ -0,0 +1,52 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mantenimiento import benchmark
+from mantenimiento.confiabilidad import VENTANAS
+
+
+class Command(BaseCommand):
+    help = 'Mide la carga y el cálculo de los indicadores de confiabilidad (MTBF, MTTR) de toda la flota'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ventanas', default=','.join(str(dias) for dias in VENTANAS),
+            help='Ventanas en días separadas por coma'
+        )
+        parser.add_argument(
+            '--repeticiones', type=int, default=benchmark.REPETICIONES,
+            help='Mediciones por operación, además del calentamiento'
+        )
+        parser.add_argument(
+            '--salida', default=None,
+            help='Archivo JSON donde guardar el resultado ("-" para la salida estándar)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            ventanas = sorted({int(dias) for dias in options['ventanas'].split(',') if dias.strip()})
+        except ValueError:
+            raise CommandError('--ventanas debe ser una lista de días separados por coma')
+        if not ventanas or ventanas[0] < 1 or options['repeticiones'] < 1:
+            raise CommandError('--ventanas y --repeticiones deben ser al menos 1')
+
+        resultado = benchmark.confiabilidad_flota(
+            ventanas=ventanas,
+            repeticiones=options['repeticiones'],
+            informar=self.stderr.write if options['verbosity'] > 1 else None,
+        )
+        if options['salida'] == '-':
+            self.stdout.write(json.dumps(resultado, ensure_ascii=False, indent=2))
+            return
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(json.dumps(resultado, ensure_ascii=False, indent=2) + '\n')
+
+        self.stdout.write(
+            f"{resultado['ordenes']} órdenes, {resultado['equipos']} equipos, "
+            f"{resultado['fallas']} fallas en {max(resultado['ventanas'])} días"
+        )
+        self.stdout.write(f"{'operación':20} {'ms':>10}")
+        for fila in resultado['resultados']:
+            self.stdout.write(f"{fila['operacion']:20} {fila['ms_mediana']:>10}")
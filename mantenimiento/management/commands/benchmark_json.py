@@ -0,0 +1,51 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mantenimiento import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Compara el renderer y el parser JSON de DRF con los basados en orjson sobre páginas de órdenes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--filas', type=int, default=1000,
+            help='Órdenes de la página medida'
+        )
+        parser.add_argument(
+            '--repeticiones', type=int, default=benchmark.REPETICIONES,
+            help='Mediciones por operación y modo, además del calentamiento'
+        )
+        parser.add_argument(
+            '--salida', default=None,
+            help='Archivo JSON donde guardar el resultado ("-" para la salida estándar)'
+        )
+
+    def handle(self, *args, **options):
+        if options['filas'] < 1 or options['repeticiones'] < 1:
+            raise CommandError('--filas y --repeticiones deben ser al menos 1')
+
+        resultado = benchmark.renderizado(
+            filas=options['filas'],
+            repeticiones=options['repeticiones'],
+            informar=self.stderr.write if options['verbosity'] > 1 else None,
+        )
+        if options['salida'] == '-':
+            self.stdout.write(json.dumps(resultado, ensure_ascii=False, indent=2))
+            return
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(json.dumps(resultado, ensure_ascii=False, indent=2) + '\n')
+
+        self.stdout.write(
+            f"{resultado['filas']} órdenes, {resultado['bytes']} bytes, "
+            f"salida idéntica: {'sí' if resultado['identico'] else 'no'}"
+        )
+        self.stdout.write(f"{'operación':10} {'drf ms':>10} {'orjson ms':>10} {'drf MB/s':>10} {'orjson MB/s':>12} {'aceleración':>12}")
+        for fila in resultado['resultados']:
+            self.stdout.write(
+                f"{fila['operacion']:10} {fila['drf']['ms_mediana']:>10} {fila['rapido']['ms_mediana']:>10} "
+                f"{fila['drf']['mb_por_segundo']:>10} {fila['rapido']['mb_por_segundo']:>12} "
+                f"{fila['aceleracion'] or '-':>12}"
+            )
@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mantenimiento import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Compara el tiempo de los listados serializados con el serializador y con values_list()'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size', type=int, default=100,
+            help='Tamaño de página de los listados medidos'
+        )
+        parser.add_argument(
+            '--repeticiones', type=int, default=benchmark.REPETICIONES,
+            help='Llamadas medidas por listado y modo, además del calentamiento'
+        )
+        parser.add_argument(
+            '--salida', default=None,
+            help='Archivo JSON donde guardar el resultado ("-" para la salida estándar)'
+        )
+
+    def handle(self, *args, **options):
+        if options['page_size'] < 1 or options['repeticiones'] < 1:
+            raise CommandError('--page-size y --repeticiones deben ser al menos 1')
+
+        resultado = benchmark.listados(
+            tamano_pagina=options['page_size'],
+            repeticiones=options['repeticiones'],
+            informar=self.stderr.write if options['verbosity'] > 1 else None,
+        )
+        if options['salida'] == '-':
+            self.stdout.write(json.dumps(resultado, ensure_ascii=False, indent=2))
+            return
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(json.dumps(resultado, ensure_ascii=False, indent=2) + '\n')
+
+        self.stdout.write(f"{'ruta':50} {'serializador ms':>16} {'valores ms':>12} {'aceleración':>12}")
+        for fila in resultado['resultados']:
+            self.stdout.write(
+                f"{fila['ruta']:50} {fila['serializador']['ms_mediana']:>16} "
+                f"{fila['valores']['ms_mediana']:>12} {fila['aceleracion'] or '-':>12}"
+            )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mantenimiento import programador
+from mantenimiento.models import Plan
+
+
+class Command(BaseCommand):
+    help = 'Genera las órdenes de trabajo de los planes que vencen dentro del horizonte'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizonte-dias', type=int, default=programador.HORIZONTE_DIAS,
+            help='Días hacia adelante para los que se generan órdenes'
+        )
+        parser.add_argument(
+            '--empresa', type=int, default=None,
+            help='Procesar solo los planes de esta empresa'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=programador.TAMANO_LOTE,
+            help='Cantidad de planes procesados por lote'
+        )
+
+    def handle(self, *args, **options):
+        if options['horizonte_dias'] < 0:
+            raise CommandError('--horizonte-dias no puede ser negativo')
+        planes = Plan.objects.all()
+        if options['empresa'] is not None:
+            planes = planes.filter(empresa_id=options['empresa'])
+        resultado = programador.generar_ordenes(
+            horizonte_dias=options['horizonte_dias'],
+            tamano_lote=options['chunk_size'],
+            planes=planes,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['ordenes_creadas']} órdenes generadas desde {resultado['planes']} planes "
+            f"(hasta {resultado['hasta']})"
+        ))
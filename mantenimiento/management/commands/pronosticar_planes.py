@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mantenimiento import pronostico
+from mantenimiento.models import Plan
+
+
+class Command(BaseCommand):
+    help = 'Recalcula la próxima fecha de los planes predictivos desde las fallas de sus equipos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--empresa', type=int, default=None,
+            help='Procesar solo los planes de esta empresa'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=pronostico.TAMANO_LOTE,
+            help='Cantidad de equipos procesados por lote'
+        )
+        parser.add_argument(
+            '--simular', action='store_true',
+            help='Calcular sin guardar las fechas'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size debe ser al menos 1')
+        planes = Plan.objects.all()
+        if options['empresa'] is not None:
+            planes = planes.filter(empresa_id=options['empresa'])
+        resultado = pronostico.pronosticar(
+            tamano_lote=options['chunk_size'],
+            planes=planes,
+            aplicar=not options['simular'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['planes']} planes predictivos evaluados: {resultado['weibull']} Weibull, "
+            f"{resultado['exponencial']} exponencial, {resultado['sin_datos']} sin fallas; "
+            f"{resultado['actualizados']} fechas actualizadas"
+        ))
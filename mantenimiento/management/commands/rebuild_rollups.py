@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from mantenimiento import rollups
+
+
+class Command(BaseCommand):
+    help = 'Recalcula desde cero el resumen de órdenes de todos los equipos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=rollups.TAMANO_LOTE,
+            help='Cantidad de equipos recalculados por lote'
+        )
+
+    def handle(self, *args, **options):
+        total = rollups.reconstruir(tamano_lote=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} resúmenes de equipo recalculados'))
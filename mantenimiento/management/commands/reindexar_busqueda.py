@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mantenimiento import busqueda
+from mantenimiento.signals import MODELOS_BUSCABLES
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los documentos del índice de búsqueda de texto completo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=busqueda.TAMANO_LOTE,
+            help='Cantidad de objetos indexados por lote'
+        )
+
+    def handle(self, *args, **options):
+        if not busqueda.disponible():
+            raise CommandError('El motor de base de datos no tiene índice de texto completo')
+        for modelo in MODELOS_BUSCABLES:
+            total = busqueda.reindexar(modelo, tamano_lote=options['chunk_size'])
+            self.stdout.write(f'{modelo._meta.verbose_name_plural}: {total} documentos actualizados')
+        self.stdout.write(self.style.SUCCESS('Índice de búsqueda reconstruido'))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mantenimiento import datos_sinteticos
+
+
+class Command(BaseCommand):
+    help = 'Genera datos sintéticos a escala de producción con bulk_create'
+
+    def add_arguments(self, parser):
+        for nombre, cantidad in datos_sinteticos.TAMANOS.items():
+            parser.add_argument(
+                f'--{nombre}', type=int, default=None,
+                help=f'Cantidad de {nombre} a generar (por defecto {cantidad})'
+            )
+        parser.add_argument(
+            '--escala', type=float, default=1.0,
+            help='Factor aplicado a las cantidades por defecto, p. ej. 0.01 para una prueba rápida'
+        )
+        parser.add_argument(
+            '--prefijo', default=datos_sinteticos.PREFIJO,
+            help='Prefijo de RUT, códigos y correos generados'
+        )
+        parser.add_argument('--semilla', type=int, default=0, help='Semilla del generador aleatorio')
+        parser.add_argument(
+            '--chunk-size', type=int, default=datos_sinteticos.TAMANO_LOTE,
+            help='Cantidad de filas insertadas por lote'
+        )
+        parser.add_argument(
+            '--sin-indice-busqueda', action='store_true',
+            help='No reconstruir el índice de búsqueda al terminar'
+        )
+
+    def handle(self, *args, **options):
+        if options['escala'] <= 0:
+            raise CommandError('--escala debe ser positiva')
+        tamanos = {}
+        for nombre, cantidad in datos_sinteticos.TAMANOS.items():
+            tamanos[nombre] = options[nombre] if options[nombre] is not None else max(int(cantidad * options['escala']), 1)
+        if min(tamanos['empresas'], tamanos['equipos']) < 1:
+            raise CommandError('Se necesita al menos una empresa y un equipo')
+
+        try:
+            creados = datos_sinteticos.poblar(
+                tamanos=tamanos,
+                prefijo=options['prefijo'],
+                semilla=options['semilla'],
+                tamano_lote=options['chunk_size'],
+                indice_busqueda=not options['sin_indice_busqueda'],
+                informar=lambda mensaje: self.stdout.write(mensaje) if options['verbosity'] > 1 else None,
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+        resumen = ', '.join(f'{cantidad} {nombre}' for nombre, cantidad in creados.items())
+        self.stdout.write(self.style.SUCCESS(f'Datos generados: {resumen}'))
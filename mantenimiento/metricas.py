@@ -0,0 +1,339 @@
+"""
+Métricas por petición expuestas en formato de texto de Prometheus.
+
+``MetricasMiddleware`` registra, para cada petición, la vista y acción
+resueltas (p. ej. ``OrdenViewSet`` / ``list``), la cantidad de consultas
+SQL, el tiempo total en SQL, el tiempo de serialización y el tamaño de la
+respuesta. Los valores se acumulan en histogramas en memoria del proceso
+(cada worker expone los suyos) y se publican en ``/metrics``.
+
+Las consultas se miden con ``connection.execute_wrapper``: por consulta
+solo se suman un contador y un ``perf_counter``, y se conservan las
+``MANTENIMIENTO_METRICAS_CONSULTAS_LENTAS`` más lentas para el registro de
+peticiones lentas (logger ``mantenimiento.metricas``), que se escribe
+cuando la petición supera ``MANTENIMIENTO_METRICAS_UMBRAL_LENTO_MS``.
+
+El tiempo de serialización es el tiempo de la vista y del renderizado de
+la respuesta descontando el SQL ejecutado durante la vista.
+
+El middleware funciona con WSGI y con ASGI; en ASGI no agrega saltos de
+hilo, para no forzar el modo síncrono en las vistas asíncronas.
+"""
+import bisect
+import heapq
+import hmac
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+
+from . import cache_respuestas
+
+logger = logging.getLogger(__name__)
+
+TIPO_CONTENIDO = 'text/plain; version=0.0.4; charset=utf-8'
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LIMITES_CONSULTAS = (1, 2, 3, 5, 10, 20, 50, 100, 250, 500)
+LIMITES_BYTES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+_candado = threading.Lock()
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas_texto(nombres, valores, extra=''):
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Histograma:
+    """Histograma acumulativo con límites fijos, por combinación de etiquetas"""
+
+    def __init__(self, nombre, ayuda, etiquetas, limites):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.limites = limites
+        self.series = {}
+
+    def observar(self, valores, valor):
+        indice = bisect.bisect_left(self.limites, valor)
+        with _candado:
+            serie = self.series.get(valores)
+            if serie is None:
+                serie = self.series[valores] = [[0] * (len(self.limites) + 1), 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        with _candado:
+            series = [(valores, list(conteos), suma) for valores, (conteos, suma) in self.series.items()]
+        for valores, conteos, suma in sorted(series):
+            acumulado = 0
+            for limite, conteo in zip(self.limites + ('+Inf',), conteos):
+                acumulado += conteo
+                le = 'le="+Inf"' if limite == '+Inf' else f'le="{_numero(limite)}"'
+                lineas.append(f'{self.nombre}_bucket{_etiquetas_texto(self.etiquetas, valores, le)} {acumulado}')
+            etiquetas = _etiquetas_texto(self.etiquetas, valores)
+            lineas.append(f'{self.nombre}_sum{etiquetas} {_numero(suma)}')
+            lineas.append(f'{self.nombre}_count{etiquetas} {acumulado}')
+        return lineas
+
+    def reiniciar(self):
+        with _candado:
+            self.series.clear()
+
+
+class Contador:
+    """Contador monótono por combinación de etiquetas"""
+
+    def __init__(self, nombre, ayuda, etiquetas):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.series = {}
+
+    def incrementar(self, valores, cantidad=1):
+        with _candado:
+            self.series[valores] = self.series.get(valores, 0) + cantidad
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} counter']
+        with _candado:
+            series = sorted(self.series.items())
+        for valores, total in series:
+            lineas.append(f'{self.nombre}{_etiquetas_texto(self.etiquetas, valores)} {total}')
+        return lineas
+
+    def reiniciar(self):
+        with _candado:
+            self.series.clear()
+
+
+ETIQUETAS_VISTA = ('vista', 'accion')
+
+PETICIONES = Contador(
+    'mantenimiento_peticiones_total', 'Peticiones atendidas.', ETIQUETAS_VISTA + ('metodo', 'estado')
+)
+DURACION = Histograma(
+    'mantenimiento_peticion_duracion_segundos', 'Duración total de la petición.',
+    ETIQUETAS_VISTA, LIMITES_SEGUNDOS,
+)
+CONSULTAS = Histograma(
+    'mantenimiento_peticion_consultas', 'Consultas SQL por petición.',
+    ETIQUETAS_VISTA, LIMITES_CONSULTAS,
+)
+TIEMPO_SQL = Histograma(
+    'mantenimiento_peticion_sql_segundos', 'Tiempo total en SQL por petición.',
+    ETIQUETAS_VISTA, LIMITES_SEGUNDOS,
+)
+SERIALIZACION = Histograma(
+    'mantenimiento_peticion_serializacion_segundos',
+    'Tiempo de la vista y el renderizado descontando SQL.',
+    ETIQUETAS_VISTA, LIMITES_SEGUNDOS,
+)
+TAMANO = Histograma(
+    'mantenimiento_respuesta_bytes', 'Tamaño del cuerpo de la respuesta.',
+    ETIQUETAS_VISTA, LIMITES_BYTES,
+)
+
+METRICAS = (PETICIONES, DURACION, CONSULTAS, TIEMPO_SQL, SERIALIZACION, TAMANO)
+
+
+def activas():
+    return getattr(settings, 'MANTENIMIENTO_METRICAS', True)
+
+
+def reiniciar():
+    for metrica in METRICAS:
+        metrica.reiniciar()
+
+
+class Medicion:
+    """Acumula las consultas de una petición (se usa como ``execute_wrapper``)"""
+
+    def __init__(self, lentas):
+        self.consultas = 0
+        self.tiempo_sql = 0.0
+        self.sql_antes_de_vista = 0.0
+        self.inicio_vista = None
+        self.cupo_lentas = lentas
+        self.lentas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.consultas += 1
+            self.tiempo_sql += duracion
+            if len(self.lentas) < self.cupo_lentas:
+                heapq.heappush(self.lentas, (duracion, self.consultas, sql))
+            elif self.cupo_lentas and duracion > self.lentas[0][0]:
+                heapq.heapreplace(self.lentas, (duracion, self.consultas, sql))
+
+    def marcar_vista(self):
+        self.inicio_vista = time.perf_counter()
+        self.sql_antes_de_vista = self.tiempo_sql
+
+    def peores(self):
+        return [(duracion, sql) for duracion, _, sql in sorted(self.lentas, reverse=True)]
+
+
+def vista_y_accion(request):
+    """Nombre de la vista resuelta y acción del ViewSet (o método HTTP)"""
+    coincidencia = getattr(request, 'resolver_match', None)
+    if coincidencia is None:
+        # Sin ruta: una sola serie para no multiplicar etiquetas con URLs arbitrarias
+        return 'sin_ruta', ''
+    funcion = coincidencia.func
+    clase = getattr(funcion, 'cls', None) or getattr(funcion, 'view_class', None)
+    nombre = clase.__name__ if clase is not None else getattr(funcion, '__name__', coincidencia.view_name)
+    acciones = getattr(funcion, 'actions', None)
+    metodo = request.method.lower()
+    return nombre, acciones.get(metodo, metodo) if acciones else metodo
+
+
+def _tamano(respuesta):
+    if respuesta.streaming:
+        return None
+    return len(respuesta.content)
+
+
+class MetricasMiddleware:
+    """Registra las métricas de cada petición"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+            # Evita que Django envuelva process_view con sync_to_async
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        if not activas():
+            return self.get_response(request)
+
+        medicion = Medicion(getattr(settings, 'MANTENIMIENTO_METRICAS_CONSULTAS_LENTAS', 5))
+        request._medicion_metricas = medicion
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(medicion):
+            respuesta = self.get_response(request)
+        fin = time.perf_counter()
+
+        self.registrar(request, respuesta, medicion, fin - inicio, fin)
+        return respuesta
+
+    async def __acall__(self, request):
+        if not activas():
+            return await self.get_response(request)
+
+        medicion = Medicion(getattr(settings, 'MANTENIMIENTO_METRICAS_CONSULTAS_LENTAS', 5))
+        request._medicion_metricas = medicion
+        inicio = time.perf_counter()
+        # La conexión es propia del contexto de la petición y el hilo del ORM la comparte
+        with connection.execute_wrapper(medicion):
+            respuesta = await self.get_response(request)
+        fin = time.perf_counter()
+
+        self.registrar(request, respuesta, medicion, fin - inicio, fin)
+        return respuesta
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        medicion = getattr(request, '_medicion_metricas', None)
+        if medicion is not None:
+            medicion.marcar_vista()
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        medicion = getattr(request, '_medicion_metricas', None)
+        if medicion is not None:
+            medicion.marcar_vista()
+
+    def registrar(self, request, respuesta, medicion, duracion, fin):
+        vista = vista_y_accion(request)
+        PETICIONES.incrementar(vista + (request.method, respuesta.status_code))
+        DURACION.observar(vista, duracion)
+        CONSULTAS.observar(vista, medicion.consultas)
+        TIEMPO_SQL.observar(vista, medicion.tiempo_sql)
+        if medicion.inicio_vista is not None:
+            sql_vista = medicion.tiempo_sql - medicion.sql_antes_de_vista
+            SERIALIZACION.observar(vista, max(fin - medicion.inicio_vista - sql_vista, 0.0))
+        tamano = _tamano(respuesta)
+        if tamano is not None:
+            TAMANO.observar(vista, tamano)
+
+        umbral = getattr(settings, 'MANTENIMIENTO_METRICAS_UMBRAL_LENTO_MS', 500)
+        if umbral is not None and duracion * 1000 >= umbral:
+            peores = '\n'.join(
+                f'  {duracion_sql * 1000:.1f} ms  {sql}' for duracion_sql, sql in medicion.peores()
+            )
+            logger.warning(
+                'Petición lenta %s %s (%s.%s): %.1f ms, %d consultas, %.1f ms en SQL\n%s',
+                request.method, request.path, vista[0], vista[1],
+                duracion * 1000, medicion.consultas, medicion.tiempo_sql * 1000, peores,
+            )
+
+
+def _lineas_cache():
+    contadores = cache_respuestas.contadores()
+    lineas = [
+        '# HELP mantenimiento_cache_respuestas_total Consultas a la caché de respuestas.',
+        '# TYPE mantenimiento_cache_respuestas_total counter',
+    ]
+    for vista, valores in contadores.items():
+        for resultado, clave in (('hit', 'hits'), ('miss', 'misses')):
+            etiquetas = _etiquetas_texto(('vista', 'resultado'), (vista, resultado))
+            lineas.append(f'mantenimiento_cache_respuestas_total{etiquetas} {valores[clave]}')
+    return lineas
+
+
+def exponer():
+    """Texto de todas las métricas en formato de exposición de Prometheus"""
+    lineas = []
+    for metrica in METRICAS:
+        lineas.extend(metrica.exponer())
+    lineas.extend(_lineas_cache())
+    return '\n'.join(lineas) + '\n'
+
+
+def autorizado(request):
+    """
+    Acceso a ``/metrics``: con la cabecera ``Authorization: Bearer <token>``
+    de ``MANTENIMIENTO_METRICAS_TOKEN``, con un usuario ``is_staff`` o, solo
+    si ``MANTENIMIENTO_METRICAS_PUBLICAS`` lo habilita, sin autenticación.
+    """
+    if getattr(settings, 'MANTENIMIENTO_METRICAS_PUBLICAS', False):
+        return True
+    token = getattr(settings, 'MANTENIMIENTO_METRICAS_TOKEN', None)
+    recibido = request.headers.get('Authorization')
+    if token and recibido is not None and hmac.compare_digest(recibido.encode(), f'Bearer {token}'.encode()):
+        return True
+    usuario = getattr(request, 'user', None)
+    return bool(usuario is not None and usuario.is_staff)
+
+
+def vista_metricas(request):
+    """``GET /metrics``; responde 403 si la petición no está autorizada (ver ``autorizado``)"""
+    if not autorizado(request):
+        return HttpResponseForbidden()
+    return HttpResponse(exponer(), content_type=TIPO_CONTENIDO)
@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-18 11:46
+
+from django.db import migrations, models
+
+
+def inicializar_secuencias(apps, schema_editor):
+    """Inicializa los contadores anuales a partir de las órdenes existentes"""
+    Orden = apps.get_model('mantenimiento', 'Orden')
+    SecuenciaOrden = apps.get_model('mantenimiento', 'SecuenciaOrden')
+
+    ultimos = {}
+    for numero_orden in Orden.objects.values_list('numero_orden', flat=True).iterator():
+        partes = numero_orden.split('-')
+        if len(partes) != 3 or not partes[1].isdigit() or not partes[2].isdigit():
+            continue
+        anio, numero = int(partes[1]), int(partes[2])
+        ultimos[anio] = max(ultimos.get(anio, 0), numero)
+
+    SecuenciaOrden.objects.bulk_create([
+        SecuenciaOrden(anio=anio, ultimo_numero=numero)
+        for anio, numero in ultimos.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mantenimiento', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaOrden',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.PositiveIntegerField(unique=True)),
+                ('ultimo_numero', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Secuencia de Órdenes',
+                'verbose_name_plural': 'Secuencias de Órdenes',
+            },
+        ),
+        migrations.RunPython(inicializar_secuencias, migrations.RunPython.noop),
+    ]
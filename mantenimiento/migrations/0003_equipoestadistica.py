@@ -0,0 +1,63 @@
+# Generated by Django 6.0 on 2026-10-18 11:49
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def construir_estadisticas(apps, schema_editor):
+    """Calcula el resumen inicial de cada equipo a partir de sus órdenes"""
+    Equipo = apps.get_model('mantenimiento', 'Equipo')
+    EquipoEstadistica = apps.get_model('mantenimiento', 'EquipoEstadistica')
+
+    filas = (
+        Equipo.objects.order_by('pk')
+        .annotate(
+            r_total=Count('ordenes'),
+            r_completadas=Count('ordenes', filter=Q(ordenes__estado='completada')),
+            r_costo=Coalesce(Sum('ordenes__costo_real'), Value(Decimal('0'))),
+            r_horas=Coalesce(Sum('ordenes__horas_trabajadas'), Value(Decimal('0'))),
+            r_ultima=Max('ordenes__fecha_termino', filter=Q(ordenes__estado='completada')),
+        )
+        .values_list('pk', 'r_total', 'r_completadas', 'r_costo', 'r_horas', 'r_ultima')
+    )
+    EquipoEstadistica.objects.bulk_create(
+        (
+            EquipoEstadistica(
+                equipo_id=pk, total_ordenes=total, ordenes_completadas=completadas,
+                costo_total=costo, horas_totales=horas, fecha_ultima_completada=ultima,
+            )
+            for pk, total, completadas, costo, horas, ultima in filas.iterator(chunk_size=1000)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mantenimiento', '0002_secuenciaorden'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipoEstadistica',
+            fields=[
+                ('equipo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='estadistica', serialize=False, to='mantenimiento.equipo')),
+                ('total_ordenes', models.PositiveIntegerField(default=0)),
+                ('ordenes_completadas', models.PositiveIntegerField(default=0)),
+                ('costo_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('horas_totales', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('fecha_ultima_completada', models.DateTimeField(blank=True, null=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estadística de Equipo',
+                'verbose_name_plural': 'Estadísticas de Equipos',
+            },
+        ),
+        migrations.RunPython(construir_estadisticas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mantenimiento', '0003_equipoestadistica'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orden',
+            index=models.Index(fields=['-fecha_programada', '-id'], name='orden_fecha_prog_id_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mantenimiento', '0004_orden_fecha_prog_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='empresa',
+            index=models.Index(fields=['-fecha_creacion'], name='empresa_fecha_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='empresa',
+            index=models.Index(condition=models.Q(('activa', True)), fields=['nombre'], name='empresa_activas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipo',
+            index=models.Index(fields=['estado', 'activo'], name='equipo_estado_activo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipo',
+            index=models.Index(fields=['-fecha_creacion'], name='equipo_fecha_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orden',
+            index=models.Index(fields=['estado', 'prioridad', 'fecha_programada'], name='orden_estado_prior_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orden',
+            index=models.Index(fields=['tecnico_asignado', 'estado'], name='orden_tecnico_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orden',
+            index=models.Index(condition=models.Q(('estado__in', ['programada', 'en_progreso', 'pausada'])), fields=['prioridad', '-fecha_programada'], name='orden_abiertas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plan',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['fecha_proximo_mantenimiento'], name='plan_activos_proximo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plan',
+            index=models.Index(fields=['-fecha_creacion'], name='plan_fecha_creacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tecnico',
+            index=models.Index(fields=['especialidad', 'activo'], name='tecnico_espec_activo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tecnico',
+            index=models.Index(fields=['apellido', 'nombre'], name='tecnico_apellido_nombre_idx'),
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 6.0 on 2026-10-18 11:56
+
+from django.db import migrations, models
+
+TABLA_FTS = 'mantenimiento_busqueda_fts'
+TABLA_DOCUMENTOS = 'mantenimiento_documentobusqueda'
+
+CAMPOS_DOCUMENTO = {
+    'Empresa': ['nombre', 'rut', 'email', 'ciudad'],
+    'Equipo': ['nombre', 'codigo', 'tipo', 'marca'],
+    'Tecnico': ['nombre', 'apellido', 'rut', 'email', 'especialidad'],
+    'Plan': ['nombre', 'tipo', 'frecuencia'],
+    'Orden': ['numero_orden', 'equipo__nombre', 'descripcion'],
+}
+
+SQLITE_CREAR = [
+    f"""CREATE VIRTUAL TABLE {TABLA_FTS} USING fts5(
+        modelo, texto, content='{TABLA_DOCUMENTOS}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER {TABLA_FTS}_ai AFTER INSERT ON {TABLA_DOCUMENTOS} BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, modelo, texto) VALUES (new.id, new.modelo, new.texto);
+    END""",
+    f"""CREATE TRIGGER {TABLA_FTS}_ad AFTER DELETE ON {TABLA_DOCUMENTOS} BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, modelo, texto) VALUES ('delete', old.id, old.modelo, old.texto);
+    END""",
+    f"""CREATE TRIGGER {TABLA_FTS}_au AFTER UPDATE ON {TABLA_DOCUMENTOS} BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, modelo, texto) VALUES ('delete', old.id, old.modelo, old.texto);
+        INSERT INTO {TABLA_FTS}(rowid, modelo, texto) VALUES (new.id, new.modelo, new.texto);
+    END""",
+]
+
+SQLITE_ELIMINAR = [
+    f'DROP TRIGGER IF EXISTS {TABLA_FTS}_ai',
+    f'DROP TRIGGER IF EXISTS {TABLA_FTS}_ad',
+    f'DROP TRIGGER IF EXISTS {TABLA_FTS}_au',
+    f'DROP TABLE IF EXISTS {TABLA_FTS}',
+]
+
+POSTGRES_CREAR = [
+    f"""ALTER TABLE {TABLA_DOCUMENTOS} ADD COLUMN vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', texto)) STORED""",
+    f'CREATE INDEX {TABLA_DOCUMENTOS}_vector_idx ON {TABLA_DOCUMENTOS} USING GIN (vector)',
+]
+
+POSTGRES_ELIMINAR = [
+    f'DROP INDEX IF EXISTS {TABLA_DOCUMENTOS}_vector_idx',
+    f'ALTER TABLE {TABLA_DOCUMENTOS} DROP COLUMN IF EXISTS vector',
+]
+
+
+def _ejecutar(schema_editor, sentencias):
+    for sentencia in sentencias:
+        schema_editor.execute(sentencia)
+
+
+def crear_indice_texto(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _ejecutar(schema_editor, SQLITE_CREAR)
+    elif vendor == 'postgresql':
+        _ejecutar(schema_editor, POSTGRES_CREAR)
+
+
+def eliminar_indice_texto(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _ejecutar(schema_editor, SQLITE_ELIMINAR)
+    elif vendor == 'postgresql':
+        _ejecutar(schema_editor, POSTGRES_ELIMINAR)
+
+
+def poblar_documentos(apps, schema_editor):
+    DocumentoBusqueda = apps.get_model('mantenimiento', 'DocumentoBusqueda')
+    for nombre, campos in CAMPOS_DOCUMENTO.items():
+        modelo = apps.get_model('mantenimiento', nombre)
+        documentos = [
+            DocumentoBusqueda(
+                modelo=nombre.lower(),
+                objeto_id=pk,
+                texto=' '.join(str(valor) for valor in valores if valor not in (None, '')),
+            )
+            for pk, *valores in modelo.objects.order_by('pk').values_list('pk', *campos).iterator()
+        ]
+        DocumentoBusqueda.objects.bulk_create(documentos, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mantenimiento', '0005_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=20)),
+                ('objeto_id', models.BigIntegerField()),
+                ('texto', models.TextField()),
+            ],
+            options={
+                'verbose_name': 'Documento de Búsqueda',
+                'verbose_name_plural': 'Documentos de Búsqueda',
+                'unique_together': {('modelo', 'objeto_id')},
+            },
+        ),
+        migrations.RunPython(crear_indice_texto, eliminar_indice_texto),
+        migrations.RunPython(poblar_documentos, migrations.RunPython.noop),
+    ]
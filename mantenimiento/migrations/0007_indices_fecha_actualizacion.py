@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 12:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mantenimiento', '0006_documentobusqueda'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='empresa',
+            index=models.Index(fields=['fecha_actualizacion'], name='empresa_fecha_act_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipo',
+            index=models.Index(fields=['fecha_actualizacion'], name='equipo_fecha_act_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orden',
+            index=models.Index(fields=['fecha_actualizacion'], name='orden_fecha_act_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plan',
+            index=models.Index(fields=['fecha_actualizacion'], name='plan_fecha_act_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tecnico',
+            index=models.Index(fields=['fecha_actualizacion'], name='tecnico_fecha_act_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mantenimiento', '0007_indices_fecha_actualizacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orden',
+            index=models.Index(fields=['estado', 'fecha_termino'], name='orden_estado_termino_idx'),
+        ),
+    ]
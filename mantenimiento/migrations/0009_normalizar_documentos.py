@@ -0,0 +1,32 @@
+# Generated by Django 6.0
+
+import unicodedata
+
+from django.db import migrations
+
+
+def normalizar(texto):
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(caracter for caracter in descompuesto if not unicodedata.combining(caracter))
+
+
+def normalizar_documentos(apps, schema_editor):
+    DocumentoBusqueda = apps.get_model('mantenimiento', 'DocumentoBusqueda')
+    documentos = []
+    for documento in DocumentoBusqueda.objects.only('texto').iterator(chunk_size=1000):
+        texto = normalizar(documento.texto)
+        if texto != documento.texto:
+            documento.texto = texto
+            documentos.append(documento)
+    DocumentoBusqueda.objects.bulk_update(documentos, ['texto'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mantenimiento', '0008_orden_estado_termino_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalizar_documentos, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,21 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from django.contrib.auth.models import User
 
+from .secuencias import siguiente_numero_orden
+
+
+class ValoresCargadosMixin:
+    """
+    Conserva en ``_valores_cargados`` los valores leídos de la base, para
+    conocer el estado previo de la instancia al guardarla.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._valores_cargados = dict(zip(field_names, values))
+        return instancia
+
 
 class Empresa(models.Model):
     """Modelo para registrar empresas cliente"""
@@ -22,12 +37,17 @@ class Empresa(models.Model):
         ordering = ['nombre']
         verbose_name = 'Empresa'
         verbose_name_plural = 'Empresas'
+        indexes = [
+            models.Index(fields=['-fecha_creacion'], name='empresa_fecha_creacion_idx'),
+            models.Index(fields=['fecha_actualizacion'], name='empresa_fecha_act_idx'),
+            models.Index(fields=['nombre'], condition=models.Q(activa=True), name='empresa_activas_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
 
 
-class Equipo(models.Model):
+class Equipo(ValoresCargadosMixin, models.Model):
     """Modelo para registrar equipos de las empresas"""
     ESTADO_CHOICES = [
         ('operativo', 'Operativo'),
@@ -60,6 +80,11 @@ class Equipo(models.Model):
         verbose_name = 'Equipo'
         verbose_name_plural = 'Equipos'
         unique_together = ('empresa', 'codigo')
+        indexes = [
+            models.Index(fields=['estado', 'activo'], name='equipo_estado_activo_idx'),
+            models.Index(fields=['-fecha_creacion'], name='equipo_fecha_creacion_idx'),
+            models.Index(fields=['fecha_actualizacion'], name='equipo_fecha_act_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre} ({self.codigo}) - {self.empresa.nombre}"
@@ -98,6 +123,11 @@ class Tecnico(models.Model):
         ordering = ['apellido', 'nombre']
         verbose_name = 'Técnico'
         verbose_name_plural = 'Técnicos'
+        indexes = [
+            models.Index(fields=['especialidad', 'activo'], name='tecnico_espec_activo_idx'),
+            models.Index(fields=['apellido', 'nombre'], name='tecnico_apellido_nombre_idx'),
+            models.Index(fields=['fecha_actualizacion'], name='tecnico_fecha_act_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre} {self.apellido} - {self.get_especialidad_display()}"
@@ -107,7 +137,7 @@ class Tecnico(models.Model):
         return f"{self.nombre} {self.apellido}"
 
 
-class Plan(models.Model):
+class Plan(ValoresCargadosMixin, models.Model):
     """Modelo para planes de mantenimiento"""
     FRECUENCIA_CHOICES = [
         ('diaria', 'Diaria'),
@@ -161,12 +191,27 @@ class Plan(models.Model):
         verbose_name = 'Plan de Mantenimiento'
         verbose_name_plural = 'Planes de Mantenimiento'
         unique_together = ('equipo', 'nombre')
+        indexes = [
+            # Índice parcial: un booleano al inicio de un índice compuesto no
+            # sirve para filtrar en SQLite, que compara "WHERE activo" sin valor
+            models.Index(
+                fields=['fecha_proximo_mantenimiento'],
+                condition=models.Q(activo=True),
+                name='plan_activos_proximo_idx',
+            ),
+            models.Index(fields=['-fecha_creacion'], name='plan_fecha_creacion_idx'),
+            models.Index(fields=['fecha_actualizacion'], name='plan_fecha_act_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre} - {self.equipo.nombre}"
 
 
-class Orden(models.Model):
+# Estados de una orden que aún no se cierra
+ESTADOS_ABIERTOS = ['programada', 'en_progreso', 'pausada']
+
+
+class Orden(ValoresCargadosMixin, models.Model):
     """Modelo para órdenes de trabajo"""
     ESTADO_CHOICES = [
         ('programada', 'Programada'),
@@ -177,6 +222,8 @@ class Orden(models.Model):
         ('pendiente', 'Pendiente'),
     ]
 
+    ESTADOS_ABIERTOS = ESTADOS_ABIERTOS
+
     PRIORIDAD_CHOICES = [
         ('baja', 'Baja'),
         ('media', 'Media'),
@@ -218,14 +265,75 @@ class Orden(models.Model):
         ordering = ['-fecha_programada']
         verbose_name = 'Orden de Trabajo'
         verbose_name_plural = 'Órdenes de Trabajo'
+        indexes = [
+            # Paginación por cursor sobre (fecha_programada, id)
+            models.Index(fields=['-fecha_programada', '-id'], name='orden_fecha_prog_id_idx'),
+            models.Index(fields=['fecha_actualizacion'], name='orden_fecha_act_idx'),
+            models.Index(fields=['estado', 'prioridad', 'fecha_programada'], name='orden_estado_prior_fecha_idx'),
+            models.Index(fields=['tecnico_asignado', 'estado'], name='orden_tecnico_estado_idx'),
+            # Órdenes abiertas: la fracción de la tabla que consultan los paneles
+            models.Index(
+                fields=['prioridad', '-fecha_programada'],
+                condition=models.Q(estado__in=ESTADOS_ABIERTOS),
+                name='orden_abiertas_idx',
+            ),
+            # Órdenes completadas en un período (costo y horas del mes en el dashboard)
+            models.Index(fields=['estado', 'fecha_termino'], name='orden_estado_termino_idx'),
+        ]
 
     def __str__(self):
         return f"{self.numero_orden} - {self.equipo.nombre}"
 
     def save(self, *args, **kwargs):
         if not self.numero_orden:
-            # Generar número de orden automáticamente
-            ultimo = Orden.objects.order_by('-id').first()
-            numero = 1 if not ultimo else (int(ultimo.numero_orden.split('-')[-1]) + 1)
-            self.numero_orden = f"ORD-{timezone.now().year}-{numero:05d}"
+            # Generar número de orden automáticamente desde el contador anual
+            self.numero_orden = siguiente_numero_orden()
         super().save(*args, **kwargs)
+
+
+class EquipoEstadistica(models.Model):
+    """Resumen de órdenes por equipo, mantenido de forma incremental"""
+    equipo = models.OneToOneField(
+        Equipo, on_delete=models.CASCADE, primary_key=True, related_name='estadistica'
+    )
+    total_ordenes = models.PositiveIntegerField(default=0)
+    ordenes_completadas = models.PositiveIntegerField(default=0)
+    costo_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    horas_totales = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    fecha_ultima_completada = models.DateTimeField(blank=True, null=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Estadística de Equipo'
+        verbose_name_plural = 'Estadísticas de Equipos'
+
+    def __str__(self):
+        return f"{self.equipo_id}: {self.total_ordenes} órdenes"
+
+
+class DocumentoBusqueda(models.Model):
+    """Documento de búsqueda desnormalizado de un objeto, indexado con texto completo"""
+    modelo = models.CharField(max_length=20)
+    objeto_id = models.BigIntegerField()
+    texto = models.TextField()
+
+    class Meta:
+        verbose_name = 'Documento de Búsqueda'
+        verbose_name_plural = 'Documentos de Búsqueda'
+        unique_together = ('modelo', 'objeto_id')
+
+    def __str__(self):
+        return f"{self.modelo} {self.objeto_id}"
+
+
+class SecuenciaOrden(models.Model):
+    """Contador anual para la numeración de órdenes de trabajo"""
+    anio = models.PositiveIntegerField(unique=True)
+    ultimo_numero = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Secuencia de Órdenes'
+        verbose_name_plural = 'Secuencias de Órdenes'
+
+    def __str__(self):
+        return f"{self.anio}: {self.ultimo_numero}"
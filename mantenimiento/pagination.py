@@ -0,0 +1,164 @@
+import base64
+import json
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PaginadorConteo(Paginator):
+    """``Paginator`` que cuenta el total sobre ``conteo`` cuando se indica"""
+
+    def __init__(self, object_list, per_page, conteo=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.conteo = conteo
+
+    @cached_property
+    def count(self):
+        if self.conteo is None:
+            return super().count
+        return self.conteo.count()
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    """
+    Paginación por número de página. ``conteo`` es el queryset sobre el que
+    se cuenta el total cuando difiere del paginado (p. ej. las filas de
+    ``values_list`` con los JOIN de las columnas relacionadas).
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None, conteo=None):
+        self.conteo = conteo
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page):
+        # PageNumberPagination lo llama con (queryset, page_size)
+        return PaginadorConteo(object_list, per_page, conteo=self.conteo)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre ``(campo, id)`` en orden descendente.
+
+    Cada página se obtiene con un ``WHERE (campo, id) < (valor, id)`` sobre
+    el índice compuesto, sin ``COUNT(*)`` ni ``OFFSET``, por lo que el costo
+    no crece con la profundidad de la página. El parámetro ``ordering`` no
+    aplica en este modo.
+    """
+    campo = 'fecha_programada'
+    cursor_query_param = 'cursor'
+    page_size = StandardResultsSetPagination.page_size
+    page_size_query_param = StandardResultsSetPagination.page_size_query_param
+    max_page_size = StandardResultsSetPagination.max_page_size
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        campo = self.campo
+        self.reverso = bool(cursor and cursor['reverso'])
+        if cursor is None:
+            queryset = queryset.order_by(f'-{campo}', '-id')
+        elif self.reverso:
+            queryset = queryset.filter(
+                Q(**{f'{campo}__gt': cursor['valor']}) | Q(**{campo: cursor['valor'], 'id__gt': cursor['id']})
+            ).order_by(campo, 'id')
+        else:
+            queryset = queryset.filter(
+                Q(**{f'{campo}__lt': cursor['valor']}) | Q(**{campo: cursor['valor'], 'id__lt': cursor['id']})
+            ).order_by(f'-{campo}', '-id')
+
+        resultados = list(queryset[:self.page_size + 1])
+        hay_mas = len(resultados) > self.page_size
+        resultados = resultados[:self.page_size]
+        if self.reverso:
+            resultados.reverse()
+
+        self.hay_siguiente = hay_mas if not self.reverso else cursor is not None
+        self.hay_anterior = cursor is not None if not self.reverso else hay_mas
+        self.page = resultados
+        return resultados
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def decode_cursor(self, request):
+        codificado = request.query_params.get(self.cursor_query_param)
+        if not codificado:
+            return None
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(codificado.encode('ascii')).decode('utf-8'))
+            valor = parse_datetime(datos['v'])
+            if valor is None:
+                raise ValueError
+            return {'valor': valor, 'id': int(datos['id']), 'reverso': bool(datos.get('r'))}
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instancia, reverso):
+        datos = {'v': getattr(instancia, self.campo).isoformat(), 'id': instancia.pk}
+        if reverso:
+            datos['r'] = 1
+        codificado = base64.urlsafe_b64encode(json.dumps(datos).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, codificado)
+
+    def get_next_link(self):
+        if not self.hay_siguiente or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverso=False)
+
+    def get_previous_link(self):
+        if not self.hay_anterior:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverso=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class OrdenPagination(StandardResultsSetPagination):
+    """
+    Paginación de órdenes: por número de página (por defecto) o por cursor
+    sobre ``(fecha_programada, id)`` con ``?paginacion=cursor``.
+    """
+    modo_query_param = 'paginacion'
+    cursor_class = KeysetPagination
+
+    def usa_cursor(self, request):
+        return (request.query_params.get(self.modo_query_param) == 'cursor'
+                or self.cursor_class.cursor_query_param in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None, conteo=None):
+        self.cursor = None
+        if self.usa_cursor(request):
+            self.cursor = self.cursor_class()
+            return self.cursor.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view, conteo=conteo)
+
+    def get_paginated_response(self, data):
+        if self.cursor is not None:
+            return self.cursor.get_paginated_response(data)
+        return super().get_paginated_response(data)
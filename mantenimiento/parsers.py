@@ -0,0 +1,68 @@
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.utils.json import strict_constant
+
+from .renderers import JSONRapidoRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+def cargar_json(contenido, encoding='utf-8', estricto=True):
+    """
+    Decodifica un documento JSON (bytes) con ``orjson`` si está disponible.
+
+    Si ``orjson`` lo rechaza (p. ej. ``NaN`` con ``estricto=False``) se
+    decodifica con ``json``, de modo que el resultado y los mensajes de
+    error son los de la biblioteca estándar. A diferencia de ``json``,
+    ``orjson`` entrega como ``float`` los enteros que no caben en 64 bits.
+    """
+    if orjson is not None and codecs.lookup(encoding).name == 'utf-8':
+        try:
+            return orjson.loads(contenido)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(contenido.decode(encoding), parse_constant=strict_constant if estricto else None)
+
+
+class JSONRapidoParser(JSONParser):
+    """``JSONParser`` con ``orjson`` cuando está disponible"""
+    renderer_class = JSONRapidoRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            return cargar_json(stream.read(), encoding, estricto=self.strict)
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parser para cuerpos NDJSON (un objeto JSON por línea).
+
+    Retorna una lista con un elemento por cada línea no vacía.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        filas = []
+        for numero, linea in enumerate(stream, start=1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                filas.append(cargar_json(linea, encoding, estricto=False))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON inválido en la línea {numero}: {exc}')
+        return filas
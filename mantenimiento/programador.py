@@ -0,0 +1,138 @@
+"""
+Generación de órdenes de trabajo desde los planes de mantenimiento.
+
+``generar_ordenes`` recorre por lotes (ordenados por id) los planes activos
+cuyo ``fecha_proximo_mantenimiento`` cae dentro del horizonte, crea con
+``bulk_create`` una orden por cada ocurrencia pendiente y adelanta la fecha
+del plan con ``bulk_update``, todo en la misma transacción por lote.
+
+El proceso es idempotente: un plan ya procesado tiene su próxima fecha
+fuera del horizonte, y además no se crea una orden si el plan ya tiene una
+para esa fecha (p. ej. creada a mano).
+"""
+import datetime
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import busqueda, cache_respuestas, rollups
+from .models import Plan, Orden
+from .secuencias import reservar_numeros_orden
+
+HORIZONTE_DIAS = 7
+TAMANO_LOTE = 1000
+
+# Hora del día a la que se programan las órdenes generadas
+HORA_PROGRAMADA = datetime.time(8, 0)
+
+CAMPOS_PLAN = (
+    'id', 'empresa_id', 'equipo_id', 'nombre', 'tareas',
+    'frequency_days', 'fecha_proximo_mantenimiento',
+)
+
+
+def ocurrencias(fecha_proxima, frecuencia_dias, hoy, hasta):
+    """
+    Fechas a generar para un plan y la nueva fecha próxima.
+
+    Las ocurrencias vencidas (anteriores a ``hoy``) se agrupan en una sola
+    orden en ``fecha_proxima`` en lugar de generar una por cada periodo
+    atrasado.
+    """
+    paso = datetime.timedelta(days=max(frecuencia_dias, 1))
+    fechas = [fecha_proxima]
+    siguiente = fecha_proxima + paso
+    if siguiente < hoy:
+        atrasados = -(-(hoy - siguiente).days // paso.days)
+        siguiente += paso * atrasados
+    while siguiente <= hasta:
+        fechas.append(siguiente)
+        siguiente += paso
+    return fechas, siguiente
+
+
+def _fecha_programada(fecha):
+    return timezone.make_aware(datetime.datetime.combine(fecha, HORA_PROGRAMADA))
+
+
+def _existentes(planes, desde):
+    """Pares (plan, fecha) que ya tienen una orden"""
+    filas = Orden.objects.filter(
+        plan_id__in=[plan.pk for plan in planes],
+        fecha_programada__gte=_fecha_programada(desde) - datetime.timedelta(days=1),
+    ).order_by().values_list('plan_id', 'fecha_programada')
+    return {(plan_id, timezone.localdate(fecha)) for plan_id, fecha in filas}
+
+
+def _procesar_lote(ids, hoy, hasta):
+    with transaction.atomic():
+        planes = list(
+            Plan.objects.select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked)
+            .filter(pk__in=ids, activo=True, fecha_proximo_mantenimiento__lte=hasta)
+            .order_by('pk')
+            .only(*CAMPOS_PLAN)
+        )
+        if not planes:
+            return 0, 0
+
+        existentes = _existentes(planes, min(plan.fecha_proximo_mantenimiento for plan in planes))
+        ordenes = []
+        ahora = timezone.now()
+        for plan in planes:
+            fechas, siguiente = ocurrencias(plan.fecha_proximo_mantenimiento, plan.frequency_days, hoy, hasta)
+            for fecha in fechas:
+                if (plan.pk, fecha) in existentes:
+                    continue
+                ordenes.append(Orden(
+                    empresa_id=plan.empresa_id,
+                    equipo_id=plan.equipo_id,
+                    plan_id=plan.pk,
+                    descripcion=f'{plan.nombre}: {plan.tareas}',
+                    fecha_programada=_fecha_programada(fecha),
+                ))
+            plan.fecha_proximo_mantenimiento = siguiente
+            plan.fecha_actualizacion = ahora
+
+        if ordenes:
+            for orden, numero in zip(ordenes, reservar_numeros_orden(len(ordenes))):
+                orden.numero_orden = numero
+            Orden.objects.bulk_create(ordenes, batch_size=TAMANO_LOTE)
+        Plan.objects.bulk_update(planes, ['fecha_proximo_mantenimiento', 'fecha_actualizacion'])
+
+        # bulk_create no dispara señales: se actualizan resúmenes, índice y caché
+        rollups.recalcular_equipos({orden.equipo_id for orden in ordenes})
+        if busqueda.disponible():
+            busqueda.indexar(Orden, [orden.pk for orden in ordenes])
+        etiquetas = cache_respuestas.etiquetas_ordenes((plan.empresa_id, plan.equipo_id) for plan in planes)
+        cache_respuestas.invalidar(etiquetas | {'plan'})
+    return len(planes), len(ordenes)
+
+
+def generar_ordenes(horizonte_dias=HORIZONTE_DIAS, tamano_lote=TAMANO_LOTE, planes=None):
+    """
+    Genera las órdenes de los planes que vencen dentro de ``horizonte_dias``.
+
+    ``planes`` permite restringir el proceso a un queryset de Plan (p. ej.
+    los de una empresa). Retorna un diccionario con la cantidad de
+    ``planes`` procesados, las ``ordenes_creadas`` y la fecha ``hasta``.
+    """
+    hoy = timezone.localdate()
+    hasta = hoy + datetime.timedelta(days=horizonte_dias)
+    if planes is None:
+        planes = Plan.objects.all()
+    vencidos = planes.filter(activo=True, fecha_proximo_mantenimiento__lte=hasta)
+
+    total_planes = total_ordenes = 0
+    ultimo_id = 0
+    while True:
+        ids = list(
+            vencidos.filter(pk__gt=ultimo_id).order_by('pk').values_list('pk', flat=True)[:tamano_lote]
+        )
+        if not ids:
+            break
+        procesados, creadas = _procesar_lote(ids, hoy, hasta)
+        total_planes += procesados
+        total_ordenes += creadas
+        ultimo_id = ids[-1]
+
+    return {'planes': total_planes, 'ordenes_creadas': total_ordenes, 'hasta': hasta}
@@ -0,0 +1,253 @@
+"""
+Próxima fecha adaptativa de los planes predictivos.
+
+``ajustar`` estima para cada equipo una distribución de Weibull de sus
+tiempos entre fallas (el inicio de fallas consecutivas, ver
+``confiabilidad.fallas``), vectorizada sobre todos los equipos a la vez:
+
+- Los intervalos de cada equipo se ordenan y se les asigna su rango de
+  mediana (aproximación de Bernard, ``(i - 0,3) / (n + 0,4)``).
+- La forma y la escala salen de la recta de mínimos cuadrados de
+  ``ln(-ln(1 - F))`` sobre ``ln(t)``, con las sumas de cada equipo
+  calculadas con ``np.bincount``.
+- Con menos de ``MIN_INTERVALOS_WEIBULL`` intervalos (o sin dispersión) se
+  usa una exponencial: forma 1 y escala igual al intervalo medio.
+
+La fecha propuesta es el momento en que la confiabilidad del equipo cae a
+``MANTENIMIENTO_PRONOSTICO_CONFIABILIDAD`` (0,9 por defecto), contado desde
+la última renovación: el término de la última falla o la última orden
+completada del plan, la que sea posterior. Se acota entre hoy y
+``MANTENIMIENTO_PRONOSTICO_MAX_DIAS`` días. Los equipos sin fallas
+registradas conservan la fecha fija del plan.
+
+``pronosticar`` recorre toda la flota por lotes de equipos y guarda las
+fechas con ``bulk_update``. ``actualizar_equipos`` hace lo mismo para
+equipos puntuales: lo usan la señal de ``Orden`` al completarse una falla o
+una ejecución de un plan predictivo, y las operaciones masivas que no
+disparan señales (con cualquier orden completada).
+"""
+import datetime
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import cache_respuestas
+from .confiabilidad import Epoca, fallas, leer_arreglo
+from .models import Plan
+
+MIN_INTERVALOS_WEIBULL = 3
+TAMANO_LOTE = 1000
+SEGUNDOS_DIA = 86400.0
+EPOCA = datetime.date(1970, 1, 1)
+
+
+def confiabilidad_objetivo():
+    return getattr(settings, 'MANTENIMIENTO_PRONOSTICO_CONFIABILIDAD', 0.9)
+
+
+def maximo_dias():
+    return getattr(settings, 'MANTENIMIENTO_PRONOSTICO_MAX_DIAS', 365)
+
+
+def automatico():
+    return getattr(settings, 'MANTENIMIENTO_PRONOSTICO_AUTOMATICO', True)
+
+
+def ajustar(equipo, inicio, cantidad):
+    """
+    Forma, escala (días), cantidad de intervalos y si el ajuste es de
+    Weibull (o exponencial), por equipo.
+
+    ``equipo`` es la posición (0 a ``cantidad - 1``) del equipo de cada
+    falla e ``inicio`` su inicio en segundos. La forma y la escala son NaN
+    para los equipos sin intervalos.
+    """
+    orden = np.lexsort((inicio, equipo))
+    equipo, inicio = equipo[orden], inicio[orden]
+    mismo = equipo[1:] == equipo[:-1]
+    intervalos = (inicio[1:] - inicio[:-1])[mismo] / SEGUNDOS_DIA
+    grupo = equipo[1:][mismo]
+    # Fallas simultáneas no aportan un tiempo entre fallas
+    positivos = intervalos > 0
+    intervalos, grupo = intervalos[positivos], grupo[positivos]
+    n = np.bincount(grupo, minlength=cantidad)
+
+    orden = np.lexsort((intervalos, grupo))
+    intervalos, grupo = intervalos[orden], grupo[orden]
+    primero = np.concatenate(([0], np.cumsum(n)[:-1]))
+    rango = np.arange(len(grupo)) - primero[grupo] + 1
+    x = np.log(intervalos)
+    y = np.log(-np.log1p(-(rango - 0.3) / (n[grupo] + 0.4)))
+
+    def suma(valores):
+        return np.bincount(grupo, weights=valores, minlength=cantidad)
+
+    sx, sy, sxx, sxy, total = suma(x), suma(y), suma(x * x), suma(x * y), suma(intervalos)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        varianza = n * sxx - sx * sx
+        forma = (n * sxy - sx * sy) / varianza
+        escala = np.exp(-(sy - forma * sx) / (n * forma))
+        media = total / n
+    weibull = (n >= MIN_INTERVALOS_WEIBULL) & (varianza > 1e-9 * n * n) & (forma > 0) & np.isfinite(escala)
+    return (
+        np.where(weibull, forma, np.where(n > 0, 1.0, np.nan)),
+        np.where(weibull, escala, np.where(n > 0, media, np.nan)),
+        n,
+        weibull,
+    )
+
+
+def dias_hasta_objetivo(forma, escala, objetivo):
+    """Días desde la renovación hasta que la confiabilidad cae a ``objetivo``"""
+    return escala * (-np.log(objetivo)) ** (1 / forma)
+
+
+def calcular(equipo_ids, hoy=None, planes=None):
+    """
+    Propuestas de los planes predictivos activos de ``equipo_ids`` (solo los
+    del queryset ``planes``, si se indica).
+
+    Retorna una lista de diccionarios por plan (ordenados por id) con el
+    ``plan``, el ``equipo``, la fecha ``actual``, la ``propuesta`` (o
+    ``None`` sin fallas registradas), la ``forma`` y la ``escala`` (días)
+    ajustadas, los ``intervalos`` usados y el ``modelo``.
+    """
+    hoy = hoy or timezone.localdate()
+    planes = list(
+        (Plan.objects.all() if planes is None else planes)
+        .filter(equipo_id__in=equipo_ids, tipo='predictivo', activo=True)
+        .annotate(ultima_ejecucion=Max('ordenes__fecha_termino', filter=Q(ordenes__estado='completada')))
+        .order_by('pk')
+        .values_list('pk', 'equipo_id', 'fecha_proximo_mantenimiento', Epoca('ultima_ejecucion'))
+    )
+    if not planes:
+        return []
+
+    ids = np.unique([equipo_id for _, equipo_id, _, _ in planes])
+    datos = leer_arreglo(
+        fallas().filter(equipo_id__in=ids.tolist()).order_by().values_list(
+            'equipo_id', Epoca('fecha_inicio'), Epoca(Coalesce('fecha_termino', 'fecha_inicio')),
+        ),
+        3,
+    )
+    equipo = np.searchsorted(ids, datos[:, 0].astype(np.int64))
+    forma, escala, n, weibull = ajustar(equipo, datos[:, 1], len(ids))
+    ultima_falla = np.full(len(ids), np.nan)
+    np.fmax.at(ultima_falla, equipo, datos[:, 2])
+
+    posicion = np.searchsorted(ids, [equipo_id for _, equipo_id, _, _ in planes])
+    ultima_ejecucion = np.array([fila[3] for fila in planes], dtype=np.float64)
+    renovacion = np.fmax(ultima_falla[posicion], ultima_ejecucion)
+    with np.errstate(invalid='ignore'):
+        dias = renovacion / SEGUNDOS_DIA + dias_hasta_objetivo(
+            forma[posicion], escala[posicion], confiabilidad_objetivo()
+        )
+    minimo = (hoy - EPOCA).days
+    dias = np.clip(np.floor(dias), minimo, minimo + maximo_dias())
+
+    propuestas = []
+    for i, (pk, equipo_id, actual, _) in enumerate(planes):
+        j = posicion[i]
+        sin_datos = np.isnan(dias[i])
+        propuestas.append({
+            'plan': pk,
+            'equipo': equipo_id,
+            'actual': actual,
+            'propuesta': None if sin_datos else EPOCA + datetime.timedelta(days=int(dias[i])),
+            'forma': None if sin_datos else round(float(forma[j]), 4),
+            'escala': None if sin_datos else round(float(escala[j]), 2),
+            'intervalos': int(n[j]),
+            'modelo': None if sin_datos else ('weibull' if weibull[j] else 'exponencial'),
+        })
+    return propuestas
+
+
+def guardar(propuestas):
+    """Guarda con ``bulk_update`` las propuestas que cambian la fecha del plan; retorna cuántas"""
+    cambios = [
+        propuesta for propuesta in propuestas
+        if propuesta['propuesta'] is not None and propuesta['propuesta'] != propuesta['actual']
+    ]
+    if not cambios:
+        return 0
+    planes = {plan.pk: plan for plan in Plan.objects.filter(pk__in=[c['plan'] for c in cambios]).only(
+        'pk', 'empresa_id', 'equipo_id', 'fecha_proximo_mantenimiento', 'fecha_actualizacion',
+    )}
+    ahora = timezone.now()
+    for propuesta in cambios:
+        plan = planes[propuesta['plan']]
+        plan.fecha_proximo_mantenimiento = propuesta['propuesta']
+        plan.fecha_actualizacion = ahora
+    with transaction.atomic():
+        Plan.objects.bulk_update(planes.values(), ['fecha_proximo_mantenimiento', 'fecha_actualizacion'],
+                                 batch_size=TAMANO_LOTE)
+        # bulk_update no dispara señales: se invalida la caché de respuestas
+        etiquetas = set()
+        for plan in planes.values():
+            etiquetas |= cache_respuestas.etiquetas_objeto(
+                'plan', plan.pk, {'empresa': plan.empresa_id, 'equipo': plan.equipo_id}
+            )
+        cache_respuestas.invalidar(etiquetas)
+    return len(planes)
+
+
+def actualizar_equipos(equipo_ids, hoy=None):
+    """Recalcula y guarda la fecha de los planes predictivos de los equipos indicados"""
+    equipo_ids = list(equipo_ids)
+    if not equipo_ids:
+        return 0
+    return guardar(calcular(equipo_ids, hoy=hoy))
+
+
+def renueva_equipo(orden):
+    """
+    Si la orden cambia el pronóstico de su equipo al completarse: una falla
+    (sin plan o de un plan correctivo) o una ejecución de un plan predictivo.
+    """
+    if orden.plan_id is None:
+        return True
+    return Plan.objects.filter(pk=orden.plan_id, tipo__in=('correctivo', 'predictivo')).exists()
+
+
+def registrar_guardado(orden, creada):
+    """Actualiza los planes predictivos del equipo si la orden se acaba de completar y lo renueva"""
+    if orden.estado != 'completada':
+        return
+    anterior = None if creada else getattr(orden, '_valores_cargados', {}).get('estado')
+    if anterior == 'completada' or not renueva_equipo(orden):
+        return
+    actualizar_equipos([orden.equipo_id])
+
+
+def pronosticar(tamano_lote=TAMANO_LOTE, planes=None, hoy=None, aplicar=True):
+    """
+    Pronostica los planes predictivos activos de toda la flota (o de un
+    queryset de Plan) por lotes de ``tamano_lote`` equipos.
+
+    Retorna un diccionario con la cantidad de ``planes`` evaluados, los
+    ajustados con ``weibull`` y ``exponencial``, los ``sin_datos`` y los
+    ``actualizados`` (0 si ``aplicar`` es falso).
+    """
+    if planes is None:
+        planes = Plan.objects.all()
+    equipos = (
+        planes.filter(tipo='predictivo', activo=True).order_by('equipo_id')
+        .values_list('equipo_id', flat=True).distinct()
+    )
+    resumen = {'planes': 0, 'weibull': 0, 'exponencial': 0, 'sin_datos': 0, 'actualizados': 0}
+    ultimo_id = 0
+    while True:
+        ids = list(equipos.filter(equipo_id__gt=ultimo_id)[:tamano_lote])
+        if not ids:
+            return resumen
+        propuestas = calcular(ids, hoy=hoy, planes=planes)
+        resumen['planes'] += len(propuestas)
+        for propuesta in propuestas:
+            resumen[propuesta['modelo'] or 'sin_datos'] += 1
+        if aplicar:
+            resumen['actualizados'] += guardar(propuestas)
+        ultimo_id = ids[-1]
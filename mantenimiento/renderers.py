@@ -0,0 +1,72 @@
+"""
+Renderer JSON sobre ``orjson``, con el mismo resultado que ``JSONRenderer``.
+
+``orjson`` serializa en C los diccionarios y listas de los serializadores
+(``ReturnDict`` / ``ReturnList``), las fechas (``date``, ``datetime`` con
+``Z`` para UTC, como el ``JSONEncoder`` de DRF), los UUID y las claves no
+textuales. Los ``Decimal`` y demás tipos sin soporte nativo pasan por
+``JSONEncoder.default`` de DRF, por lo que su representación no cambia.
+
+Se usa el ``JSONRenderer`` de DRF cuando ``orjson`` no está instalado,
+cuando se pide indentación distinta de 2 (API navegable o
+``Accept: application/json; indent=4``), con ``UNICODE_JSON``,
+``COMPACT_JSON`` o ``STRICT_JSON`` desactivados, o cuando ``orjson``
+rechaza los datos (p. ej. enteros de más de 64 bits).
+
+Diferencias conocidas, que no cambian el valor de los datos:
+
+- Los ``float`` en notación exponencial se escriben sin ``+`` ni ceros a la
+  izquierda en el exponente (``1e16`` y ``1e-7`` en lugar de ``1e+16`` y
+  ``1e-07``). Los serializadores entregan los decimales como texto.
+- ``NaN`` e ``Infinity`` se escriben como ``null`` en lugar de fallar.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+# Separadores de línea que JSONRenderer escapa para que el JSON sea JavaScript válido
+SEPARADORES_LINEA = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """``JSONRenderer`` con ``orjson`` cuando está disponible"""
+
+    def __init__(self):
+        self.default = self.encoder_class().default
+
+    def opciones(self, indent):
+        """Opciones de ``orjson.dumps``, o ``None`` si se debe usar el renderer de DRF"""
+        if orjson is None or self.ensure_ascii or not self.compact or not self.strict:
+            return None
+        opciones = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        if indent is None:
+            return opciones
+        if indent == 2:
+            return opciones | orjson.OPT_INDENT_2
+        return None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        opciones = self.opciones(self.get_indent(accepted_media_type, renderer_context or {}))
+        if opciones is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            contenido = orjson.dumps(data, default=self.default, option=opciones)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        for separador, escapado in SEPARADORES_LINEA:
+            if separador in contenido:
+                contenido = contenido.replace(separador, escapado)
+        return contenido
+
+
+def dumps(datos):
+    """JSON compacto en bytes, con el mismo formato que ``JSONRapidoRenderer``"""
+    return JSONRapidoRenderer().render(datos)
+
@@ -0,0 +1,169 @@
+"""
+Resumen materializado de órdenes por equipo (``EquipoEstadistica``).
+
+El resumen se mantiene de forma incremental desde las señales de ``Orden``:
+cada alta, cambio o baja aplica la diferencia entre la contribución previa
+de la orden y la nueva con un único ``UPDATE``. Las operaciones masivas que
+no disparan señales llaman a ``recalcular_equipos`` con los equipos
+afectados, y ``reconstruir`` recalcula todos los equipos por lotes.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Equipo, EquipoEstadistica, Orden
+
+CERO = Decimal('0')
+
+# Campos de Orden que afectan al resumen
+CAMPOS_ROLLUP = ('equipo_id', 'estado', 'costo_real', 'horas_trabajadas', 'fecha_termino')
+
+TAMANO_LOTE = 1000
+
+
+def _contribucion(valores):
+    """Aporte de una orden al resumen de su equipo"""
+    completada = valores['estado'] == 'completada'
+    return {
+        'total_ordenes': 1,
+        'ordenes_completadas': 1 if completada else 0,
+        'costo_total': valores['costo_real'] or CERO,
+        'horas_totales': valores['horas_trabajadas'] or CERO,
+        'completada': completada,
+    }
+
+
+def valores_actuales(orden):
+    """Valores en memoria de los campos que afectan al resumen"""
+    return {campo: getattr(orden, campo) for campo in CAMPOS_ROLLUP}
+
+
+def valores_originales(orden):
+    """
+    Valores de la orden tal como fueron leídos de la base de datos, o
+    ``None`` si no se conocen (instancia no cargada desde la base).
+    """
+    cargados = getattr(orden, '_valores_cargados', None)
+    if cargados is None or any(campo not in cargados for campo in CAMPOS_ROLLUP):
+        return None
+    return {campo: cargados[campo] for campo in CAMPOS_ROLLUP}
+
+
+def _ultima_completada(equipo_id):
+    return Subquery(
+        Orden.objects.filter(equipo_id=equipo_id, estado='completada')
+        .order_by()
+        .values('equipo')
+        .annotate(ultima=Max('fecha_termino'))
+        .values('ultima')
+    )
+
+
+def _aplicar(equipo_id, signo, aporte, recalcular_si_falta=True):
+    """Suma (signo=1) o resta (signo=-1) un aporte al resumen del equipo"""
+    cambios = {
+        'total_ordenes': F('total_ordenes') + signo * aporte['total_ordenes'],
+        'ordenes_completadas': F('ordenes_completadas') + signo * aporte['ordenes_completadas'],
+        'costo_total': F('costo_total') + signo * aporte['costo_total'],
+        'horas_totales': F('horas_totales') + signo * aporte['horas_totales'],
+    }
+    if aporte['completada']:
+        cambios['fecha_ultima_completada'] = _ultima_completada(equipo_id)
+
+    actualizados = EquipoEstadistica.objects.filter(equipo_id=equipo_id).update(**cambios)
+    if not actualizados and recalcular_si_falta:
+        recalcular_equipos([equipo_id])
+
+
+def registrar_guardado(orden, creada):
+    """Actualiza el resumen tras guardar una orden"""
+    nuevos = valores_actuales(orden)
+    anteriores = None if creada else valores_originales(orden)
+
+    if not creada and anteriores is None:
+        # Se desconoce el estado previo: se recalcula el equipo completo
+        recalcular_equipos([nuevos['equipo_id']])
+    elif anteriores is None:
+        _aplicar(nuevos['equipo_id'], 1, _contribucion(nuevos))
+    elif anteriores != nuevos:
+        aporte_anterior = _contribucion(anteriores)
+        aporte_nuevo = _contribucion(nuevos)
+        if anteriores['equipo_id'] != nuevos['equipo_id']:
+            _aplicar(anteriores['equipo_id'], -1, aporte_anterior, recalcular_si_falta=False)
+            _aplicar(nuevos['equipo_id'], 1, aporte_nuevo)
+        else:
+            diferencia = {
+                campo: aporte_nuevo[campo] - aporte_anterior[campo]
+                for campo in ('total_ordenes', 'ordenes_completadas', 'costo_total', 'horas_totales')
+            }
+            diferencia['completada'] = aporte_anterior['completada'] or aporte_nuevo['completada']
+            _aplicar(nuevos['equipo_id'], 1, diferencia)
+
+    orden._valores_cargados = {**getattr(orden, '_valores_cargados', {}), **nuevos}
+
+
+def registrar_eliminacion(orden):
+    """Descuenta una orden eliminada del resumen de su equipo"""
+    valores = valores_originales(orden) or valores_actuales(orden)
+    # No se recrea el resumen: el equipo puede estar eliminándose en cascada
+    _aplicar(valores['equipo_id'], -1, _contribucion(valores), recalcular_si_falta=False)
+
+
+def calcular_resumenes(equipos):
+    """
+    Calcula desde cero los resúmenes de un queryset de Equipo.
+
+    Retorna instancias de ``EquipoEstadistica`` sin guardar.
+    """
+    filas = (
+        equipos.order_by()
+        .annotate(
+            r_total=Count('ordenes'),
+            r_completadas=Count('ordenes', filter=Q(ordenes__estado='completada')),
+            r_costo=Coalesce(Sum('ordenes__costo_real'), Value(CERO)),
+            r_horas=Coalesce(Sum('ordenes__horas_trabajadas'), Value(CERO)),
+            r_ultima=Max('ordenes__fecha_termino', filter=Q(ordenes__estado='completada')),
+        )
+        .values_list('pk', 'r_total', 'r_completadas', 'r_costo', 'r_horas', 'r_ultima')
+    )
+    return [
+        EquipoEstadistica(
+            equipo_id=pk, total_ordenes=total, ordenes_completadas=completadas,
+            costo_total=costo, horas_totales=horas, fecha_ultima_completada=ultima,
+        )
+        for pk, total, completadas, costo, horas, ultima in filas
+    ]
+
+
+def recalcular_equipos(equipo_ids):
+    """Recalcula y guarda los resúmenes de los equipos indicados"""
+    equipo_ids = list(equipo_ids)
+    if not equipo_ids:
+        return 0
+    resumenes = calcular_resumenes(Equipo.objects.filter(pk__in=equipo_ids))
+    EquipoEstadistica.objects.bulk_create(
+        resumenes,
+        update_conflicts=True,
+        unique_fields=['equipo'],
+        update_fields=[
+            'total_ordenes', 'ordenes_completadas', 'costo_total',
+            'horas_totales', 'fecha_ultima_completada', 'fecha_actualizacion',
+        ],
+    )
+    return len(resumenes)
+
+
+def reconstruir(tamano_lote=TAMANO_LOTE):
+    """Recalcula los resúmenes de todos los equipos en lotes de ``tamano_lote``"""
+    total = 0
+    ultimo_id = 0
+    while True:
+        ids = list(
+            Equipo.objects.filter(pk__gt=ultimo_id).order_by('pk')
+            .values_list('pk', flat=True)[:tamano_lote]
+        )
+        if not ids:
+            return total
+        total += recalcular_equipos(ids)
+        ultimo_id = ids[-1]
@@ -0,0 +1,82 @@
+"""
+Asignación atómica de números de orden.
+
+Cada año tiene su propio contador en ``SecuenciaOrden``. Los números se
+reservan con un ``UPDATE ... SET ultimo_numero = ultimo_numero + n`` dentro
+de una transacción, por lo que dos procesos concurrentes nunca obtienen el
+mismo número y no es necesario consultar la última orden creada.
+"""
+import time
+
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+PREFIJO_ORDEN = 'ORD'
+
+# Reintentos ante bloqueos transitorios de la base de datos (SQLite)
+MAX_REINTENTOS = 50
+ESPERA_REINTENTO = 0.01
+
+
+def formatear_numero(anio, numero):
+    """Construye el número de orden visible, p. ej. ORD-2025-00042"""
+    return f"{PREFIJO_ORDEN}-{anio}-{numero:05d}"
+
+
+def reservar_numeros(cantidad=1, anio=None):
+    """
+    Reserva un bloque de ``cantidad`` números consecutivos para ``anio``.
+
+    Retorna un ``range`` con los números reservados. El bloque queda
+    consumido aunque no se utilice completo.
+    """
+    if cantidad < 1:
+        raise ValueError('La cantidad a reservar debe ser al menos 1')
+    if anio is None:
+        anio = timezone.now().year
+
+    for intento in range(MAX_REINTENTOS):
+        try:
+            return _reservar(cantidad, anio)
+        except OperationalError:
+            # SQLite no espera a otros escritores dentro de una transacción
+            # diferida; se reintenta con una espera creciente.
+            if transaction.get_connection().in_atomic_block or intento == MAX_REINTENTOS - 1:
+                raise
+            time.sleep(ESPERA_REINTENTO * (intento + 1))
+
+
+def _reservar(cantidad, anio):
+    from .models import SecuenciaOrden
+
+    with transaction.atomic():
+        actualizados = SecuenciaOrden.objects.filter(anio=anio).update(
+            ultimo_numero=F('ultimo_numero') + cantidad
+        )
+        if not actualizados:
+            try:
+                with transaction.atomic():
+                    SecuenciaOrden.objects.create(anio=anio, ultimo_numero=cantidad)
+                return range(1, cantidad + 1)
+            except IntegrityError:
+                # Otro proceso creó el contador del año en paralelo
+                SecuenciaOrden.objects.filter(anio=anio).update(
+                    ultimo_numero=F('ultimo_numero') + cantidad
+                )
+        ultimo = SecuenciaOrden.objects.filter(anio=anio).values_list(
+            'ultimo_numero', flat=True
+        ).get()
+    return range(ultimo - cantidad + 1, ultimo + 1)
+
+
+def reservar_numeros_orden(cantidad=1, anio=None):
+    """Reserva ``cantidad`` números de orden ya formateados"""
+    if anio is None:
+        anio = timezone.now().year
+    return [formatear_numero(anio, numero) for numero in reservar_numeros(cantidad, anio)]
+
+
+def siguiente_numero_orden(anio=None):
+    """Obtiene un único número de orden formateado"""
+    return reservar_numeros_orden(1, anio)[0]
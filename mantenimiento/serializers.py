@@ -1,8 +1,144 @@
+from django.conf import settings
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.urls import reverse
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .consultas import plan_para
 from .models import Empresa, Equipo, Tecnico, Plan, Orden
+from .transiciones import TRANSICIONES
+
+# Cantidad máxima de elementos por colección anidada en los detalles.
+# MANTENIMIENTO_LIMITES_ANIDADOS en settings reemplaza solo las colecciones que indica.
+LIMITES_ANIDADOS = {
+    'equipos': 50,
+    'planes': 50,
+    'ordenes': 10,
+}
+
+
+def limite_anidado(coleccion):
+    limites = getattr(settings, 'MANTENIMIENTO_LIMITES_ANIDADOS', {})
+    return limites.get(coleccion, LIMITES_ANIDADOS[coleccion])
+
+
+def _lista_parametro(request, nombre):
+    valor = request.query_params.get(nombre, '')
+    return [parte.strip() for parte in valor.split(',') if parte.strip()]
+
+
+class CamposDinamicosMixin:
+    """
+    Campos por petición en las lecturas (GET):
+
+    - ``?fields=id,nombre`` limita la respuesta a esos campos.
+    - ``?expand=empresa`` reemplaza el id de una relación de
+      ``campos_expandibles`` por el objeto serializado.
+
+    Solo aplica al serializador de la vista (no a los anidados ni a las
+    colecciones de los detalles). Como ``planificar_consulta`` recorre los
+    campos resultantes, el queryset también se reduce: ``only()`` con las
+    columnas solicitadas y ``select_related`` solo de las relaciones que
+    se muestran o se expanden. Los nombres desconocidos se ignoran.
+    """
+    # {campo: (serializador, many)}; el serializador se declara antes que la subclase
+    campos_expandibles = {}
+
+    def _es_raiz(self):
+        if self.context.get('anidado'):
+            return False
+        padre = self.parent
+        if isinstance(padre, serializers.ListSerializer):
+            padre = padre.parent
+        return padre is None
+
+    def get_fields(self):
+        campos = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS or not self._es_raiz():
+            return campos
 
+        for nombre in _lista_parametro(request, 'expand'):
+            if nombre in self.campos_expandibles:
+                serializer_class, many = self.campos_expandibles[nombre]
+                modelo = self.Meta.model._meta.get_field(nombre)
+                campos[nombre] = serializer_class(
+                    many=many, read_only=True, allow_null=modelo.null and not many
+                )
 
-class EmpresaSerializer(serializers.ModelSerializer):
+        solicitados = _lista_parametro(request, 'fields')
+        if solicitados:
+            campos = {nombre: campo for nombre, campo in campos.items() if nombre in solicitados}
+        return campos
+
+
+class ColeccionesAcotadasMixin:
+    """
+    Serializa colecciones anidadas (relaciones inversas) con un límite por
+    colección, precargadas con ``Prefetch`` y con el total y un enlace a la
+    página siguiente del sub-endpoint paginado correspondiente.
+
+    Las subclases definen ``get_colecciones()`` con el formato
+    ``{relación: (serializador, nombre de la url, parámetro de filtro)}``.
+    """
+
+    def get_colecciones(self):
+        return {}
+
+    def optimizar_queryset(self, queryset):
+        campos = self.fields
+        for nombre, (serializer_class, _, _) in self.get_colecciones().items():
+            if not {nombre, f'{nombre}_total', f'{nombre}_siguiente'} & campos.keys():
+                # Colección excluida con ?fields=
+                continue
+            relacion = queryset.model._meta.get_field(nombre)
+            modelo = relacion.related_model
+            if nombre in campos:
+                plan = plan_para(serializer_class())
+                # Clave foránea necesaria para asociar los objetos precargados
+                plan.columna('', relacion.field.name)
+                hijos = plan.aplicar(modelo._default_manager.all())
+                queryset = queryset.prefetch_related(Prefetch(
+                    nombre, queryset=hijos[:limite_anidado(nombre)], to_attr=f'{nombre}_acotados'
+                ))
+            conteo = (
+                modelo._default_manager.filter(**{relacion.field.name: OuterRef('pk')})
+                .order_by()
+                .values(relacion.field.name)
+                .annotate(total=Count('pk'))
+                .values('total')
+            )
+            queryset = queryset.annotate(**{
+                f'{nombre}_total': Coalesce(Subquery(conteo, output_field=IntegerField()), 0)
+            })
+        return queryset
+
+    def serializar_coleccion(self, obj, nombre):
+        serializer_class = self.get_colecciones()[nombre][0]
+        elementos = getattr(obj, f'{nombre}_acotados', None)
+        if elementos is None:
+            elementos = getattr(obj, nombre).all()[:limite_anidado(nombre)]
+        return serializer_class(elementos, many=True, context={**self.context, 'anidado': True}).data
+
+    def total_coleccion(self, obj, nombre):
+        total = getattr(obj, f'{nombre}_total', None)
+        if total is None:
+            total = getattr(obj, nombre).count()
+        return total
+
+    def siguiente_coleccion(self, obj, nombre):
+        """Enlace a la segunda página del sub-endpoint si la colección fue truncada"""
+        limite = limite_anidado(nombre)
+        if self.total_coleccion(obj, nombre) <= limite:
+            return None
+        _, url_name, parametro = self.get_colecciones()[nombre]
+        url = f"{reverse(url_name)}?{parametro}={obj.pk}&page=2&page_size={limite}"
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class EmpresaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializador para el modelo Empresa"""
     class Meta:
         model = Empresa
@@ -14,30 +150,63 @@ class EmpresaSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'fecha_creacion', 'fecha_actualizacion']
 
 
-class EmpresaDetailSerializer(EmpresaSerializer):
+class EmpresaDetailSerializer(ColeccionesAcotadasMixin, EmpresaSerializer):
     """Serializador detallado de Empresa con relaciones"""
     equipos = serializers.SerializerMethodField()
+    equipos_total = serializers.SerializerMethodField()
+    equipos_siguiente = serializers.SerializerMethodField()
     planes = serializers.SerializerMethodField()
+    planes_total = serializers.SerializerMethodField()
+    planes_siguiente = serializers.SerializerMethodField()
     ordenes = serializers.SerializerMethodField()
+    ordenes_total = serializers.SerializerMethodField()
+    ordenes_siguiente = serializers.SerializerMethodField()
     
     class Meta(EmpresaSerializer.Meta):
-        fields = EmpresaSerializer.Meta.fields + ['equipos', 'planes', 'ordenes']
+        fields = EmpresaSerializer.Meta.fields + [
+            'equipos', 'equipos_total', 'equipos_siguiente',
+            'planes', 'planes_total', 'planes_siguiente',
+            'ordenes', 'ordenes_total', 'ordenes_siguiente',
+        ]
+
+    def get_colecciones(self):
+        return {
+            'equipos': (EquipoSerializer, 'mantenimiento:equipo-por-empresa', 'empresa'),
+            'planes': (PlanSerializer, 'mantenimiento:plan-por-empresa', 'empresa'),
+            'ordenes': (OrdenListSerializer, 'mantenimiento:orden-por-empresa', 'empresa'),
+        }
     
     def get_equipos(self, obj):
-        equipos = obj.equipos.all()
-        return EquipoSerializer(equipos, many=True).data
+        return self.serializar_coleccion(obj, 'equipos')
+
+    def get_equipos_total(self, obj):
+        return self.total_coleccion(obj, 'equipos')
+
+    def get_equipos_siguiente(self, obj):
+        return self.siguiente_coleccion(obj, 'equipos')
     
     def get_planes(self, obj):
-        planes = obj.planes.all()
-        return PlanSerializer(planes, many=True).data
+        return self.serializar_coleccion(obj, 'planes')
+
+    def get_planes_total(self, obj):
+        return self.total_coleccion(obj, 'planes')
+
+    def get_planes_siguiente(self, obj):
+        return self.siguiente_coleccion(obj, 'planes')
     
     def get_ordenes(self, obj):
-        ordenes = obj.ordenes.all()[:10]  # Últimas 10 órdenes
-        return OrdenListSerializer(ordenes, many=True).data
+        return self.serializar_coleccion(obj, 'ordenes')
+
+    def get_ordenes_total(self, obj):
+        return self.total_coleccion(obj, 'ordenes')
 
+    def get_ordenes_siguiente(self, obj):
+        return self.siguiente_coleccion(obj, 'ordenes')
 
-class EquipoSerializer(serializers.ModelSerializer):
+
+class EquipoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializador para el modelo Equipo"""
+    campos_expandibles = {'empresa': (EmpresaSerializer, False)}
     empresa_nombre = serializers.CharField(source='empresa.nombre', read_only=True)
     estado_display = serializers.CharField(source='get_estado_display', read_only=True)
     
@@ -53,25 +222,49 @@ class EquipoSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'fecha_creacion', 'fecha_actualizacion']
 
 
-class EquipoDetailSerializer(EquipoSerializer):
+class EquipoDetailSerializer(ColeccionesAcotadasMixin, EquipoSerializer):
     """Serializador detallado de Equipo con relaciones"""
     planes = serializers.SerializerMethodField()
+    planes_total = serializers.SerializerMethodField()
+    planes_siguiente = serializers.SerializerMethodField()
     ordenes = serializers.SerializerMethodField()
+    ordenes_total = serializers.SerializerMethodField()
+    ordenes_siguiente = serializers.SerializerMethodField()
     
     class Meta(EquipoSerializer.Meta):
-        fields = EquipoSerializer.Meta.fields + ['planes', 'ordenes']
+        fields = EquipoSerializer.Meta.fields + [
+            'planes', 'planes_total', 'planes_siguiente',
+            'ordenes', 'ordenes_total', 'ordenes_siguiente',
+        ]
+
+    def get_colecciones(self):
+        return {
+            'planes': (PlanSerializer, 'mantenimiento:plan-por-equipo', 'equipo'),
+            'ordenes': (OrdenListSerializer, 'mantenimiento:orden-por-equipo', 'equipo'),
+        }
     
     def get_planes(self, obj):
-        planes = obj.planes.all()
-        return PlanSerializer(planes, many=True).data
+        return self.serializar_coleccion(obj, 'planes')
+
+    def get_planes_total(self, obj):
+        return self.total_coleccion(obj, 'planes')
+
+    def get_planes_siguiente(self, obj):
+        return self.siguiente_coleccion(obj, 'planes')
     
     def get_ordenes(self, obj):
-        ordenes = obj.ordenes.all()[:10]
-        return OrdenListSerializer(ordenes, many=True).data
+        return self.serializar_coleccion(obj, 'ordenes')
+
+    def get_ordenes_total(self, obj):
+        return self.total_coleccion(obj, 'ordenes')
 
+    def get_ordenes_siguiente(self, obj):
+        return self.siguiente_coleccion(obj, 'ordenes')
 
-class TecnicoSerializer(serializers.ModelSerializer):
+
+class TecnicoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializador para el modelo Técnico"""
+    campos_expandibles = {'empresas': (EmpresaSerializer, True)}
     especialidad_display = serializers.CharField(source='get_especialidad_display', read_only=True)
     nombre_completo = serializers.CharField(read_only=True)
     
@@ -86,21 +279,36 @@ class TecnicoSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'fecha_creacion', 'fecha_actualizacion', 'nombre_completo']
 
 
-class TecnicoDetailSerializer(TecnicoSerializer):
+class TecnicoDetailSerializer(ColeccionesAcotadasMixin, TecnicoSerializer):
     """Serializador detallado de Técnico con relaciones"""
     empresas = EmpresaSerializer(many=True, read_only=True)
     ordenes = serializers.SerializerMethodField()
+    ordenes_total = serializers.SerializerMethodField()
+    ordenes_siguiente = serializers.SerializerMethodField()
     
     class Meta(TecnicoSerializer.Meta):
-        fields = TecnicoSerializer.Meta.fields + ['empresas', 'ordenes']
+        fields = TecnicoSerializer.Meta.fields + [
+            'empresas', 'ordenes', 'ordenes_total', 'ordenes_siguiente',
+        ]
+
+    def get_colecciones(self):
+        return {
+            'ordenes': (OrdenListSerializer, 'mantenimiento:orden-por-tecnico', 'tecnico'),
+        }
     
     def get_ordenes(self, obj):
-        ordenes = obj.ordenes.all()[:10]
-        return OrdenListSerializer(ordenes, many=True).data
+        return self.serializar_coleccion(obj, 'ordenes')
 
+    def get_ordenes_total(self, obj):
+        return self.total_coleccion(obj, 'ordenes')
 
-class PlanSerializer(serializers.ModelSerializer):
+    def get_ordenes_siguiente(self, obj):
+        return self.siguiente_coleccion(obj, 'ordenes')
+
+
+class PlanSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializador para el modelo Plan"""
+    campos_expandibles = {'empresa': (EmpresaSerializer, False), 'equipo': (EquipoSerializer, False)}
     empresa_nombre = serializers.CharField(source='empresa.nombre', read_only=True)
     equipo_nombre = serializers.CharField(source='equipo.nombre', read_only=True)
     tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
@@ -119,21 +327,45 @@ class PlanSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'fecha_creacion', 'fecha_actualizacion']
 
 
-class PlanDetailSerializer(PlanSerializer):
+class PlanDetailSerializer(ColeccionesAcotadasMixin, PlanSerializer):
     """Serializador detallado de Plan con relaciones"""
     tecnicos_recomendados = TecnicoSerializer(many=True, read_only=True)
     ordenes = serializers.SerializerMethodField()
+    ordenes_total = serializers.SerializerMethodField()
+    ordenes_siguiente = serializers.SerializerMethodField()
     
     class Meta(PlanSerializer.Meta):
-        fields = PlanSerializer.Meta.fields + ['tecnicos_recomendados', 'ordenes']
+        fields = PlanSerializer.Meta.fields + [
+            'tecnicos_recomendados', 'ordenes', 'ordenes_total', 'ordenes_siguiente',
+        ]
+
+    def get_colecciones(self):
+        return {
+            'ordenes': (OrdenListSerializer, 'mantenimiento:orden-por-plan', 'plan'),
+        }
     
     def get_ordenes(self, obj):
-        ordenes = obj.ordenes.all()[:10]
-        return OrdenListSerializer(ordenes, many=True).data
+        return self.serializar_coleccion(obj, 'ordenes')
+
+    def get_ordenes_total(self, obj):
+        return self.total_coleccion(obj, 'ordenes')
+
+    def get_ordenes_siguiente(self, obj):
+        return self.siguiente_coleccion(obj, 'ordenes')
+
+
+# Relaciones de Orden que se pueden expandir con ?expand=
+EXPANDIBLES_ORDEN = {
+    'empresa': (EmpresaSerializer, False),
+    'equipo': (EquipoSerializer, False),
+    'plan': (PlanSerializer, False),
+    'tecnico_asignado': (TecnicoSerializer, False),
+}
 
 
-class OrdenListSerializer(serializers.ModelSerializer):
+class OrdenListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializador simplificado para Orden (usado en listas)"""
+    campos_expandibles = EXPANDIBLES_ORDEN
     empresa_nombre = serializers.CharField(source='empresa.nombre', read_only=True)
     equipo_nombre = serializers.CharField(source='equipo.nombre', read_only=True)
     tecnico_nombre = serializers.CharField(source='tecnico_asignado.nombre_completo', read_only=True)
@@ -151,8 +383,9 @@ class OrdenListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'numero_orden']
 
 
-class OrdenSerializer(serializers.ModelSerializer):
+class OrdenSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializador completo para Orden"""
+    campos_expandibles = EXPANDIBLES_ORDEN
     empresa_nombre = serializers.CharField(source='empresa.nombre', read_only=True)
     equipo_nombre = serializers.CharField(source='equipo.nombre', read_only=True)
     plan_nombre = serializers.CharField(source='plan.nombre', read_only=True, allow_null=True)
@@ -201,7 +434,7 @@ class OrdenCrearActualizarSerializer(serializers.ModelSerializer):
         equipo = data.get('equipo')
         
         # Verificar que el equipo pertenece a la empresa
-        if equipo and empresa and equipo.empresa != empresa:
+        if equipo and empresa and equipo.empresa_id != empresa.pk:
             raise serializers.ValidationError(
                 "El equipo seleccionado no pertenece a la empresa especificada."
             )
@@ -225,6 +458,73 @@ class OrdenCrearActualizarSerializer(serializers.ModelSerializer):
         return data
 
 
+class PrecargadoPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField que resuelve la clave contra las instancias
+    precargadas en ``context['precargados'][Modelo]`` en vez de consultar
+    la base de datos por cada fila.
+    """
+    def to_internal_value(self, data):
+        precargados = self.context.get('precargados', {}).get(self.get_queryset().model)
+        if precargados is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        instancia = precargados.get(pk)
+        if instancia is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instancia
+
+
+class OrdenCargaMasivaSerializer(OrdenCrearActualizarSerializer):
+    """Serializador para validar filas de la carga masiva de Órdenes"""
+    empresa = PrecargadoPrimaryKeyRelatedField(queryset=Empresa.objects.all())
+    equipo = PrecargadoPrimaryKeyRelatedField(queryset=Equipo.objects.all())
+    plan = PrecargadoPrimaryKeyRelatedField(
+        queryset=Plan.objects.all(), allow_null=True, required=False
+    )
+    tecnico_asignado = PrecargadoPrimaryKeyRelatedField(
+        queryset=Tecnico.objects.all(), allow_null=True, required=False
+    )
+
+
+class GenerarOrdenesSerializer(serializers.Serializer):
+    """Serializador para los parámetros de generación de órdenes desde planes"""
+    horizonte_dias = serializers.IntegerField(min_value=0, max_value=365, default=7)
+    empresa = serializers.PrimaryKeyRelatedField(queryset=Empresa.objects.all(), required=False)
+
+
+class AsignacionAutomaticaSerializer(serializers.Serializer):
+    """Serializador para los parámetros de asignación automática de técnicos"""
+    ordenes = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    empresa = serializers.PrimaryKeyRelatedField(queryset=Empresa.objects.all(), required=False)
+    simular = serializers.BooleanField(default=False)
+
+
+class TransicionMasivaSerializer(serializers.Serializer):
+    """Serializador para los parámetros de una transición de estado masiva"""
+    MAXIMO_ORDENES = 5000
+
+    accion = serializers.ChoiceField(choices=sorted(TRANSICIONES))
+    ordenes = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False, max_length=MAXIMO_ORDENES
+    )
+    empresa = serializers.PrimaryKeyRelatedField(queryset=Empresa.objects.all(), required=False)
+    equipo = serializers.PrimaryKeyRelatedField(queryset=Equipo.objects.all(), required=False)
+    tecnico_asignado = serializers.PrimaryKeyRelatedField(queryset=Tecnico.objects.all(), required=False)
+    estado = serializers.ChoiceField(choices=Orden.ESTADO_CHOICES, required=False)
+
+    def validate(self, data):
+        # Sin ids ni filtros la transición alcanzaría a todas las órdenes
+        if not any(campo in data for campo in ('ordenes', 'empresa', 'equipo', 'tecnico_asignado', 'estado')):
+            raise serializers.ValidationError('Indique ordenes o al menos un filtro')
+        return data
+
+
 class EstadisticasEmpresaSerializer(serializers.Serializer):
     """Serializador para estadísticas de empresa"""
     total_equipos = serializers.IntegerField()
@@ -237,6 +537,12 @@ class EstadisticasEmpresaSerializer(serializers.Serializer):
     horas_totales_trabajadas = serializers.DecimalField(max_digits=10, decimal_places=2)
 
 
+class EstadisticasEmpresaMultipleSerializer(EstadisticasEmpresaSerializer):
+    """Serializador para estadísticas de varias empresas"""
+    empresa = serializers.IntegerField(source='pk')
+    nombre = serializers.CharField()
+
+
 class EstadisticasEquipoSerializer(serializers.Serializer):
     """Serializador para estadísticas de equipo"""
     nombre_equipo = serializers.CharField()
@@ -244,5 +550,123 @@ class EstadisticasEquipoSerializer(serializers.Serializer):
     ordenes_completadas = serializers.IntegerField()
     dias_sin_mantenimiento = serializers.IntegerField()
     proxima_mantencion = serializers.DateField()
-    costo_total_mantenimiento = serializers.DecimalField(max_digits=12, decimal_places=2)
-    horas_totales_trabajadas = serializers.DecimalField(max_digits=10, decimal_places=2)
+    costo_total_mantenimiento = serializers.DecimalField(max_digits=14, decimal_places=2)
+    horas_totales_trabajadas = serializers.DecimalField(max_digits=12, decimal_places=2)
+    fecha_ultima_completada = serializers.DateTimeField(allow_null=True)
+
+
+class DashboardParametrosSerializer(serializers.Serializer):
+    """Serializador para los parámetros del panel de operaciones"""
+    dias = serializers.IntegerField(min_value=0, max_value=365, default=30)
+    limite = serializers.IntegerField(min_value=1, max_value=50, default=5)
+
+
+class DashboardPlanSerializer(serializers.Serializer):
+    """Serializador para un próximo mantenimiento del panel"""
+    plan = serializers.IntegerField()
+    nombre = serializers.CharField()
+    tipo = serializers.CharField()
+    equipo = serializers.IntegerField()
+    equipo_nombre = serializers.CharField()
+    fecha = serializers.DateField()
+
+
+class DashboardProximosSerializer(serializers.Serializer):
+    """Serializador para los próximos mantenimientos de una empresa en el panel"""
+    total = serializers.IntegerField()
+    planes = DashboardPlanSerializer(many=True)
+
+
+class DashboardEquiposSerializer(serializers.Serializer):
+    """Serializador para los equipos de una empresa por estado"""
+    total = serializers.IntegerField()
+    por_estado = serializers.DictField(child=serializers.IntegerField())
+
+
+class DashboardOrdenesSerializer(serializers.Serializer):
+    """Serializador para las órdenes abiertas de una empresa"""
+    abiertas = serializers.IntegerField()
+    vencidas = serializers.IntegerField()
+    urgentes = serializers.IntegerField()
+
+
+class DashboardMesSerializer(serializers.Serializer):
+    """Serializador para las órdenes completadas en el mes en curso"""
+    ordenes_completadas = serializers.IntegerField()
+    costo = serializers.DecimalField(max_digits=14, decimal_places=2)
+    horas = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class DashboardEmpresaSerializer(serializers.Serializer):
+    """Serializador para los datos de una empresa en el panel de operaciones"""
+    empresa = serializers.IntegerField()
+    nombre = serializers.CharField()
+    equipos = DashboardEquiposSerializer()
+    ordenes = DashboardOrdenesSerializer()
+    mes = DashboardMesSerializer()
+    proximos_mantenimientos = DashboardProximosSerializer()
+
+
+class DashboardSerializer(serializers.Serializer):
+    """Serializador para el panel de operaciones de todas las empresas activas"""
+    generado = serializers.DateTimeField()
+    inicio_mes = serializers.DateTimeField()
+    dias = serializers.IntegerField()
+    empresas = DashboardEmpresaSerializer(many=True)
+
+
+class ConfiabilidadVentanasSerializer(serializers.Serializer):
+    """Serializador para las ventanas y la fecha de corte de los indicadores de confiabilidad"""
+    ventanas = serializers.CharField(default='30,90,365')
+    hasta = serializers.DateTimeField(required=False)
+
+    def validate_ventanas(self, value):
+        try:
+            ventanas = sorted({int(dias) for dias in value.split(',') if dias.strip()})
+        except ValueError:
+            raise serializers.ValidationError('Las ventanas deben ser números de días separados por coma')
+        if not ventanas or len(ventanas) > 5:
+            raise serializers.ValidationError('Indique entre 1 y 5 ventanas')
+        if ventanas[0] < 1 or ventanas[-1] > 3650:
+            raise serializers.ValidationError('Las ventanas deben estar entre 1 y 3650 días')
+        return ventanas
+
+
+class ConfiabilidadParametrosSerializer(ConfiabilidadVentanasSerializer):
+    """Serializador para los parámetros de los indicadores de confiabilidad de la flota"""
+    agrupar = serializers.ChoiceField(choices=['empresa', 'tipo', 'equipo'], default='empresa')
+    empresa = serializers.IntegerField(required=False)
+
+
+class ConfiabilidadVentanaSerializer(serializers.Serializer):
+    """Serializador para los indicadores de confiabilidad de una ventana"""
+    dias = serializers.IntegerField()
+    fallas = serializers.IntegerField()
+    reparaciones = serializers.IntegerField()
+    horas_operacion = serializers.FloatField()
+    horas_detencion = serializers.FloatField()
+    mtbf_horas = serializers.FloatField(allow_null=True)
+    mttr_horas = serializers.FloatField(allow_null=True)
+    disponibilidad = serializers.FloatField(allow_null=True)
+    tasa_fallas = serializers.FloatField(allow_null=True)
+
+
+class ConfiabilidadGrupoSerializer(serializers.Serializer):
+    """Serializador para los indicadores de confiabilidad de un grupo de equipos"""
+    grupo = serializers.ReadOnlyField()
+    ventanas = ConfiabilidadVentanaSerializer(many=True)
+
+
+class ConfiabilidadEquipoSerializer(serializers.Serializer):
+    """Serializador para los indicadores de confiabilidad de un equipo"""
+    equipo = serializers.IntegerField()
+    hasta = serializers.DateTimeField()
+    ventanas = ConfiabilidadVentanaSerializer(many=True)
+
+
+class ConfiabilidadFlotaSerializer(serializers.Serializer):
+    """Serializador para los indicadores de confiabilidad de la flota"""
+    hasta = serializers.DateTimeField()
+    agrupar = serializers.CharField()
+    flota = ConfiabilidadVentanaSerializer(many=True)
+    grupos = ConfiabilidadGrupoSerializer(many=True)
@@ -0,0 +1,77 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import busqueda, cache_respuestas, pronostico, rollups
+from .models import Empresa, Equipo, Tecnico, Plan, Orden
+
+MODELOS_BUSCABLES = (Empresa, Equipo, Tecnico, Plan, Orden)
+MODELOS_CACHEADOS = (Empresa, Equipo, Tecnico, Plan, Orden)
+
+
+def invalidar_cache(sender, instance, raw=False, **kwargs):
+    """Invalidar las respuestas cacheadas que dependen del objeto"""
+    if raw:
+        return
+    cache_respuestas.invalidar(cache_respuestas.etiquetas_instancia(instance))
+
+
+def invalidar_cache_m2m(sender, instance, action, model, pk_set, **kwargs):
+    """Invalidar las respuestas de ambos lados al cambiar una relación muchos a muchos"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    relacionado = model._meta.model_name
+    etiquetas = cache_respuestas.etiquetas_instancia(instance) | {relacionado}
+    etiquetas |= {f'{relacionado}:{pk}' for pk in pk_set or ()}
+    cache_respuestas.invalidar(etiquetas)
+
+
+# Se conectan antes que los resúmenes, que reemplazan los valores cargados
+for modelo in MODELOS_CACHEADOS:
+    post_save.connect(invalidar_cache, sender=modelo, dispatch_uid=f'cache_guardar_{modelo.__name__}')
+    post_delete.connect(invalidar_cache, sender=modelo, dispatch_uid=f'cache_eliminar_{modelo.__name__}')
+
+# add(), remove() y clear() no llaman a save() en ninguno de los dos objetos
+for relacion in (Tecnico.empresas, Plan.tecnicos_recomendados):
+    m2m_changed.connect(invalidar_cache_m2m, sender=relacion.through,
+                        dispatch_uid=f'cache_m2m_{relacion.through.__name__}')
+
+
+@receiver(post_save, sender=Orden)
+def actualizar_pronostico_orden(sender, instance, created, raw=False, **kwargs):
+    """Recalcular los planes predictivos del equipo al completarse una falla o una ejecución predictiva"""
+    if raw or not pronostico.automatico():
+        return
+    # Se conecta antes que los resúmenes, que reemplazan el estado cargado
+    pronostico.registrar_guardado(instance, created)
+
+
+@receiver(post_save, sender=Orden)
+def actualizar_rollup_orden(sender, instance, created, raw=False, **kwargs):
+    """Mantener el resumen del equipo al crear o modificar una orden"""
+    if raw:
+        return
+    rollups.registrar_guardado(instance, created)
+
+
+@receiver(post_delete, sender=Orden)
+def descontar_rollup_orden(sender, instance, **kwargs):
+    """Descontar la orden eliminada del resumen de su equipo"""
+    rollups.registrar_eliminacion(instance)
+
+
+def indexar_busqueda(sender, instance, raw=False, **kwargs):
+    """Mantener el documento de búsqueda al crear o modificar un objeto"""
+    if raw or not busqueda.disponible():
+        return
+    busqueda.indexar_objeto(instance)
+
+
+def eliminar_busqueda(sender, instance, **kwargs):
+    """Eliminar el documento de búsqueda de un objeto eliminado"""
+    if busqueda.disponible():
+        busqueda.eliminar(sender, [instance.pk])
+
+
+for modelo in MODELOS_BUSCABLES:
+    post_save.connect(indexar_busqueda, sender=modelo, dispatch_uid=f'busqueda_guardar_{modelo.__name__}')
+    post_delete.connect(eliminar_busqueda, sender=modelo, dispatch_uid=f'busqueda_eliminar_{modelo.__name__}')
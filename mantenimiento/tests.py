@@ -1,3 +1,2199 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import io
+import json
+import random
+import re
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, F, Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import (
+    asignacion, benchmark, busqueda, cache_respuestas, carga_masiva, confiabilidad, datos_sinteticos, metricas,
+    programador, pronostico, rollups, transiciones
+)
+from .consultas import planificar_consulta
+from .filters import BusquedaTextoFilter
+from .models import (
+    DocumentoBusqueda, Empresa, Equipo, EquipoEstadistica, Tecnico, Plan, Orden, SecuenciaOrden
+)
+from .secuencias import formatear_numero, reservar_numeros, reservar_numeros_orden
+from .serializers import LIMITES_ANIDADOS, OrdenListSerializer, TransicionMasivaSerializer, limite_anidado
+
+
+def crear_empresa(nombre='Empresa Test', rut='11111111-1', **kwargs):
+    return Empresa.objects.create(nombre=nombre, rut=rut, **kwargs)
+
+
+def crear_equipo(empresa, codigo='EQ-001', **kwargs):
+    kwargs.setdefault('nombre', f'Equipo {codigo}')
+    kwargs.setdefault('tipo', 'Bomba')
+    return Equipo.objects.create(empresa=empresa, codigo=codigo, **kwargs)
+
+
+def crear_orden(empresa, equipo, **kwargs):
+    kwargs.setdefault('descripcion', 'Revisión general')
+    kwargs.setdefault('fecha_programada', timezone.now() + timedelta(days=1))
+    return Orden.objects.create(empresa=empresa, equipo=equipo, **kwargs)
+
+
+class SecuenciaOrdenTests(TestCase):
+    def setUp(self):
+        self.empresa = crear_empresa()
+        self.equipo = crear_equipo(self.empresa)
+
+    def test_numero_orden_correlativo(self):
+        anio = timezone.now().year
+        primera = crear_orden(self.empresa, self.equipo)
+        segunda = crear_orden(self.empresa, self.equipo)
+        self.assertEqual(primera.numero_orden, formatear_numero(anio, 1))
+        self.assertEqual(segunda.numero_orden, formatear_numero(anio, 2))
+
+    def test_numero_orden_no_consulta_ultima_orden(self):
+        crear_orden(self.empresa, self.equipo)
+        orden = Orden(
+            empresa=self.empresa, equipo=self.equipo, descripcion='x',
+            fecha_programada=timezone.now()
+        )
+        with CaptureQueriesContext(connection) as consultas:
+            orden.save()
+        lecturas_orden = [
+            q['sql'] for q in consultas.captured_queries
+            if q['sql'].startswith('SELECT') and 'mantenimiento_orden' in q['sql']
+        ]
+        self.assertEqual(lecturas_orden, [])
+
+    def test_contador_por_anio(self):
+        self.assertEqual(list(reservar_numeros(3, anio=2030)), [1, 2, 3])
+        self.assertEqual(list(reservar_numeros(1, anio=2031)), [1])
+        self.assertEqual(list(reservar_numeros(2, anio=2030)), [4, 5])
+
+    def test_reserva_de_bloque(self):
+        numeros = reservar_numeros_orden(3, anio=2030)
+        self.assertEqual(numeros, ['ORD-2030-00001', 'ORD-2030-00002', 'ORD-2030-00003'])
+        self.assertEqual(SecuenciaOrden.objects.get(anio=2030).ultimo_numero, 3)
+
+    def test_cantidad_invalida(self):
+        with self.assertRaises(ValueError):
+            reservar_numeros(0)
+
+
+class SecuenciaOrdenConcurrenciaTests(TransactionTestCase):
+    HILOS = 8
+    RESERVAS_POR_HILO = 25
+
+    def test_sin_duplicados_con_escritores_concurrentes(self):
+        resultados = []
+        errores = []
+        barrera = threading.Barrier(self.HILOS)
+
+        def trabajador(indice):
+            try:
+                barrera.wait()
+                for i in range(self.RESERVAS_POR_HILO):
+                    resultados.extend(reservar_numeros(1 + (indice + i) % 3, anio=2040))
+            except Exception as exc:  # pragma: no cover - se reporta abajo
+                errores.append(exc)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=trabajador, args=(i,)) for i in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        self.assertEqual(len(resultados), len(set(resultados)))
+        self.assertEqual(sorted(resultados), list(range(1, len(resultados) + 1)))
+
+
+class CargaMasivaOrdenesTests(TestCase):
+    url = '/api/ordenes/bulk/'
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('supervisor', password='clave')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.empresa = crear_empresa()
+        self.otra_empresa = crear_empresa(nombre='Otra', rut='22222222-2')
+        self.equipo = crear_equipo(self.empresa)
+
+    def fila(self, **kwargs):
+        fila = {
+            'empresa': self.empresa.pk,
+            'equipo': self.equipo.pk,
+            'descripcion': 'Cambio de rodamientos',
+            'fecha_programada': '2030-01-15T08:00:00Z',
+        }
+        fila.update(kwargs)
+        return fila
+
+    def test_carga_arreglo_json(self):
+        def consultas_para(cantidad):
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = self.client.post(self.url, [self.fila() for _ in range(cantidad)], format='json')
+            self.assertEqual(respuesta.status_code, 201)
+            self.assertEqual(respuesta.data['creadas'], cantidad)
+            return [q['sql'] for q in consultas.captured_queries]
+
+        consultas_para(1)  # crea el contador del año
+        pocas, muchas = consultas_para(2), consultas_para(30)
+        # La cantidad de consultas no depende del número de filas
+        self.assertEqual(len(pocas), len(muchas))
+        self.assertEqual(sum(1 for sql in muchas if sql.startswith('INSERT INTO "mantenimiento_orden"')), 1)
+        numeros = Orden.objects.values_list('numero_orden', flat=True)
+        self.assertEqual(len(set(numeros)), 33)
+
+    def test_carga_ndjson(self):
+        cuerpo = '\n'.join(json.dumps(self.fila()) for _ in range(3))
+        respuesta = self.client.post(self.url, cuerpo, content_type='application/x-ndjson')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(Orden.objects.count(), 3)
+
+    def test_modo_parcial_reporta_errores_por_fila(self):
+        filas = [self.fila(), self.fila(empresa=self.otra_empresa.pk), self.fila(equipo=9999)]
+        respuesta = self.client.post(self.url, filas, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.data['creadas'], 1)
+        self.assertEqual([r['indice'] for r in respuesta.data['resultados']], [0, 1, 2])
+        self.assertIn('id', respuesta.data['resultados'][0])
+        self.assertIn('non_field_errors', respuesta.data['resultados'][1]['errores'])
+        self.assertIn('equipo', respuesta.data['resultados'][2]['errores'])
+
+    def test_modo_atomico_no_inserta_si_hay_errores(self):
+        filas = [self.fila(), self.fila(descripcion='')]
+        respuesta = self.client.post(f'{self.url}?modo=atomico', filas, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.data['errores'], 1)
+        self.assertFalse(Orden.objects.exists())
+
+    def test_rechaza_cuerpo_que_no_es_arreglo(self):
+        respuesta = self.client.post(self.url, self.fila(), format='json')
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class EstadisticasEmpresaTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.empresa = crear_empresa()
+        self.otra_empresa = crear_empresa(nombre='Otra', rut='22222222-2')
+        equipo = crear_equipo(self.empresa)
+        crear_equipo(self.empresa, codigo='EQ-002')
+        Plan.objects.create(
+            empresa=self.empresa, equipo=equipo, nombre='Plan mensual',
+            frecuencia='mensual', tareas='Lubricar', fecha_inicio=timezone.now().date()
+        )
+        crear_orden(self.empresa, equipo, estado='programada')
+        crear_orden(self.empresa, equipo, estado='en_progreso', horas_trabajadas=Decimal('1.50'))
+        crear_orden(self.empresa, equipo, estado='completada',
+                    costo_real=Decimal('1000.00'), horas_trabajadas=Decimal('2.25'))
+
+    def test_estadisticas_en_una_consulta(self):
+        with self.assertNumQueries(1):
+            respuesta = self.client.get(f'/api/empresas/{self.empresa.pk}/estadisticas/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data, {
+            'total_equipos': 2,
+            'total_planes': 1,
+            'total_ordenes': 3,
+            'ordenes_pendientes': 1,
+            'ordenes_en_progreso': 1,
+            'ordenes_completadas': 1,
+            'costo_total_ordenes': '1000.00',
+            'horas_totales_trabajadas': '3.75',
+        })
+
+    def test_estadisticas_empresa_sin_datos(self):
+        respuesta = self.client.get(f'/api/empresas/{self.otra_empresa.pk}/estadisticas/')
+        self.assertEqual(respuesta.data['total_equipos'], 0)
+        self.assertEqual(respuesta.data['costo_total_ordenes'], '0.00')
+
+    def test_estadisticas_multiples(self):
+        with self.assertNumQueries(1):
+            respuesta = self.client.get(
+                f'/api/empresas/estadisticas/?ids={self.empresa.pk},{self.otra_empresa.pk}'
+            )
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([fila['empresa'] for fila in respuesta.data],
+                         [self.empresa.pk, self.otra_empresa.pk])
+        self.assertEqual(respuesta.data[0]['total_ordenes'], 3)
+        self.assertEqual(respuesta.data[1]['total_ordenes'], 0)
+
+    def test_estadisticas_multiples_requiere_ids(self):
+        self.assertEqual(self.client.get('/api/empresas/estadisticas/').status_code, 400)
+        self.assertEqual(self.client.get('/api/empresas/estadisticas/?ids=a').status_code, 400)
+
+
+class EquipoEstadisticaTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.empresa = crear_empresa()
+        self.equipos = [crear_equipo(self.empresa, codigo=f'EQ-{i}') for i in range(3)]
+
+    def assertResumenesCoinciden(self):
+        esperados = {
+            r.equipo_id: r for r in rollups.calcular_resumenes(Equipo.objects.all())
+        }
+        for equipo in self.equipos:
+            esperado = esperados[equipo.pk]
+            actual = EquipoEstadistica.objects.filter(equipo=equipo).first()
+            if actual is None:
+                # Sin resumen equivale a no tener órdenes
+                self.assertEqual(esperado.total_ordenes, 0)
+                continue
+            for campo in ('total_ordenes', 'ordenes_completadas', 'costo_total',
+                          'horas_totales', 'fecha_ultima_completada'):
+                self.assertEqual(getattr(actual, campo), getattr(esperado, campo),
+                                 f'{campo} del equipo {equipo.pk}')
+
+    def test_resumen_coincide_tras_mutaciones_aleatorias(self):
+        azar = random.Random(20251210)
+        estados = [codigo for codigo, _ in Orden.ESTADO_CHOICES]
+        base = timezone.now()
+        ordenes = []
+
+        for paso in range(300):
+            operacion = azar.choice(['crear', 'crear', 'estado', 'valores', 'mover', 'eliminar', 'recargar'])
+            if operacion == 'crear' or not ordenes:
+                equipo = azar.choice(self.equipos)
+                ordenes.append(crear_orden(
+                    self.empresa, equipo, estado=azar.choice(estados),
+                    costo_real=azar.choice([None, Decimal(azar.randint(0, 50000)) / 100]),
+                    horas_trabajadas=azar.choice([None, Decimal(azar.randint(0, 800)) / 100]),
+                    fecha_termino=base - timedelta(hours=azar.randint(0, 1000)),
+                ))
+                continue
+
+            orden = azar.choice(ordenes)
+            if operacion == 'estado':
+                orden.estado = azar.choice(estados)
+                orden.fecha_termino = base - timedelta(hours=azar.randint(0, 1000))
+                orden.save()
+            elif operacion == 'valores':
+                orden.costo_real = azar.choice([None, Decimal(azar.randint(0, 50000)) / 100])
+                orden.horas_trabajadas = azar.choice([None, Decimal(azar.randint(0, 800)) / 100])
+                orden.save()
+            elif operacion == 'mover':
+                orden.equipo = azar.choice(self.equipos)
+                orden.save()
+            elif operacion == 'eliminar':
+                ordenes.remove(orden)
+                orden.delete()
+            else:
+                indice = ordenes.index(orden)
+                ordenes[indice] = Orden.objects.get(pk=orden.pk)
+
+            if paso % 50 == 0:
+                self.assertResumenesCoinciden()
+
+        self.assertResumenesCoinciden()
+
+    def test_reconstruir_por_lotes(self):
+        for equipo in self.equipos:
+            crear_orden(self.empresa, equipo, estado='completada', costo_real=Decimal('10.00'))
+        EquipoEstadistica.objects.all().delete()
+        call_command('rebuild_rollups', chunk_size=2, stdout=StringIO())
+        self.assertEqual(EquipoEstadistica.objects.count(), 3)
+        self.assertResumenesCoinciden()
+
+    def test_carga_masiva_actualiza_resumen(self):
+        usuario = User.objects.create_user('supervisor', password='clave')
+        self.client.force_authenticate(usuario)
+        fila = {'empresa': self.empresa.pk, 'equipo': self.equipos[0].pk,
+                'descripcion': 'x', 'fecha_programada': '2030-01-01T00:00:00Z'}
+        self.client.post('/api/ordenes/bulk/', [fila, fila], format='json')
+        self.assertEqual(self.equipos[0].estadistica.total_ordenes, 2)
+
+    def test_endpoint_lee_desde_resumen(self):
+        equipo = self.equipos[0]
+        termino = timezone.now()
+        crear_orden(self.empresa, equipo, estado='completada', fecha_termino=termino,
+                    costo_real=Decimal('150.50'), horas_trabajadas=Decimal('3.00'))
+        crear_orden(self.empresa, equipo)
+        with self.assertNumQueries(1):
+            respuesta = self.client.get(f'/api/equipos/{equipo.pk}/estadisticas/')
+        self.assertEqual(respuesta.data['total_ordenes'], 2)
+        self.assertEqual(respuesta.data['ordenes_completadas'], 1)
+        self.assertEqual(respuesta.data['costo_total_mantenimiento'], '150.50')
+        self.assertEqual(respuesta.data['horas_totales_trabajadas'], '3.00')
+        self.assertIsNotNone(respuesta.data['fecha_ultima_completada'])
+
+    def test_endpoint_equipo_sin_ordenes(self):
+        respuesta = self.client.get(f'/api/equipos/{self.equipos[1].pk}/estadisticas/')
+        self.assertEqual(respuesta.data['total_ordenes'], 0)
+        self.assertEqual(respuesta.data['costo_total_mantenimiento'], '0.00')
+
+
+class DatosListadosMixin:
+    """Datos y utilidades compartidas por las pruebas de consultas de los listados"""
+
+    def setUp(self):
+        # Las consultas se cuentan sin respuestas cacheadas de otras pruebas
+        cache_respuestas.obtener_cache().clear()
+        self.client = APIClient()
+        self.empresa = crear_empresa()
+
+    def poblar(self, cantidad):
+        for i in range(cantidad):
+            equipo = crear_equipo(self.empresa, codigo=f'EQ-{cantidad}-{i}')
+            tecnico = Tecnico.objects.create(
+                nombre='Ana', apellido=f'Rojas {i}', rut=f'{cantidad}-{i}',
+                email=f't{cantidad}-{i}@example.com', telefono='1', especialidad='mecanico'
+            )
+            tecnico.empresas.add(self.empresa)
+            plan = Plan.objects.create(
+                empresa=self.empresa, equipo=equipo, nombre='Plan', frecuencia='mensual',
+                tareas='Revisar', fecha_inicio=timezone.now().date(),
+                fecha_proximo_mantenimiento=timezone.now().date() + timedelta(days=2),
+            )
+            plan.tecnicos_recomendados.add(tecnico)
+            crear_orden(self.empresa, equipo, plan=plan, tecnico_asignado=tecnico,
+                        prioridad='urgente', fecha_programada=timezone.now() - timedelta(days=1))
+
+    def contar_consultas(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200, url)
+        return len(consultas.captured_queries)
+
+    def urls_listado(self):
+        return [
+            '/api/empresas/', '/api/empresas/activas/',
+            '/api/equipos/', '/api/equipos/operativos/',
+            f'/api/equipos/por_empresa/?empresa={self.empresa.pk}',
+            '/api/tecnicos/', '/api/tecnicos/disponibles/',
+            f'/api/tecnicos/por_empresa/?empresa={self.empresa.pk}',
+            '/api/tecnicos/por_especialidad/?especialidad=mecanico',
+            '/api/planes/', '/api/planes/activos/', '/api/planes/proximos_vencimientos/',
+            f'/api/planes/por_empresa/?empresa={self.empresa.pk}',
+            '/api/ordenes/', '/api/ordenes/pendientes/', '/api/ordenes/urgentes/',
+            '/api/ordenes/vencidas/', '/api/ordenes/?paginacion=cursor',
+            f'/api/ordenes/por_empresa/?empresa={self.empresa.pk}',
+        ]
+
+
+class ConsultaPlanificadaTests(DatosListadosMixin, TestCase):
+    def test_listas_con_consultas_constantes(self):
+        urls = self.urls_listado()
+        self.poblar(2)
+        pocas = {url: self.contar_consultas(url) for url in urls}
+        self.poblar(8)
+        muchas = {url: self.contar_consultas(url) for url in urls}
+        self.assertEqual(pocas, muchas)
+
+    def test_lista_de_ordenes_usa_joins(self):
+        self.poblar(5)
+        # Validadores (ETag) + COUNT de la paginación + SELECT con los JOIN de empresa, equipo y técnico
+        with self.assertNumQueries(3):
+            respuesta = self.client.get('/api/ordenes/')
+        self.assertEqual(respuesta.data['results'][0]['tecnico_nombre'][:3], 'Ana')
+
+    def test_detalle_con_relaciones_anidadas(self):
+        self.poblar(3)
+        orden = Orden.objects.first()
+        # Validadores (ETag) + SELECT con los JOIN
+        with self.assertNumQueries(2):
+            respuesta = self.client.get(f'/api/ordenes/{orden.pk}/')
+        self.assertEqual(respuesta.data['equipo']['empresa_nombre'], self.empresa.nombre)
+
+    def test_plan_incluye_columnas_requeridas(self):
+        serializer = OrdenListSerializer()
+        queryset = planificar_consulta(Orden.objects.all(), serializer)
+        sql = str(queryset.query)
+        self.assertNotIn('"mantenimiento_orden"."descripcion"', sql)
+        self.assertIn('"mantenimiento_empresa"."nombre"', sql)
+
+
+class CamposDinamicosTests(DatosListadosMixin, TestCase):
+    def consultar(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200, url)
+        # Se omiten los validadores (ETag) y el COUNT de la paginación
+        lecturas = [
+            q['sql'] for q in consultas.captured_queries
+            if 'COUNT(*)' not in q['sql'] and not re.search(r' AS "_(?!prefetch)', q['sql'])
+        ]
+        return respuesta.data, lecturas
+
+    def test_fields_reduce_respuesta_y_columnas(self):
+        self.poblar(3)
+        datos, sql = self.consultar('/api/ordenes/?fields=id,numero_orden,estado,fecha_programada')
+        self.assertEqual(list(datos['results'][0]), ['id', 'numero_orden', 'estado', 'fecha_programada'])
+        self.assertEqual(len(sql), 1)
+        self.assertNotIn('JOIN', sql[0])
+        self.assertNotIn('"descripcion"', sql[0])
+
+        # Solo se une la relación que se muestra
+        datos, sql = self.consultar('/api/ordenes/?fields=id,equipo_nombre,desconocido')
+        self.assertEqual(list(datos['results'][0]), ['id', 'equipo_nombre'])
+        self.assertIn('"mantenimiento_equipo"', sql[0])
+        self.assertNotIn('"mantenimiento_empresa"', sql[0])
+        self.assertNotIn('"mantenimiento_tecnico"', sql[0])
+
+    def test_expand(self):
+        self.poblar(2)
+        datos, sql = self.consultar('/api/ordenes/?expand=equipo,plan&fields=id,equipo,plan,empresa')
+        orden = datos['results'][0]
+        self.assertEqual(orden['equipo']['empresa_nombre'], self.empresa.nombre)
+        self.assertEqual(orden['plan']['nombre'], 'Plan')
+        self.assertEqual(orden['empresa'], self.empresa.pk)
+        self.assertEqual(len(sql), 1)
+
+        datos, sql = self.consultar('/api/tecnicos/?expand=empresas&fields=id,empresas')
+        self.assertEqual(datos['results'][0]['empresas'][0]['nombre'], self.empresa.nombre)
+        # Página + prefetch de las empresas
+        self.assertEqual(len(sql), 2)
+
+    def test_detalle_omite_colecciones_no_solicitadas(self):
+        self.poblar(2)
+        datos, sql = self.consultar(f'/api/empresas/{self.empresa.pk}/?fields=id,nombre,equipos_total')
+        self.assertEqual(datos, {'id': self.empresa.pk, 'nombre': self.empresa.nombre, 'equipos_total': 2})
+        self.assertEqual(len(sql), 1)
+
+        # Las colecciones anidadas no heredan ?fields=
+        datos, _ = self.consultar(f'/api/empresas/{self.empresa.pk}/?fields=id,equipos')
+        self.assertIn('codigo', datos['equipos'][0])
+
+    def test_no_aplica_a_escrituras(self):
+        self.client.force_authenticate(User.objects.create_user('supervisor', password='clave'))
+        respuesta = self.client.post(
+            '/api/empresas/?fields=id', {'nombre': 'Nueva', 'rut': '33333333-3'}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.data['nombre'], 'Nueva')
+
+
+@override_settings(MANTENIMIENTO_LIMITES_ANIDADOS={'equipos': 3, 'planes': 3, 'ordenes': 3})
+class ColeccionesAnidadasTests(DatosListadosMixin, TestCase):
+    def test_detalles_con_consultas_constantes(self):
+        def consultas_detalle():
+            tecnico = Tecnico.objects.order_by('pk').first()
+            plan = Plan.objects.order_by('pk').first()
+            equipo = plan.equipo
+            Orden.objects.filter(tecnico_asignado__isnull=False).update(
+                tecnico_asignado=tecnico, plan=plan, equipo=equipo
+            )
+            return {
+                url: self.contar_consultas(url) for url in [
+                    f'/api/empresas/{self.empresa.pk}/',
+                    f'/api/equipos/{equipo.pk}/',
+                    f'/api/tecnicos/{tecnico.pk}/',
+                    f'/api/planes/{plan.pk}/',
+                ]
+            }
+
+        self.poblar(2)
+        pocas = consultas_detalle()
+        self.poblar(10)
+        self.assertEqual(pocas, consultas_detalle())
+
+    def test_limites_parciales_conservan_los_valores_por_defecto(self):
+        with override_settings(MANTENIMIENTO_LIMITES_ANIDADOS={'ordenes': 20}):
+            self.assertEqual(limite_anidado('ordenes'), 20)
+            self.assertEqual(limite_anidado('equipos'), LIMITES_ANIDADOS['equipos'])
+
+    def test_colecciones_acotadas_con_enlace_siguiente(self):
+        self.poblar(5)
+        respuesta = self.client.get(f'/api/empresas/{self.empresa.pk}/')
+        self.assertEqual(len(respuesta.data['equipos']), 3)
+        self.assertEqual(respuesta.data['equipos_total'], 5)
+        self.assertTrue(respuesta.data['equipos_siguiente'].endswith(
+            f'/api/equipos/por_empresa/?empresa={self.empresa.pk}&page=2&page_size=3'
+        ))
+
+        siguiente = self.client.get(respuesta.data['equipos_siguiente'])
+        nombres_detalle = [e['nombre'] for e in respuesta.data['equipos']]
+        nombres_siguiente = [e['nombre'] for e in siguiente.data['results']]
+        self.assertEqual(len(nombres_siguiente), 2)
+        self.assertFalse(set(nombres_detalle) & set(nombres_siguiente))
+
+    def test_sin_enlace_si_la_coleccion_esta_completa(self):
+        self.poblar(2)
+        equipo = Equipo.objects.first()
+        respuesta = self.client.get(f'/api/equipos/{equipo.pk}/')
+        self.assertEqual(respuesta.data['ordenes_total'], 1)
+        self.assertIsNone(respuesta.data['ordenes_siguiente'])
+
+    def test_sub_endpoints_por_relacion(self):
+        self.poblar(2)
+        orden = Orden.objects.first()
+        for url in [f'/api/planes/por_empresa/?empresa={self.empresa.pk}',
+                    f'/api/ordenes/por_empresa/?empresa={self.empresa.pk}',
+                    f'/api/ordenes/por_equipo/?equipo={orden.equipo_id}',
+                    f'/api/ordenes/por_plan/?plan={orden.plan_id}']:
+            respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200, url)
+            self.assertGreaterEqual(respuesta.data['count'], 1, url)
+        self.assertEqual(self.client.get('/api/ordenes/por_plan/').status_code, 400)
+
+
+class PaginacionCursorTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        empresa = crear_empresa()
+        equipo = crear_equipo(empresa)
+        base = timezone.now()
+        # Fechas repetidas para verificar el desempate por id
+        self.ordenes = [
+            crear_orden(empresa, equipo, fecha_programada=base - timedelta(days=i // 2))
+            for i in range(7)
+        ]
+        self.esperados = [
+            o.pk for o in sorted(self.ordenes, key=lambda o: (o.fecha_programada, o.pk), reverse=True)
+        ]
+
+    def test_recorre_todas_las_paginas_hacia_adelante_y_atras(self):
+        url = '/api/ordenes/?paginacion=cursor&page_size=3'
+        paginas = []
+        while url:
+            # Validadores (ETag) + página, sin COUNT de la paginación
+            with self.assertNumQueries(2):
+                respuesta = self.client.get(url)
+            self.assertNotIn('count', respuesta.data)
+            paginas.append([fila['id'] for fila in respuesta.data['results']])
+            ultima = respuesta.data
+            url = respuesta.data['next']
+        self.assertEqual([pk for pagina in paginas for pk in pagina], self.esperados)
+        self.assertEqual(len(paginas), 3)
+
+        anterior = self.client.get(ultima['previous'])
+        self.assertEqual([fila['id'] for fila in anterior.data['results']], paginas[1])
+        primera = self.client.get(anterior.data['previous'])
+        self.assertEqual([fila['id'] for fila in primera.data['results']], paginas[0])
+        self.assertIsNone(primera.data['previous'])
+
+    def test_acciones_de_listado_aceptan_cursor(self):
+        respuesta = self.client.get('/api/ordenes/pendientes/?paginacion=cursor&page_size=5')
+        self.assertEqual(len(respuesta.data['results']), 5)
+        self.assertIsNotNone(respuesta.data['next'])
+
+    def test_paginacion_por_numero_se_mantiene(self):
+        respuesta = self.client.get('/api/ordenes/?page=2&page_size=3')
+        self.assertEqual(respuesta.data['count'], 7)
+        self.assertEqual([fila['id'] for fila in respuesta.data['results']], self.esperados[3:6])
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.client.get('/api/ordenes/?cursor=xyz').status_code, 404)
+
+
+class IndicesConsultasTests(DatosListadosMixin, TestCase):
+    """Cada listado debe resolverse con índices, sin recorrer tablas completas"""
+
+    def planes_de_ejecucion(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200, url)
+        planes = []
+        with connection.cursor() as cursor:
+            for consulta in consultas.captured_queries:
+                if connection.vendor == 'postgresql':
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+                    cursor.execute(f"EXPLAIN {consulta['sql']}")
+                    planes.append((consulta['sql'], [fila[0] for fila in cursor.fetchall()]))
+                else:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {consulta['sql']}")
+                    planes.append((consulta['sql'], [fila[-1] for fila in cursor.fetchall()]))
+        return planes
+
+    def es_recorrido_completo(self, paso):
+        if connection.vendor == 'postgresql':
+            return 'Seq Scan' in paso
+        # Los recorridos de subconsultas materializadas no leen tablas
+        return re.fullmatch(r'SCAN (?!subquery)\w+', paso.strip()) is not None
+
+    def test_listados_usan_indices(self):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.skipTest('EXPLAIN solo se interpreta en SQLite y PostgreSQL')
+        self.poblar(20)
+        recorridos = [
+            (url, sql, paso)
+            for url in self.urls_listado()
+            for sql, pasos in self.planes_de_ejecucion(url)
+            for paso in pasos if self.es_recorrido_completo(paso)
+        ]
+        self.assertEqual(recorridos, [])
+
+
+class BusquedaTextoTests(TestCase):
+    def setUp(self):
+        if not busqueda.disponible():
+            self.skipTest('El motor de base de datos no tiene índice de texto completo')
+        self.client = APIClient()
+        self.empresa = crear_empresa(nombre='Minera Andina', ciudad='Antofagasta')
+        self.bomba = crear_equipo(self.empresa, codigo='BOM-01', nombre='Bomba centrífuga')
+        self.compresor = crear_equipo(self.empresa, codigo='CMP-01', nombre='Compresor de tornillo')
+
+    def ids(self, url):
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return [fila['id'] for fila in respuesta.data['results']]
+
+    def test_prefijo_sin_tildes_ni_mayusculas(self):
+        self.assertEqual(self.ids('/api/equipos/?search=CENTRIFU'), [self.bomba.pk])
+        self.assertEqual(self.ids('/api/equipos/?search=centrifuga tornillo'), [])
+        self.assertEqual(self.ids('/api/empresas/?search=antof'), [self.empresa.pk])
+        self.assertEqual(self.ids('/api/equipos/?search=centrífu'), [self.bomba.pk])
+        # Se guarda sin tildes para que PostgreSQL ('simple') tampoco las distinga
+        documento = DocumentoBusqueda.objects.get(modelo='equipo', objeto_id=self.bomba.pk)
+        self.assertIn('Bomba centrifuga', documento.texto)
+
+    def test_documentos_se_mantienen_desde_senales(self):
+        orden = crear_orden(self.empresa, self.compresor, descripcion='Cambio de filtros')
+        self.assertEqual(self.ids('/api/ordenes/?search=compresor filtros'), [orden.pk])
+
+        # El nombre del equipo forma parte del documento de sus órdenes
+        self.compresor.nombre = 'Soplador'
+        self.compresor.save()
+        self.assertEqual(self.ids('/api/ordenes/?search=compresor'), [])
+        self.assertEqual(self.ids('/api/ordenes/?search=soplador'), [orden.pk])
+
+        orden.delete()
+        self.assertFalse(DocumentoBusqueda.objects.filter(modelo='orden', objeto_id=orden.pk).exists())
+
+    def test_carga_masiva_indexa_ordenes(self):
+        self.client.force_authenticate(User.objects.create_user('supervisor', password='clave'))
+        respuesta = self.client.post('/api/ordenes/bulk/', [{
+            'empresa': self.empresa.pk, 'equipo': self.bomba.pk,
+            'descripcion': 'Alineación de acoplamiento',
+            'fecha_programada': '2030-01-15T08:00:00Z',
+        }], format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(len(self.ids('/api/ordenes/?search=acoplamiento')), 1)
+
+    def test_ordena_por_relevancia_y_respeta_ordering(self):
+        crear_equipo(self.empresa, codigo='BOM-02', nombre='Bomba', tipo='Bomba')
+        relevantes = self.ids('/api/equipos/?search=bomba')
+        self.assertEqual(len(relevantes), 3)
+        ordenados = self.ids('/api/equipos/?search=bomba&ordering=nombre')
+        nombres = list(Equipo.objects.filter(pk__in=ordenados).order_by('nombre').values_list('pk', flat=True))
+        self.assertEqual(ordenados, nombres)
+
+    def test_sin_limite_de_resultados_y_con_el_queryset_de_la_vista(self):
+        otra = crear_empresa(nombre='Otra', rut='22222222-2')
+        equipos = Equipo.objects.bulk_create([
+            Equipo(empresa=otra, codigo=f'VAL-{i}', nombre=f'Válvula {i}', tipo='Válvula') for i in range(520)
+        ])
+        busqueda.indexar(Equipo, [equipo.pk for equipo in equipos])
+        propias = [crear_equipo(self.empresa, codigo=f'VAL-P{i}', nombre='Válvula') for i in range(3)]
+
+        respuesta = self.client.get('/api/equipos/?search=valvula&page_size=1')
+        self.assertEqual(respuesta.data['count'], 523)
+        # El filtro se aplica dentro del queryset recibido, no sobre los primeros resultados globales
+        propios = busqueda.filtrar(Equipo.objects.filter(empresa=self.empresa), ['valvula'])
+        self.assertEqual(sorted(propios.values_list('pk', flat=True)), [e.pk for e in propias])
+        filas = self.client.get('/api/equipos/export/?formato=ndjson&search=valvula')
+        self.assertEqual(len(b''.join(filas.streaming_content).splitlines()), 523)
+
+    def test_reindexar_busqueda(self):
+        DocumentoBusqueda.objects.all().delete()
+        call_command('reindexar_busqueda', stdout=StringIO())
+        self.assertEqual(DocumentoBusqueda.objects.filter(modelo='equipo').count(), 2)
+        self.assertEqual(self.ids('/api/equipos/?search=tornillo'), [self.compresor.pk])
+
+
+class ExportacionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        empresa = crear_empresa()
+        self.equipo = crear_equipo(empresa, codigo='EQ-EXP', nombre='Bomba de agua')
+        otro = crear_equipo(empresa, codigo='EQ-OTRO', nombre='Motor')
+        base = timezone.now()
+        self.ordenes = [
+            crear_orden(empresa, self.equipo if i % 2 else otro, descripcion=f'Tarea, "{i}"',
+                        fecha_programada=base + timedelta(days=i))
+            for i in range(6)
+        ]
+
+    def leer(self, respuesta):
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.streaming)
+        return b''.join(respuesta.streaming_content).decode('utf-8')
+
+    def test_exporta_csv_con_orden_del_listado(self):
+        import csv
+        respuesta = self.client.get('/api/ordenes/export/')
+        self.assertIn('ordenes.csv', respuesta['Content-Disposition'])
+        filas = list(csv.DictReader(StringIO(self.leer(respuesta))))
+        self.assertEqual([int(fila['id']) for fila in filas], [o.pk for o in reversed(self.ordenes)])
+        self.assertEqual(filas[0]['descripcion'], 'Tarea, "5"')
+        self.assertEqual(filas[0]['plan_id'], '')
+
+    def test_exporta_ndjson_con_filtros(self):
+        respuesta = self.client.get('/api/ordenes/export/?formato=ndjson&ordering=fecha_programada&search=bomba')
+        filas = [json.loads(linea) for linea in self.leer(respuesta).splitlines()]
+        esperados = [o.pk for o in self.ordenes if o.equipo_id == self.equipo.pk]
+        self.assertEqual([fila['id'] for fila in filas], esperados)
+
+    def test_exporta_equipos(self):
+        filas = self.leer(self.client.get('/api/equipos/export/?formato=ndjson')).splitlines()
+        self.assertEqual({json.loads(fila)['codigo'] for fila in filas}, {'EQ-EXP', 'EQ-OTRO'})
+
+    def test_formato_invalido(self):
+        self.assertEqual(self.client.get('/api/ordenes/export/?formato=xml').status_code, 400)
+
+
+class ProgramadorTests(TestCase):
+    def setUp(self):
+        self.empresa = crear_empresa()
+        self.equipo = crear_equipo(self.empresa)
+        self.hoy = timezone.localdate()
+
+    def crear_plan(self, nombre='Lubricación', dias=7, proxima=None, **kwargs):
+        return Plan.objects.create(
+            empresa=self.empresa, equipo=self.equipo, nombre=nombre, frecuencia='semanal',
+            frequency_days=dias, tareas='Lubricar rodamientos', fecha_inicio=self.hoy,
+            fecha_proximo_mantenimiento=self.hoy if proxima is None else proxima, **kwargs
+        )
+
+    def test_ocurrencias_agrupa_atrasos(self):
+        hoy = datetime.date(2030, 1, 10)
+        fechas, siguiente = programador.ocurrencias(
+            datetime.date(2030, 1, 1), 2, hoy, hoy + timedelta(days=3)
+        )
+        self.assertEqual(fechas, [datetime.date(2030, 1, 1), datetime.date(2030, 1, 11), datetime.date(2030, 1, 13)])
+        self.assertEqual(siguiente, datetime.date(2030, 1, 15))
+
+    def test_genera_ordenes_y_adelanta_planes(self):
+        semanal = self.crear_plan(dias=7)
+        diario = self.crear_plan(nombre='Inspección', dias=1, proxima=self.hoy + timedelta(days=2))
+        lejano = self.crear_plan(nombre='Overhaul', dias=365, proxima=self.hoy + timedelta(days=30))
+        self.crear_plan(nombre='Inactivo', activo=False)
+
+        resultado = programador.generar_ordenes(horizonte_dias=7, tamano_lote=2)
+        self.assertEqual(resultado['planes'], 2)
+        # semanal: hoy y hoy+7; diario: de hoy+2 a hoy+7
+        self.assertEqual(resultado['ordenes_creadas'], 2 + 6)
+        self.assertEqual(Orden.objects.filter(plan=semanal).count(), 2)
+        self.assertEqual(Orden.objects.filter(plan=diario).count(), 6)
+        self.assertFalse(Orden.objects.filter(plan=lejano).exists())
+
+        semanal.refresh_from_db()
+        diario.refresh_from_db()
+        self.assertEqual(semanal.fecha_proximo_mantenimiento, self.hoy + timedelta(days=14))
+        self.assertEqual(diario.fecha_proximo_mantenimiento, self.hoy + timedelta(days=8))
+        self.assertEqual(EquipoEstadistica.objects.get(equipo=self.equipo).total_ordenes, 8)
+        self.assertEqual(Orden.objects.values('numero_orden').distinct().count(), 8)
+
+        # Volver a ejecutar no duplica órdenes
+        self.assertEqual(programador.generar_ordenes(horizonte_dias=7)['ordenes_creadas'], 0)
+
+    def test_no_duplica_orden_existente_del_plan(self):
+        plan = self.crear_plan(dias=30)
+        crear_orden(self.empresa, self.equipo, plan=plan,
+                    fecha_programada=programador._fecha_programada(self.hoy))
+        self.assertEqual(programador.generar_ordenes(horizonte_dias=7)['ordenes_creadas'], 0)
+        plan.refresh_from_db()
+        self.assertEqual(plan.fecha_proximo_mantenimiento, self.hoy + timedelta(days=30))
+
+    def test_accion_y_comando(self):
+        self.crear_plan()
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('planificador', password='clave'))
+        respuesta = client.post('/api/planes/generar_ordenes/', {'horizonte_dias': 0}, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.data['ordenes_creadas'], 1)
+        self.assertEqual(client.post('/api/planes/generar_ordenes/', {'horizonte_dias': -1}, format='json').status_code, 400)
+
+        salida = StringIO()
+        call_command('generar_ordenes_preventivas', '--horizonte-dias', '7', stdout=salida)
+        self.assertIn('1 órdenes generadas', salida.getvalue())
+
+
+class AsignacionTecnicosTests(TestCase):
+    url = '/api/ordenes/asignar-automatico/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('jefe', password='clave'))
+        self.empresa = crear_empresa()
+        self.equipo = crear_equipo(self.empresa)
+        self.mecanico = self.crear_tecnico('Mecánico', 'mecanico', experiencia=10)
+        self.electrico = self.crear_tecnico('Eléctrico', 'electrico', experiencia=1)
+        self.plan = Plan.objects.create(
+            empresa=self.empresa, equipo=self.equipo, nombre='Tablero', frecuencia='mensual',
+            tareas='Revisar', fecha_inicio=timezone.now().date(), duracion_estimada_horas=3,
+        )
+
+    def crear_tecnico(self, apellido, especialidad, experiencia=0, empresa=True):
+        tecnico = Tecnico.objects.create(
+            nombre='T', apellido=apellido, rut=apellido, email=f'{especialidad}{apellido}@example.com',
+            telefono='1', especialidad=especialidad, experiencia_anos=experiencia,
+        )
+        if empresa:
+            tecnico.empresas.add(self.empresa)
+        return tecnico
+
+    def asignados(self):
+        return dict(Orden.objects.values_list('pk', 'tecnico_asignado_id'))
+
+    def test_resolver_numpy_es_optimo(self):
+        generador = np.random.default_rng(7)
+        for forma in [(6, 9), (9, 6), (8, 8)]:
+            costo = generador.integers(0, 50, size=forma).astype(float)
+            filas, columnas = asignacion._resolver_numpy(costo)
+            esperadas_filas, esperadas_columnas = asignacion.resolver_asignacion(costo)
+            self.assertEqual(len(set(columnas)), min(forma))
+            if asignacion.linear_sum_assignment is not None:
+                self.assertEqual(costo[filas, columnas].sum(), costo[esperadas_filas, esperadas_columnas].sum())
+
+    def test_prefiere_recomendados_y_especialidad(self):
+        electrico_2 = self.crear_tecnico('Otro', 'electrico', experiencia=3, empresa=False)
+        self.plan.tecnicos_recomendados.add(electrico_2)
+        orden = crear_orden(self.empresa, self.equipo, plan=self.plan)
+        respuesta = self.client.post(self.url, {}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.asignados()[orden.pk], electrico_2.pk)
+
+        # Sin el recomendado disponible, gana la misma especialidad
+        electrico_2.activo = False
+        electrico_2.save()
+        otra = crear_orden(self.empresa, self.equipo, plan=self.plan)
+        self.client.post(self.url, {'ordenes': [otra.pk]}, format='json')
+        self.assertEqual(self.asignados()[otra.pk], self.electrico.pk)
+
+    def test_urgentes_requieren_experiencia(self):
+        ordenes = [crear_orden(self.empresa, self.equipo, prioridad='urgente') for _ in range(3)]
+        resultado = self.client.post(self.url, {}, format='json').data
+        self.assertEqual(resultado['asignadas'], 3)
+        self.assertEqual({self.asignados()[o.pk] for o in ordenes}, {self.mecanico.pk})
+
+    def test_reparte_la_carga(self):
+        previas = [crear_orden(self.empresa, self.equipo, plan=self.plan, tecnico_asignado=self.mecanico)
+                   for _ in range(2)]
+        nuevas = [crear_orden(self.empresa, self.equipo) for _ in range(8)]
+        self.client.post(self.url, {}, format='json')
+        asignados = self.asignados()
+        cargas = {
+            tecnico.pk: sum(1 for o in nuevas if asignados[o.pk] == tecnico.pk)
+            for tecnico in (self.mecanico, self.electrico)
+        }
+        # El mecánico ya tenía 6 horas abiertas: recibe menos órdenes nuevas
+        self.assertEqual(cargas, {self.mecanico.pk: 1, self.electrico.pk: 7})
+        self.assertTrue(all(asignados[o.pk] == self.mecanico.pk for o in previas))
+
+    def test_simular_y_sin_candidatos(self):
+        otra_empresa = crear_empresa(nombre='Sin técnicos', rut='2-2')
+        sin_candidato = crear_orden(otra_empresa, crear_equipo(otra_empresa, codigo='EQ-X'))
+        orden = crear_orden(self.empresa, self.equipo)
+        resultado = self.client.post(self.url, {'simular': True}, format='json').data
+        self.assertEqual(resultado['asignadas'], 1)
+        self.assertEqual(resultado['sin_asignar'], [sin_candidato.pk])
+        self.assertIsNone(self.asignados()[orden.pk])
+
+
+class TransicionesOrdenesTests(TestCase):
+    def setUp(self):
+        cache_respuestas.obtener_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('supervisor', password='clave'))
+        self.empresa = crear_empresa()
+        self.otra = crear_empresa(nombre='Otra', rut='22222222-2')
+        self.equipo = crear_equipo(self.empresa)
+        self.inicio = timezone.now() - timedelta(hours=3)
+
+    def crear(self, cantidad, empresa=None, equipo=None, **kwargs):
+        empresa = empresa or self.empresa
+        equipo = equipo or self.equipo
+        return [crear_orden(empresa, equipo, **kwargs).pk for _ in range(cantidad)]
+
+    def transicionar(self, **datos):
+        return self.client.post('/api/ordenes/transicion-masiva/', datos, format='json')
+
+    def test_accion_individual_guarda_solo_columnas_modificadas(self):
+        orden = crear_orden(self.empresa, self.equipo, estado='en_progreso', fecha_inicio=self.inicio)
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.post(f'/api/ordenes/{orden.pk}/completar/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['estado'], 'completada')
+        self.assertEqual(Decimal(respuesta.data['horas_trabajadas']), Decimal('3.00'))
+        actualizacion = next(q['sql'] for q in consultas.captured_queries if q['sql'].startswith('UPDATE "mantenimiento_orden"'))
+        self.assertNotIn('"descripcion"', actualizacion)
+        self.assertEqual(EquipoEstadistica.objects.get(equipo=self.equipo).ordenes_completadas, 1)
+
+        respuesta = self.client.post(f'/api/ordenes/{orden.pk}/completar/')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.data['error'], 'La orden ya está completada')
+
+    def test_completar_por_ids(self):
+        en_progreso = self.crear(2, estado='en_progreso', fecha_inicio=self.inicio)
+        con_horas = self.crear(1, estado='en_progreso', fecha_inicio=self.inicio, horas_trabajadas=Decimal('1.50'))
+        sin_inicio = self.crear(1)
+        completada = self.crear(1, estado='completada')
+        # Precarga la caché de las estadísticas del equipo
+        self.client.get(f'/api/equipos/{self.equipo.pk}/estadisticas/')
+
+        ids = en_progreso + con_horas + sin_inicio + completada + [999999]
+        respuesta = self.transicionar(accion='completar', ordenes=ids)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual((respuesta.data['actualizadas'], respuesta.data['errores']), (4, 2))
+        resultados = {resultado['id']: resultado for resultado in respuesta.data['resultados']}
+        self.assertEqual(list(resultados), sorted(ids))
+        self.assertEqual(resultados[completada[0]]['error'], 'La orden ya está completada')
+        self.assertEqual(resultados[999999]['error'], 'Orden no encontrada')
+
+        horas = dict(Orden.objects.filter(pk__in=ids).values_list('pk', 'horas_trabajadas'))
+        self.assertEqual([horas[pk] for pk in en_progreso], [Decimal('3.00')] * 2)
+        self.assertEqual(horas[con_horas[0]], Decimal('1.50'))
+        self.assertIsNone(horas[sin_inicio[0]])
+        self.assertEqual(Orden.objects.filter(estado='completada').count(), 5)
+        self.assertEqual(Orden.objects.filter(pk__in=en_progreso + sin_inicio, fecha_termino__isnull=False).count(), 3)
+        self.assertTrue(Orden.objects.filter(pk=en_progreso[0], fecha_actualizacion__gt=self.inicio).exists())
+
+        estadisticas = self.client.get(f'/api/equipos/{self.equipo.pk}/estadisticas/').data
+        self.assertEqual(estadisticas['ordenes_completadas'], 5)
+        self.assertEqual(Decimal(estadisticas['horas_totales_trabajadas']), Decimal('7.50'))
+
+    def test_por_filtros_respeta_el_maximo_de_ordenes(self):
+        ids = self.crear(3)
+        with mock.patch.object(TransicionMasivaSerializer, 'MAXIMO_ORDENES', 2):
+            respuesta = self.transicionar(accion='cancelar', estado='programada')
+            self.assertEqual(respuesta.status_code, 400)
+            self.assertIn('más de 2 órdenes', respuesta.data['error'])
+            self.assertEqual(Orden.objects.filter(estado='cancelada').count(), 0)
+
+            respuesta = self.transicionar(accion='cancelar', ordenes=ids[:2])
+            self.assertEqual(respuesta.data['actualizadas'], 2)
+
+    def test_por_filtros(self):
+        programadas = self.crear(3)
+        self.crear(2, estado='en_progreso')
+        otro_equipo = crear_equipo(self.otra, codigo='EQ-OTRA')
+        ajenas = self.crear(2, empresa=self.otra, equipo=otro_equipo)
+
+        respuesta = self.transicionar(accion='iniciar', empresa=self.empresa.pk, estado='programada')
+        self.assertEqual(respuesta.data['actualizadas'], 3)
+        self.assertEqual([resultado['id'] for resultado in respuesta.data['resultados']], programadas)
+        self.assertEqual(Orden.objects.filter(pk__in=programadas, estado='en_progreso', fecha_inicio__isnull=False).count(), 3)
+        self.assertEqual(Orden.objects.filter(pk__in=ajenas, estado='programada').count(), 2)
+
+        respuesta = self.transicionar(accion='pausar', empresa=self.empresa.pk)
+        self.assertEqual((respuesta.data['actualizadas'], respuesta.data['errores']), (5, 0))
+
+    def test_consultas_no_dependen_de_la_cantidad(self):
+        conteos = []
+        for cantidad in (2, 20):
+            ids = self.crear(cantidad, estado='en_progreso', fecha_inicio=self.inicio)
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = self.transicionar(accion='completar', ordenes=ids)
+            self.assertEqual(respuesta.data['actualizadas'], cantidad)
+            conteos.append(len(consultas))
+        self.assertEqual(conteos[0], conteos[1])
+
+    def test_validaciones(self):
+        self.assertEqual(self.transicionar(accion='completar').status_code, 400)
+        self.assertEqual(self.transicionar(accion='reabrir', ordenes=[1]).status_code, 400)
+        self.client.force_authenticate(None)
+        self.assertIn(self.transicionar(accion='completar', ordenes=[1]).status_code, (401, 403))
+
+
+class CacheRespuestasTests(TestCase):
+    def setUp(self):
+        cache_respuestas.obtener_cache().clear()
+        self.client = APIClient()
+        self.empresa = crear_empresa()
+        self.equipo = crear_equipo(self.empresa)
+        self.otro = crear_equipo(self.empresa, codigo='EQ-002')
+
+    def get(self, url, cache):
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['X-Cache'], cache, url)
+        return respuesta
+
+    def test_expand_y_relaciones_muchos_a_muchos(self):
+        tecnico = Tecnico.objects.create(nombre='A', apellido='B', rut='1-9', email='a@example.com',
+                                         telefono='1', especialidad='general')
+        tecnico.empresas.add(self.empresa)
+        url = '/api/tecnicos/disponibles/?expand=empresas'
+        self.assertEqual(self.get(url, 'MISS').data['results'][0]['empresas'][0]['nombre'], 'Empresa Test')
+        self.get(url, 'HIT')
+
+        self.empresa.nombre = 'Dos'
+        self.empresa.save()
+        self.assertEqual(self.get(url, 'MISS').data['results'][0]['empresas'][0]['nombre'], 'Dos')
+
+        # Cambios de la relación sin save() de ninguno de los dos lados
+        otra = crear_empresa(nombre='Otra', rut='22222222-2')
+        self.get(url, 'MISS')
+        self.get(url, 'HIT')
+        otra.tecnicos.add(tecnico)
+        self.assertEqual(len(self.get(url, 'MISS').data['results'][0]['empresas']), 2)
+        tecnico.empresas.clear()
+        self.assertEqual(self.get(url, 'MISS').data['results'][0]['empresas'], [])
+
+        plan = Plan.objects.create(empresa=self.empresa, equipo=self.equipo, nombre='Plan', frecuencia='mensual',
+                                   tareas='Revisar', fecha_inicio=timezone.now().date())
+        detalle = f'/api/equipos/{self.equipo.pk}/estadisticas/'
+        self.get(detalle, 'MISS')
+        self.get(detalle, 'HIT')
+        plan.tecnicos_recomendados.add(tecnico)
+        self.get(detalle, 'MISS')
+
+    def test_acierto_sin_consultas(self):
+        primera = self.get('/api/equipos/operativos/', 'MISS')
+        with self.assertNumQueries(0):
+            segunda = self.get('/api/equipos/operativos/', 'HIT')
+        self.assertEqual(primera.data, segunda.data)
+        # Los parámetros forman parte de la clave, sin importar su orden
+        self.get('/api/equipos/operativos/?page_size=1&page=2', 'MISS')
+        self.get('/api/equipos/operativos/?page=2&page_size=1', 'HIT')
+
+    def test_invalidacion_precisa_por_objeto(self):
+        url = f'/api/equipos/{self.equipo.pk}/estadisticas/'
+        url_otro = f'/api/equipos/{self.otro.pk}/estadisticas/'
+        self.get(url, 'MISS')
+        self.get(url_otro, 'MISS')
+
+        orden = crear_orden(self.empresa, self.equipo)
+        self.assertEqual(self.get(url, 'MISS').data['total_ordenes'], 1)
+        self.get(url_otro, 'HIT')
+
+        # Al mover la orden se invalidan el equipo anterior y el nuevo
+        orden = Orden.objects.get(pk=orden.pk)
+        orden.equipo = self.otro
+        orden.save()
+        self.assertEqual(self.get(url, 'MISS').data['total_ordenes'], 0)
+        self.assertEqual(self.get(url_otro, 'MISS').data['total_ordenes'], 1)
+
+    def test_invalidacion_por_modelo_y_carga_masiva(self):
+        url = f'/api/empresas/estadisticas/?ids={self.empresa.pk}'
+        self.get('/api/tecnicos/disponibles/', 'MISS')
+        self.get(url, 'MISS')
+        self.get('/api/tecnicos/disponibles/', 'HIT')
+
+        Tecnico.objects.create(nombre='A', apellido='B', rut='1-9', email='a@example.com',
+                               telefono='1', especialidad='general')
+        self.assertEqual(self.get('/api/tecnicos/disponibles/', 'MISS').data['count'], 1)
+        self.get(url, 'HIT')
+
+        self.client.force_authenticate(User.objects.create_user('supervisor', password='clave'))
+        self.client.post('/api/ordenes/bulk/', [{
+            'empresa': self.empresa.pk, 'equipo': self.equipo.pk, 'descripcion': 'x',
+            'fecha_programada': '2030-01-15T08:00:00Z',
+        }], format='json')
+        self.assertEqual(self.get(url, 'MISS').data[0]['total_ordenes'], 1)
+
+    def test_clave_por_usuario_y_contadores(self):
+        self.get('/api/planes/activos/', 'MISS')
+        self.get('/api/planes/activos/', 'HIT')
+        admin = User.objects.create_superuser('admin', password='clave')
+        self.client.force_authenticate(admin)
+        self.get('/api/planes/activos/', 'MISS')
+
+        contadores = self.client.get('/api/cache/').data
+        self.assertEqual(contadores['PlanViewSet.activos']['hits'], 1)
+        self.assertEqual(contadores['PlanViewSet.activos']['misses'], 2)
+        self.client.force_authenticate(User.objects.create_user('otro', password='clave'))
+        self.assertEqual(self.client.get('/api/cache/').status_code, 403)
+
+
+class PeticionCondicionalTests(TestCase):
+    def setUp(self):
+        cache_respuestas.obtener_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('supervisor', password='clave'))
+        self.empresa = crear_empresa()
+        self.equipo = crear_equipo(self.empresa)
+        self.orden = crear_orden(self.empresa, self.equipo)
+
+    def etag(self, url):
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('Last-Modified', respuesta)
+        return respuesta['ETag']
+
+    def test_304_sin_serializar(self):
+        for url in ['/api/equipos/', f'/api/equipos/{self.equipo.pk}/', f'/api/empresas/{self.empresa.pk}/']:
+            etag = self.etag(url)
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(respuesta.status_code, 304, url)
+            self.assertEqual(respuesta['ETag'], etag)
+            self.assertEqual(len(consultas), 1, url)
+
+    def test_desactivadas(self):
+        for url in ['/api/equipos/', f'/api/equipos/{self.equipo.pk}/']:
+            with CaptureQueriesContext(connection) as activas:
+                self.etag(url)
+            with override_settings(MANTENIMIENTO_PETICIONES_CONDICIONALES=False):
+                with CaptureQueriesContext(connection) as desactivadas:
+                    respuesta = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+            self.assertEqual(respuesta.status_code, 200, url)
+            self.assertNotIn('ETag', respuesta)
+            # Sin la consulta de los validadores
+            self.assertEqual(len(desactivadas), len(activas) - 1, url)
+
+    def test_filtros_se_aplican_una_vez(self):
+        for url in ['/api/equipos/?search=equipo&ordering=codigo', f'/api/equipos/{self.equipo.pk}/']:
+            with mock.patch.object(BusquedaTextoFilter, 'filter_queryset', autospec=True,
+                                   side_effect=lambda filtro, request, queryset, vista: queryset) as filtrar:
+                self.assertEqual(self.etag(url)[:1], '"')
+            self.assertEqual(filtrar.call_count, 1, url)
+
+    def test_listado_con_colecciones_expandidas(self):
+        tecnico = Tecnico.objects.create(nombre='A', apellido='B', rut='1-9', email='a@example.com',
+                                         telefono='1', especialidad='general')
+        tecnico.empresas.add(self.empresa)
+        url = '/api/tecnicos/?expand=empresas'
+        etag = self.etag(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Empresa.objects.filter(pk=self.empresa.pk).update(
+            nombre='Dos', fecha_actualizacion=timezone.now() + timedelta(seconds=1)
+        )
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['results'][0]['empresas'][0]['nombre'], 'Dos')
+
+        # Agregar o quitar una empresa no cambia fecha_actualizacion, pero sí el Count
+        etag = respuesta['ETag']
+        tecnico.empresas.add(crear_empresa(nombre='Otra', rut='22222222-2'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_if_modified_since(self):
+        ultima = self.client.get('/api/ordenes/')['Last-Modified']
+        self.assertEqual(self.client.get('/api/ordenes/', HTTP_IF_MODIFIED_SINCE=ultima).status_code, 304)
+        anterior = 'Mon, 01 Jan 2001 00:00:00 GMT'
+        self.assertEqual(self.client.get('/api/ordenes/', HTTP_IF_MODIFIED_SINCE=anterior).status_code, 200)
+
+    def test_etag_cambia_con_los_datos(self):
+        listado = self.etag('/api/equipos/')
+        detalle = self.etag(f'/api/empresas/{self.empresa.pk}/')
+
+        # El nombre de la empresa se serializa en cada equipo
+        Empresa.objects.filter(pk=self.empresa.pk).update(
+            nombre='Otra', fecha_actualizacion=timezone.now() + timedelta(seconds=1)
+        )
+        self.assertNotEqual(self.etag('/api/equipos/'), listado)
+
+        # Una baja en una colección del detalle cambia el conteo
+        detalle = self.etag(f'/api/empresas/{self.empresa.pk}/')
+        self.orden.delete()
+        self.assertNotEqual(self.etag(f'/api/empresas/{self.empresa.pk}/'), detalle)
+
+        filtrado = self.etag('/api/equipos/?estado=operativo')
+        self.assertNotEqual(filtrado, self.etag('/api/equipos/'))
+
+    def test_if_match(self):
+        url = f'/api/equipos/{self.equipo.pk}/'
+        etag = self.etag(url)
+
+        respuesta = self.client.patch(url, {'ubicacion': 'Planta 2'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+
+        # Un segundo cliente con la versión anterior no pisa el cambio
+        respuesta = self.client.patch(url, {'ubicacion': 'Planta 3'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 412)
+        self.equipo.refresh_from_db()
+        self.assertEqual(self.equipo.ubicacion, 'Planta 2')
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(MANTENIMIENTO_METRICAS_TOKEN='secreto')
+class MetricasTests(TestCase):
+    def setUp(self):
+        cache_respuestas.obtener_cache().clear()
+        metricas.reiniciar()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('supervisor', password='clave'))
+        empresa = crear_empresa()
+        self.equipos = [crear_equipo(empresa, codigo=f'EQ-{i}') for i in range(3)]
+
+    def serie(self, texto, nombre, **etiquetas):
+        filtro = ','.join(f'{clave}="{valor}"' for clave, valor in etiquetas.items())
+        coincidencia = re.search(rf'^{nombre}\{{{filtro}\}} (\S+)$', texto, re.MULTILINE)
+        self.assertIsNotNone(coincidencia, f'{nombre}{{{filtro}}}')
+        return float(coincidencia.group(1))
+
+    def test_registra_vista_accion_y_consultas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get('/api/equipos/').status_code, 200)
+        total_consultas = len(consultas)
+        self.client.get(f'/api/equipos/{self.equipos[0].pk}/estadisticas/')
+
+        texto = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto').content.decode()
+        self.assertEqual(self.serie(
+            texto, 'mantenimiento_peticiones_total',
+            vista='EquipoViewSet', accion='list', metodo='GET', estado='200'
+        ), 1)
+        self.assertEqual(self.serie(
+            texto, 'mantenimiento_peticion_consultas_sum', vista='EquipoViewSet', accion='list'
+        ), total_consultas)
+        self.assertEqual(self.serie(
+            texto, 'mantenimiento_peticion_duracion_segundos_count', vista='EquipoViewSet', accion='estadisticas'
+        ), 1)
+        self.assertGreater(self.serie(
+            texto, 'mantenimiento_respuesta_bytes_sum', vista='EquipoViewSet', accion='list'
+        ), 0)
+        self.assertIn('mantenimiento_peticion_serializacion_segundos_bucket{vista="EquipoViewSet",accion="list",le="+Inf"} 1', texto)
+        self.assertIn('mantenimiento_cache_respuestas_total{vista="EquipoViewSet.estadisticas",resultado="miss"} 1', texto)
+
+    @override_settings(MANTENIMIENTO_METRICAS_UMBRAL_LENTO_MS=0, MANTENIMIENTO_METRICAS_CONSULTAS_LENTAS=2)
+    def test_registro_de_peticiones_lentas(self):
+        with self.assertLogs('mantenimiento.metricas', 'WARNING') as registro:
+            self.client.get('/api/equipos/')
+        mensaje = registro.output[0]
+        self.assertIn('EquipoViewSet.list', mensaje)
+        self.assertEqual(mensaje.count(' ms  SELECT'), 2)
+
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+        respuesta = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    @override_settings(MANTENIMIENTO_METRICAS_TOKEN=None)
+    def test_sin_token_exige_staff(self):
+        # Sin token definido el endpoint no queda público
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer None').status_code, 403)
+        self.client.force_login(User.objects.create_user('supervisor_web', password='clave'))
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.client.force_login(User.objects.create_user('operaciones', password='clave', is_staff=True))
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(MANTENIMIENTO_METRICAS_TOKEN=None, MANTENIMIENTO_METRICAS_PUBLICAS=True)
+    def test_publicas_por_configuracion(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+
+class DatosSinteticosTests(TestCase):
+    TAMANOS = {'empresas': 5, 'equipos': 60, 'tecnicos': 12, 'planes': 90, 'ordenes': 600}
+
+    def test_poblar(self):
+        datos_sinteticos.poblar(self.TAMANOS, semilla=1, tamano_lote=50)
+        self.assertEqual(
+            [Empresa.objects.count(), Equipo.objects.count(), Tecnico.objects.count(),
+             Plan.objects.count(), Orden.objects.count()],
+            list(self.TAMANOS.values()),
+        )
+        # Distribución sesgada: la primera empresa concentra más equipos que la última
+        por_empresa = list(Empresa.objects.order_by('pk').annotate(n=Count('equipos')).values_list('n', flat=True))
+        self.assertGreater(por_empresa[0], por_empresa[-1])
+        # Planes y órdenes coherentes con su equipo; resúmenes reconstruidos
+        self.assertFalse(Plan.objects.exclude(empresa=F('equipo__empresa')).exists())
+        self.assertFalse(Orden.objects.exclude(empresa=F('equipo__empresa')).exists())
+        self.assertFalse(Orden.objects.filter(plan__isnull=False).exclude(plan__equipo=F('equipo')).exists())
+        self.assertFalse(Orden.objects.filter(estado='completada', fecha_termino__isnull=True).exists())
+        self.assertEqual(EquipoEstadistica.objects.aggregate(total=Sum('total_ordenes'))['total'], 600)
+
+        with self.assertRaises(ValueError):
+            datos_sinteticos.poblar(self.TAMANOS)
+
+
+class BenchmarkTests(TestCase):
+    def test_rutas_incluyen_acciones(self):
+        rutas = {(ruta['vista'], ruta['metodo'], ruta['accion']) for ruta in benchmark.rutas_api()}
+        for esperada in [
+            ('EmpresaViewSet', 'get', 'list'), ('EmpresaViewSet', 'get', 'estadisticas_multiples'),
+            ('EquipoViewSet', 'get', 'estadisticas'), ('OrdenViewSet', 'post', 'asignar_automatico'),
+            ('OrdenViewSet', 'delete', 'destroy'), ('PlanViewSet', 'post', 'generar_ordenes'),
+        ]:
+            self.assertIn(esperada, rutas)
+        self.assertFalse(any('format' in ruta['ruta'] for ruta in benchmark.rutas_api()))
+
+    def test_ejecutar(self):
+        datos_sinteticos.poblar(DatosSinteticosTests.TAMANOS, tamano_lote=100)
+        estados = dict(Orden.objects.values_list('pk', 'estado'))
+        resultado = benchmark.ejecutar(repeticiones=1, filtro=r'^(GET|DELETE|POST|PUT) /api/(ordenes|planes)/')
+        rutas = {(ruta['metodo'], ruta['ruta'], ruta['accion']): ruta for ruta in resultado['rutas']}
+        ordenes = {(metodo, accion): ruta for (metodo, url, accion), ruta in rutas.items() if '/ordenes/' in url}
+
+        self.assertEqual(resultado['tamanos']['orden'], 600)
+        self.assertEqual(ordenes[('get', 'list')]['estado'], 200)
+        self.assertGreater(ordenes[('get', 'list')]['consultas'], 0)
+        self.assertEqual(ordenes[('get', 'por_tecnico')]['estado'], 200)
+        self.assertEqual(ordenes[('get', 'export')]['omitida'], 'exportación completa')
+        # Todas las escrituras se miden con su cuerpo y se revierten
+        escrituras = [ruta for ruta in resultado['rutas'] if ruta['metodo'] in ('post', 'put', 'delete')]
+        self.assertEqual(
+            {ruta['accion'] for ruta in escrituras},
+            {'create', 'update', 'destroy', 'bulk', 'generar_ordenes', 'asignar_automatico',
+             'iniciar', 'completar', 'pausar', 'cancelar', 'transicion_masiva'},
+        )
+        for ruta in escrituras:
+            self.assertNotIn('omitida', ruta)
+            self.assertIn(ruta['estado'], (200, 201, 204), ruta)
+        self.assertEqual(ordenes[('post', 'bulk')]['estado'], 201)
+        self.assertEqual(Orden.objects.count(), 600)
+        self.assertEqual(dict(Orden.objects.values_list('pk', 'estado')), estados)
+
+        comparacion = benchmark.comparar(resultado, resultado)
+        self.assertTrue(all(fila['variacion'] == 0 for fila in comparacion))
+
+    def test_renderizado(self):
+        datos_sinteticos.poblar(DatosSinteticosTests.TAMANOS, tamano_lote=100)
+        resultado = benchmark.renderizado(filas=200, repeticiones=1)
+        self.assertEqual(resultado['filas'], 200)
+        self.assertTrue(resultado['identico'])
+        self.assertEqual([fila['operacion'] for fila in resultado['resultados']], ['render', 'parse'])
+
+    def test_confiabilidad_flota(self):
+        datos_sinteticos.poblar(DatosSinteticosTests.TAMANOS, tamano_lote=100)
+        resultado = benchmark.confiabilidad_flota(ventanas=[30, 365], repeticiones=1)
+        self.assertEqual(resultado['equipos'], Equipo.objects.count())
+        self.assertEqual(
+            [fila['operacion'] for fila in resultado['resultados']],
+            ['carga', 'calculo_empresa', 'calculo_tipo', 'calculo_equipo'],
+        )
+
+    def test_listados(self):
+        datos_sinteticos.poblar(DatosSinteticosTests.TAMANOS, tamano_lote=100)
+        resultado = benchmark.listados(tamano_pagina=20, repeticiones=1)
+        self.assertEqual(len(resultado['resultados']), 6)
+        for fila in resultado['resultados']:
+            # Mismas consultas y mismo cuerpo por ambos caminos
+            self.assertEqual(fila['serializador']['estado'], 200)
+            self.assertEqual(fila['serializador']['consultas'], fila['valores']['consultas'])
+            self.assertEqual(fila['serializador']['bytes'], fila['valores']['bytes'])
+
+
+class BenchmarkConcurrenciaTests(TransactionTestCase):
+    def test_concurrencia(self):
+        datos_sinteticos.poblar(
+            {'empresas': 2, 'equipos': 10, 'tecnicos': 4, 'planes': 10, 'ordenes': 40},
+            tamano_lote=100, indice_busqueda=False,
+        )
+        resultado = benchmark.concurrencia(niveles=(1, 4), peticiones=12)
+        self.assertEqual(len(resultado['rutas']), 12)
+        self.assertEqual(
+            [(fila['modo'], fila['concurrencia']) for fila in resultado['resultados']],
+            [('wsgi', 1), ('asgi', 1), ('wsgi', 4), ('asgi', 4)],
+        )
+        self.assertEqual(resultado['diferencias'], benchmark.DIFERENCIAS_CONCURRENCIA)
+        for fila in resultado['resultados']:
+            self.assertEqual((fila['peticiones'], fila['errores']), (12, 0))
+            self.assertLessEqual(fila['ms_p50'], fila['ms_p95'])
+
+
+@override_settings(MANTENIMIENTO_CACHE_TIMEOUT=0)
+class PresupuestoConsultasTests(TestCase):
+    """
+    Cada ruta del router debe ejecutar una cantidad de consultas que no
+    supere su presupuesto declarado. En las rutas GET no debe depender del
+    tamaño de página y en las escrituras masivas, del tamaño del lote. Una
+    consulta por fila en un serializador hace fallar estas pruebas.
+    """
+    TAMANOS_PAGINA = (2, 25)
+    TAMANOS_LOTE = (2, 25)
+    ESCRITURAS_MASIVAS = {'bulk', 'transicion_masiva'}
+
+    # (vista, acción): consultas máximas. Las rutas nuevas deben declararse aquí
+    PRESUPUESTOS = {
+        # Listados: validadores (ETag) + COUNT de la paginación + página
+        ('EmpresaViewSet', 'list'): 3,
+        ('EquipoViewSet', 'list'): 3,
+        ('TecnicoViewSet', 'list'): 3,
+        ('PlanViewSet', 'list'): 3,
+        ('OrdenViewSet', 'list'): 3,
+        # Acciones de listado: COUNT + página
+        ('EmpresaViewSet', 'activas'): 2,
+        ('EquipoViewSet', 'operativos'): 2,
+        ('EquipoViewSet', 'por_empresa'): 2,
+        ('TecnicoViewSet', 'disponibles'): 2,
+        ('TecnicoViewSet', 'por_empresa'): 2,
+        ('TecnicoViewSet', 'por_especialidad'): 2,
+        ('PlanViewSet', 'activos'): 2,
+        ('PlanViewSet', 'por_empresa'): 2,
+        ('PlanViewSet', 'por_equipo'): 2,
+        ('PlanViewSet', 'proximos_vencimientos'): 2,
+        ('OrdenViewSet', 'pendientes'): 2,
+        ('OrdenViewSet', 'por_empresa'): 2,
+        ('OrdenViewSet', 'por_equipo'): 2,
+        ('OrdenViewSet', 'por_plan'): 2,
+        ('OrdenViewSet', 'por_tecnico'): 2,
+        ('OrdenViewSet', 'urgentes'): 2,
+        ('OrdenViewSet', 'vencidas'): 2,
+        # Detalle: validadores + objeto con sus relaciones + colecciones anidadas
+        ('EmpresaViewSet', 'retrieve'): 5,
+        ('EquipoViewSet', 'retrieve'): 4,
+        ('TecnicoViewSet', 'retrieve'): 4,
+        ('PlanViewSet', 'retrieve'): 4,
+        ('OrdenViewSet', 'retrieve'): 2,
+        # Agregados y exportaciones
+        ('EmpresaViewSet', 'estadisticas'): 1,
+        ('EmpresaViewSet', 'estadisticas_multiples'): 1,
+        ('EquipoViewSet', 'estadisticas'): 1,
+        ('EquipoViewSet', 'export'): 1,
+        # Confiabilidad: (objeto) + equipos + intervalos de las fallas
+        ('EquipoViewSet', 'confiabilidad'): 3,
+        ('EquipoViewSet', 'confiabilidad_flota'): 2,
+        ('OrdenViewSet', 'export'): 1,
+        # Escrituras (en un savepoint revertido, que suma dos consultas): validación
+        # de las relaciones + escritura + resumen de equipos e índice de búsqueda
+        ('EmpresaViewSet', 'create'): 8,
+        ('EmpresaViewSet', 'update'): 12,
+        ('EmpresaViewSet', 'partial_update'): 10,
+        # Borrado en cascada de los equipos, planes y órdenes con sus documentos
+        ('EmpresaViewSet', 'destroy'): 55,
+        ('EquipoViewSet', 'create'): 10,
+        ('EquipoViewSet', 'update'): 17,
+        ('EquipoViewSet', 'partial_update'): 15,
+        ('EquipoViewSet', 'destroy'): 9,
+        ('TecnicoViewSet', 'create'): 8,
+        ('TecnicoViewSet', 'update'): 12,
+        ('TecnicoViewSet', 'partial_update'): 10,
+        ('TecnicoViewSet', 'destroy'): 9,
+        ('PlanViewSet', 'create'): 9,
+        ('PlanViewSet', 'update'): 13,
+        ('PlanViewSet', 'partial_update'): 12,
+        ('PlanViewSet', 'destroy'): 8,
+        ('PlanViewSet', 'generar_ordenes'): 21,
+        ('OrdenViewSet', 'create'): 13,
+        ('OrdenViewSet', 'update'): 12,
+        ('OrdenViewSet', 'partial_update'): 11,
+        ('OrdenViewSet', 'destroy'): 7,
+        ('OrdenViewSet', 'asignar_automatico'): 11,
+        ('OrdenViewSet', 'iniciar'): 12,
+        ('OrdenViewSet', 'completar'): 13,
+        ('OrdenViewSet', 'pausar'): 11,
+        ('OrdenViewSet', 'cancelar'): 12,
+        # Masivas: constantes en el tamaño del lote
+        ('OrdenViewSet', 'bulk'): 18,
+        ('OrdenViewSet', 'transicion_masiva'): 9,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        datos_sinteticos.poblar(
+            {'empresas': 4, 'equipos': 40, 'tecnicos': 30, 'planes': 60, 'ordenes': 200},
+            tamano_lote=100, indice_busqueda=False,
+        )
+
+    def setUp(self):
+        self.cliente = benchmark.cliente_administrador()
+        self.muestras = benchmark.muestras()
+        self.cuerpos = benchmark.cuerpos(self.muestras)
+        # La primera llamada inspecciona las tablas y queda en caché por proceso
+        busqueda.disponible()
+
+    def consultas(self, url, tamano_pagina):
+        separador = '&' if '?' in url else '?'
+        respuesta, consultas = benchmark.contar_consultas(
+            self.cliente, 'get', f'{url}{separador}page_size={tamano_pagina}'
+        )
+        self.assertEqual(respuesta.status_code, 200, url)
+        return consultas
+
+    def consultas_escritura(self, ruta, url, cuerpo):
+        respuesta, consultas = benchmark.contar_consultas(self.cliente, ruta['metodo'], url, cuerpo)
+        self.assertLess(respuesta.status_code, 300, (url, getattr(respuesta, 'data', None)))
+        return consultas
+
+    def cuerpo_masivo(self, accion, tamano):
+        if accion == 'bulk':
+            return [self.cuerpos[('orden', 'create')]] * tamano
+        ids = Orden.objects.filter(estado='programada').order_by('pk').values_list('pk', flat=True)[:tamano]
+        self.assertEqual(len(ids), tamano)
+        return {'accion': 'cancelar', 'ordenes': list(ids)}
+
+    def rutas(self, lectura=True):
+        return [ruta for ruta in benchmark.rutas_api() if (ruta['metodo'] in ('get', 'head')) == lectura]
+
+    def test_todas_las_rutas_tienen_presupuesto(self):
+        sin_presupuesto = {
+            (ruta['vista'], ruta['accion']) for ruta in benchmark.rutas_api()
+        } - set(self.PRESUPUESTOS)
+        self.assertEqual(sin_presupuesto, set())
+
+    def test_consultas_constantes_y_dentro_del_presupuesto(self):
+        for ruta in self.rutas():
+            clave = (ruta['vista'], ruta['accion'])
+            url = benchmark.url_de_ruta(ruta, self.muestras)
+            with self.subTest(url=url, accion=ruta['accion']):
+                pocas, muchas = [self.consultas(url, tamano) for tamano in self.TAMANOS_PAGINA]
+                self.assertEqual(pocas, muchas, f'{clave}: las consultas dependen del tamaño de página')
+                self.assertLessEqual(muchas, self.PRESUPUESTOS[clave], f'{clave}: presupuesto excedido')
+
+    def test_escrituras_dentro_del_presupuesto(self):
+        for ruta in self.rutas(lectura=False):
+            clave = (ruta['vista'], ruta['accion'])
+            url = benchmark.url_de_ruta(ruta, self.muestras)
+            with self.subTest(url=url, accion=ruta['accion']):
+                self.assertIsNotNone(url, f'{clave}: sin datos de muestra')
+                if ruta['accion'] in self.ESCRITURAS_MASIVAS:
+                    pocas, muchas = [
+                        self.consultas_escritura(ruta, url, self.cuerpo_masivo(ruta['accion'], tamano))
+                        for tamano in self.TAMANOS_LOTE
+                    ]
+                    self.assertEqual(pocas, muchas, f'{clave}: las consultas dependen del tamaño del lote')
+                if ruta['accion'] in benchmark.ESCRITURAS_SIN_CUERPO:
+                    cuerpo = None
+                else:
+                    cuerpo = self.cuerpos[(ruta['basename'], ruta['accion'])]
+                consultas = self.consultas_escritura(ruta, url, cuerpo)
+                self.assertLessEqual(consultas, self.PRESUPUESTOS[clave], f'{clave}: presupuesto excedido')
+
+    @override_settings(MANTENIMIENTO_LISTADOS_VALORES=False)
+    def test_detecta_consultas_por_fila(self):
+        original = OrdenListSerializer.to_representation
+
+        def con_consulta(serializer, instancia):
+            # Simula un campo que consulta la base por cada fila
+            Orden.objects.filter(pk=instancia.pk).exists()
+            return original(serializer, instancia)
+
+        with mock.patch.object(OrdenListSerializer, 'to_representation', con_consulta):
+            pocas, muchas = [self.consultas('/api/ordenes/', tamano) for tamano in self.TAMANOS_PAGINA]
+        self.assertEqual(muchas - pocas, self.TAMANOS_PAGINA[1] - self.TAMANOS_PAGINA[0])
+
+
+class VistasAsyncTests(TestCase):
+    """Las rutas de /api/async/ responden lo mismo que las síncronas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        datos_sinteticos.poblar(
+            {'empresas': 3, 'equipos': 30, 'tecnicos': 12, 'planes': 40, 'ordenes': 120},
+            tamano_lote=100,
+        )
+
+    def setUp(self):
+        cache_respuestas.obtener_cache().clear()
+        metricas.reiniciar()
+        self.muestras = benchmark.muestras()
+
+    async def comparar(self, ruta, estado=200):
+        sincrona = await sync_to_async(self.client.get)(f'/api/{ruta}')
+        asincrona = await self.async_client.get(f'/api/async/{ruta}')
+        self.assertEqual(asincrona.status_code, estado, ruta)
+        self.assertEqual(sincrona.status_code, estado, ruta)
+        datos = json.loads(asincrona.content)
+        esperado = json.loads(sincrona.content)
+        for enlace in ('next', 'previous'):
+            # Los enlaces de paginación apuntan a la misma ruta asíncrona
+            if isinstance(esperado, dict) and esperado.get(enlace):
+                esperado[enlace] = esperado[enlace].replace('/api/', '/api/async/')
+        self.assertEqual(datos, esperado, ruta)
+        return datos
+
+    async def test_listados(self):
+        for prefijo in ('empresas', 'equipos', 'tecnicos', 'planes', 'ordenes'):
+            datos = await self.comparar(f'{prefijo}/')
+            self.assertTrue(datos['results'])
+            await self.comparar(f'{prefijo}/?page=2&page_size=2')
+            await self.comparar(f'{prefijo}/?page=last&ordering=-fecha_creacion')
+        await self.comparar('equipos/?ordering=nombre&page=2')
+        await self.comparar('ordenes/?paginacion=cursor&page_size=5')
+        equipo = await Equipo.objects.aget(pk=self.muestras['equipo'])
+        await self.comparar(f'equipos/?search={equipo.codigo}')
+        await self.comparar('ordenes/?page=999', estado=404)
+
+    async def test_detalles_y_estadisticas(self):
+        for prefijo, basename in [('empresas', 'empresa'), ('equipos', 'equipo'), ('tecnicos', 'tecnico'),
+                                  ('planes', 'plan'), ('ordenes', 'orden')]:
+            await self.comparar(f"{prefijo}/{self.muestras[basename]}/")
+        await self.comparar('ordenes/999999/', estado=404)
+        datos = await self.comparar(f"empresas/{self.muestras['empresa']}/estadisticas/")
+        self.assertGreater(datos['total_ordenes'], 0)
+        await self.comparar(f"equipos/{self.muestras['equipo']}/estadisticas/")
+        await self.comparar('equipos/999999/estadisticas/', estado=404)
+
+    async def test_solo_lectura_y_autenticacion(self):
+        self.assertEqual((await self.async_client.post('/api/async/equipos/')).status_code, 405)
+        respuesta = await self.async_client.get('/api/async/equipos/', headers={'Authorization': 'Bearer invalido'})
+        self.assertEqual(respuesta.status_code, 401)
+
+    async def test_peticiones_concurrentes_y_metricas(self):
+        urls = [f'/api/async/ordenes/?page={pagina}' for pagina in range(1, 6)]
+        respuestas = await asyncio.gather(*(self.async_client.get(url) for url in urls))
+        self.assertEqual([respuesta.status_code for respuesta in respuestas], [200] * 5)
+        texto = metricas.exponer()
+        self.assertIn(
+            'mantenimiento_peticiones_total{vista="OrdenViewSetAsync",accion="list",metodo="GET",estado="200"} 5',
+            texto,
+        )
+
+
+class ListadosValoresTests(TestCase):
+    """Los listados servidos con values_list() responden igual que los serializadores"""
+
+    @classmethod
+    def setUpTestData(cls):
+        datos_sinteticos.poblar(
+            {'empresas': 3, 'equipos': 30, 'tecnicos': 12, 'planes': 40, 'ordenes': 150},
+            tamano_lote=100,
+        )
+        # Órdenes sin técnico ni plan y con decimales: columnas nulas de los JOIN
+        Orden.objects.filter(pk__in=Orden.objects.order_by('pk').values('pk')[:10]).update(
+            tecnico_asignado=None, plan=None, horas_trabajadas=Decimal('2.5'), costo_real=Decimal('1200'),
+        )
+
+    def setUp(self):
+        cache_respuestas.obtener_cache().clear()
+        self.muestras = benchmark.muestras()
+
+    def comparar(self, url):
+        with override_settings(MANTENIMIENTO_LISTADOS_VALORES=False):
+            esperado = self.client.get(url)
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200, url)
+        self.assertEqual(esperado.status_code, 200, url)
+        datos = json.loads(respuesta.content)
+        self.assertEqual(datos, json.loads(esperado.content), url)
+        return datos
+
+    def test_mismo_json_que_los_serializadores(self):
+        muestras = self.muestras
+        urls = [
+            '/api/equipos/', '/api/equipos/?page=2&ordering=nombre', '/api/equipos/operativos/',
+            f"/api/equipos/por_empresa/?empresa={muestras['empresa']}",
+            '/api/ordenes/?page_size=100', '/api/ordenes/?page=2&ordering=prioridad',
+            '/api/ordenes/pendientes/', '/api/ordenes/urgentes/', '/api/ordenes/vencidas/',
+            f"/api/ordenes/por_empresa/?empresa={muestras['empresa']}",
+            f"/api/ordenes/por_equipo/?equipo={muestras['equipo']}",
+            f"/api/ordenes/por_plan/?plan={muestras['plan']}",
+            f"/api/ordenes/por_tecnico/?tecnico={muestras['tecnico']}&page_size=100",
+            '/api/ordenes/?fields=id,tecnico_nombre,costo_real',
+            '/api/equipos/?fields=id,estado_display&search=bomba',
+            '/api/ordenes/?expand=equipo',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertTrue(self.comparar(url)['results'])
+
+    def test_paginacion_por_cursor(self):
+        datos = self.comparar('/api/ordenes/?paginacion=cursor&page_size=7')
+        siguiente = self.comparar(datos['next'])
+        self.comparar(siguiente['previous'])
+
+    def test_no_instancia_modelos(self):
+        with mock.patch.object(OrdenListSerializer, 'to_representation') as serializar:
+            self.assertEqual(self.client.get('/api/ordenes/').status_code, 200)
+        serializar.assert_not_called()
+
+    def test_conteo_sin_joins_de_las_columnas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get('/api/ordenes/?page_size=5')
+        self.assertEqual(respuesta.data['count'], Orden.objects.count())
+        conteos = [q['sql'] for q in consultas.captured_queries if 'COUNT(*)' in q['sql']]
+        self.assertEqual(len(conteos), 1)
+        self.assertNotIn('JOIN', conteos[0])
+
+    def test_serializadores_no_traducibles(self):
+        from .listados_valores import compilar
+        from .serializers import EquipoDetailSerializer, TecnicoDetailSerializer, TecnicoSerializer
+
+        self.assertIsNotNone(compilar(OrdenListSerializer()))
+        self.assertIsNotNone(compilar(TecnicoSerializer()))
+        # Colecciones anidadas y relaciones a muchos usan el serializador normal
+        self.assertIsNone(compilar(EquipoDetailSerializer()))
+        self.assertIsNone(compilar(TecnicoDetailSerializer()))
+
+
+class JSONRapidoTests(TestCase):
+    """JSONRapidoRenderer y JSONRapidoParser producen lo mismo que los de DRF"""
+
+    @classmethod
+    def setUpTestData(cls):
+        datos_sinteticos.poblar(
+            {'empresas': 2, 'equipos': 12, 'tecnicos': 6, 'planes': 15, 'ordenes': 80},
+            tamano_lote=100,
+        )
+
+    def setUp(self):
+        cache_respuestas.obtener_cache().clear()
+
+    def render(self, datos, **kwargs):
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import JSONRapidoRenderer
+
+        return JSONRenderer().render(datos, **kwargs), JSONRapidoRenderer().render(datos, **kwargs)
+
+    def test_respuestas_identicas_byte_a_byte(self):
+        from rest_framework.renderers import JSONRenderer
+
+        muestras = benchmark.muestras()
+        urls = ['/api/ordenes/?page_size=100', f"/api/ordenes/{muestras['orden']}/",
+                f"/api/empresas/{muestras['empresa']}/", f"/api/empresas/{muestras['empresa']}/estadisticas/",
+                '/api/equipos/?expand=empresa', '/api/tecnicos/', '/api/planes/']
+        for url in urls:
+            with self.subTest(url=url):
+                respuesta = self.client.get(url)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertEqual(respuesta['Content-Type'], 'application/json')
+                self.assertEqual(respuesta.content, JSONRenderer().render(respuesta.data))
+
+    def test_tipos_nativos_y_escapes(self):
+        datos = {
+            'texto': 'Ñandú \u2028 línea \u2029 "comillas" \\ \x00 😀',
+            'decimal': Decimal('1200.50'),
+            'fecha': datetime.date(2024, 3, 1),
+            'utc': datetime.datetime(2024, 3, 1, 10, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            'utc_sin_micro': timezone.make_aware(datetime.datetime(2024, 3, 1, 10, 30)),
+            'ingenua': datetime.datetime(2024, 3, 1, 10, 30),
+            'desfase': datetime.datetime(2024, 3, 1, tzinfo=datetime.timezone(timedelta(hours=-3))),
+            'duracion': timedelta(hours=2),
+            'numpy': np.array([1, 2]),
+            'claves': {1: 'uno', None: 'nada'},
+            'tupla': (1, 2.5, None, True),
+            'vacios': [[], {}],
+        }
+        for contexto in ({}, {'indent': 2}):
+            drf, rapido = self.render(datos, renderer_context=contexto)
+            self.assertEqual(rapido, drf)
+        self.assertIn(b'\\u2028', drf)
+        self.assertEqual(self.render(None), (b'', b''))
+
+    def test_float_en_notacion_exponencial_mismo_valor(self):
+        drf, rapido = self.render({'valores': [1e16, 1e-7, 0.1]})
+        self.assertEqual(json.loads(rapido), json.loads(drf))
+
+    def test_usa_drf_cuando_orjson_no_aplica(self):
+        from . import renderers
+
+        datos = {'grande': 2 ** 70, 'texto': 'ñ'}
+        self.assertEqual(*self.render(datos))
+        # Indentación que orjson no soporta
+        self.assertEqual(*self.render({'a': [1]}, accepted_media_type='application/json; indent=4'))
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(*self.render({'fecha': datetime.date(2024, 1, 1), 'texto': 'ñ'}))
+
+    def test_parser(self):
+        from rest_framework.exceptions import ParseError
+        from rest_framework.parsers import JSONParser
+        from . import parsers
+
+        def ambos(contenido, **contexto):
+            resultados = []
+            for parser in (JSONParser(), parsers.JSONRapidoParser()):
+                try:
+                    resultados.append(parser.parse(io.BytesIO(contenido), parser_context=contexto))
+                except ParseError as error:
+                    resultados.append(('error', str(error.detail)))
+            return resultados
+
+        for contenido in (
+            '{"a": [1, 2.5, null, true], "b": "ñ\\u2028", "c": {"d": -9223372036854775808}}'.encode(),
+            b'[]', b'{"a": 1,}', b'{"a": NaN}', b'', '{"a": "ñ"}'.encode('latin-1'),
+        ):
+            with self.subTest(contenido=contenido):
+                drf, rapido = ambos(contenido)
+                self.assertEqual(rapido, drf)
+        drf, rapido = ambos('{"a": "ñ"}'.encode('latin-1'), encoding='latin-1')
+        self.assertEqual(rapido, drf)
+        with mock.patch.object(parsers, 'orjson', None):
+            self.assertEqual(*ambos(b'{"a": [1, 2]}'))
+
+    def test_escritura_con_json(self):
+        usuario = User.objects.create_user('json', password='x')
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        empresa = Empresa.objects.first()
+        respuesta = cliente.patch(
+            f'/api/empresas/{empresa.pk}/', data=json.dumps({'nombre': 'Renombrada ñ'}),
+            content_type='application/json',
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(json.loads(respuesta.content)['nombre'], 'Renombrada ñ')
+        respuesta = cliente.patch(f'/api/empresas/{empresa.pk}/', data='{"nombre":', content_type='application/json')
+        self.assertEqual(respuesta.status_code, 400)
+
+
+@override_settings(MANTENIMIENTO_CACHE_TIMEOUT=0)
+class DashboardTests(TestCase):
+    """/api/dashboard/ coincide con las consultas por empresa y usa un número fijo de consultas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        datos_sinteticos.poblar(
+            {'empresas': 3, 'equipos': 30, 'tecnicos': 6, 'planes': 40, 'ordenes': 150},
+            tamano_lote=100, indice_busqueda=False,
+        )
+        cls.ahora = timezone.now()
+        ordenes = list(Orden.objects.order_by('pk')[:4])
+        inicio_mes = timezone.localdate().replace(day=1)
+        Orden.objects.filter(pk__in=[orden.pk for orden in ordenes[:2]]).update(
+            estado='completada', fecha_termino=cls.ahora, costo_real=Decimal('100.50'), horas_trabajadas=Decimal('2'),
+        )
+        # Completada el mes anterior: no cuenta en el mes en curso
+        Orden.objects.filter(pk=ordenes[2].pk).update(
+            estado='completada', fecha_termino=timezone.make_aware(
+                datetime.datetime.combine(inicio_mes - timedelta(days=1), datetime.time(12))
+            ),
+        )
+        Orden.objects.filter(pk=ordenes[3].pk).update(
+            estado='programada', prioridad='urgente', fecha_programada=cls.ahora - timedelta(days=3),
+        )
+        cls.inactiva = crear_empresa(nombre='Inactiva', rut='99999999-9', activa=False)
+        crear_equipo(cls.inactiva, codigo='EQ-INACTIVA')
+
+    def setUp(self):
+        cache_respuestas.obtener_cache().clear()
+
+    def panel(self, parametros=''):
+        respuesta = self.client.get(f'/api/dashboard/{parametros}')
+        self.assertEqual(respuesta.status_code, 200)
+        return json.loads(respuesta.content)
+
+    def test_coincide_con_consultas_por_empresa(self):
+        datos = self.panel('?dias=60&limite=3')
+        activas = list(Empresa.objects.filter(activa=True).order_by('nombre'))
+        self.assertEqual([fila['empresa'] for fila in datos['empresas']], [empresa.pk for empresa in activas])
+
+        hoy = timezone.localdate()
+        inicio_mes = timezone.make_aware(datetime.datetime.combine(hoy.replace(day=1), datetime.time.min))
+        for fila, empresa in zip(datos['empresas'], activas):
+            ordenes = Orden.objects.filter(empresa=empresa)
+            equipos = Equipo.objects.filter(empresa=empresa)
+            self.assertEqual(fila['equipos']['total'], equipos.count())
+            for estado, total in fila['equipos']['por_estado'].items():
+                self.assertEqual(total, equipos.filter(estado=estado).count(), estado)
+            self.assertEqual(fila['ordenes'], {
+                'abiertas': ordenes.filter(estado__in=Orden.ESTADOS_ABIERTOS).count(),
+                'vencidas': ordenes.filter(
+                    estado__in=['programada', 'pendiente'], fecha_programada__lt=timezone.now()
+                ).count(),
+                'urgentes': ordenes.filter(estado__in=Orden.ESTADOS_ABIERTOS, prioridad='urgente').count(),
+            })
+            del_mes = ordenes.filter(estado='completada', fecha_termino__gte=inicio_mes)
+            sumas = del_mes.aggregate(costo=Sum('costo_real'), horas=Sum('horas_trabajadas'))
+            self.assertEqual(fila['mes']['ordenes_completadas'], del_mes.count())
+            self.assertEqual(Decimal(fila['mes']['costo']), sumas['costo'] or 0)
+            self.assertEqual(Decimal(fila['mes']['horas']), sumas['horas'] or 0)
+
+            planes = Plan.objects.filter(
+                empresa=empresa, activo=True, fecha_proximo_mantenimiento__range=(hoy, hoy + timedelta(days=60))
+            ).order_by('fecha_proximo_mantenimiento', 'pk')
+            proximos = fila['proximos_mantenimientos']
+            self.assertEqual(proximos['total'], planes.count())
+            self.assertEqual([plan['plan'] for plan in proximos['planes']], [plan.pk for plan in planes[:3]])
+
+        self.assertGreaterEqual(sum(fila['mes']['ordenes_completadas'] for fila in datos['empresas']), 2)
+        self.assertGreaterEqual(sum(fila['ordenes']['urgentes'] for fila in datos['empresas']), 1)
+
+    def test_consultas_constantes(self):
+        with CaptureQueriesContext(connection) as pocas:
+            self.panel()
+        datos_sinteticos.poblar(
+            {'empresas': 5, 'equipos': 20, 'tecnicos': 4, 'planes': 20, 'ordenes': 60},
+            prefijo='DASH', tamano_lote=100, indice_busqueda=False,
+        )
+        with CaptureQueriesContext(connection) as muchas:
+            datos = self.panel()
+        self.assertEqual(len(datos['empresas']), Empresa.objects.filter(activa=True).count())
+        self.assertEqual(len(pocas), 5)
+        self.assertEqual(len(muchas), len(pocas))
+
+    def test_parametros_invalidos(self):
+        respuesta = self.client.get('/api/dashboard/?dias=-1&limite=0')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(set(json.loads(respuesta.content)), {'dias', 'limite'})
+
+    @override_settings(MANTENIMIENTO_CACHE_TIMEOUT=300, MANTENIMIENTO_DASHBOARD_TIMEOUT=30)
+    def test_cache_con_vigencia_corta(self):
+        with mock.patch.object(cache_respuestas.obtener_cache(), 'set', wraps=cache_respuestas.obtener_cache().set) as guardar:
+            self.assertEqual(self.client.get('/api/dashboard/')['X-Cache'], 'MISS')
+        self.assertEqual(guardar.call_args.kwargs['timeout'], 30)
+        self.assertEqual(self.client.get('/api/dashboard/')['X-Cache'], 'HIT')
+
+        orden = Orden.objects.first()
+        orden.prioridad = 'urgente'
+        orden.save()
+        self.assertEqual(self.client.get('/api/dashboard/')['X-Cache'], 'MISS')
+
+
+class ConfiabilidadTests(TestCase):
+    """MTBF, MTTR y disponibilidad desde los intervalos de las órdenes correctivas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hasta = timezone.make_aware(datetime.datetime(2026, 6, 1))
+        cls.empresa = crear_empresa()
+        cls.equipo = crear_equipo(cls.empresa, fecha_instalacion=datetime.date(2025, 1, 1))
+        cls.nuevo = crear_equipo(cls.empresa, codigo='EQ-002', tipo='Motor', fecha_instalacion=datetime.date(2026, 5, 22))
+        preventivo = Plan.objects.create(
+            empresa=cls.empresa, equipo=cls.equipo, nombre='Plan', frecuencia='mensual',
+            tareas='Revisar', fecha_inicio=datetime.date(2025, 1, 1),
+        )
+
+        def falla(inicio, horas=None, estado='completada', **kwargs):
+            orden = crear_orden(cls.empresa, cls.equipo, **kwargs)
+            inicio = cls.hasta - inicio
+            termino = None if horas is None else inicio + timedelta(hours=horas)
+            Orden.objects.filter(pk=orden.pk).update(estado=estado, fecha_inicio=inicio, fecha_termino=termino)
+
+        falla(timedelta(days=20), 10)
+        # Superpuestas: 6 horas detenido, 8 horas de reparación
+        falla(timedelta(days=10), 4)
+        falla(timedelta(days=10, hours=-2), 4)
+        # Abierta: detenido hasta el corte, sin reparación
+        falla(timedelta(hours=1), estado='en_progreso')
+        falla(timedelta(days=60), 2)
+        # Comienza antes de la ventana de 30 días y termina dentro de ella
+        falla(timedelta(days=31), 48)
+        # No son fallas: preventiva y cancelada
+        falla(timedelta(days=5), 3, plan=preventivo)
+        falla(timedelta(days=4), 3, estado='cancelada')
+
+    def setUp(self):
+        cache_respuestas.obtener_cache().clear()
+
+    def test_indicadores_exactos(self):
+        resultado = confiabilidad.evaluar(
+            Equipo.objects.filter(pk=self.equipo.pk), ventanas=(30, 90), hasta=self.hasta
+        )
+        treinta, noventa = resultado['grupos'][0]['ventanas']
+        self.assertEqual(treinta, {
+            'dias': 30, 'fallas': 4, 'reparaciones': 3,
+            'horas_operacion': 679.0, 'horas_detencion': 41.0,
+            'mtbf_horas': 169.75, 'mttr_horas': 6.0,
+            'disponibilidad': round(679 / 720, 4), 'tasa_fallas': round(4 / 679 * 1000, 4),
+        })
+        self.assertEqual(noventa, {
+            'dias': 90, 'fallas': 6, 'reparaciones': 5,
+            'horas_operacion': 2093.0, 'horas_detencion': 67.0,
+            'mtbf_horas': round(2093 / 6, 2), 'mttr_horas': 13.6,
+            'disponibilidad': round(2093 / 2160, 4), 'tasa_fallas': round(6 / 2093 * 1000, 4),
+        })
+
+    def test_equipo_sin_fallas_desde_su_instalacion(self):
+        resultado = confiabilidad.evaluar(Equipo.objects.filter(pk=self.nuevo.pk), ventanas=(30,), hasta=self.hasta)
+        ventana = resultado['grupos'][0]['ventanas'][0]
+        self.assertEqual(ventana['horas_operacion'], 240.0)
+        self.assertEqual(ventana['disponibilidad'], 1.0)
+        self.assertEqual(ventana['tasa_fallas'], 0.0)
+        self.assertIsNone(ventana['mtbf_horas'])
+        self.assertIsNone(ventana['mttr_horas'])
+
+    def test_grupos_suman_los_equipos(self):
+        datos_sinteticos.poblar(
+            {'empresas': 3, 'equipos': 30, 'tecnicos': 6, 'planes': 30, 'ordenes': 300},
+            prefijo='CONF', tamano_lote=100, indice_busqueda=False,
+        )
+        hasta = timezone.now()
+        por_equipo = confiabilidad.evaluar(agrupar='equipo', hasta=hasta)
+        fallas = {grupo['grupo']: grupo['ventanas'][-1]['fallas'] for grupo in por_equipo['grupos']}
+        self.assertGreater(sum(fallas.values()), 0)
+        self.assertEqual(por_equipo['flota'][-1]['fallas'], sum(fallas.values()))
+
+        empresas = dict(Equipo.objects.values_list('pk', 'empresa_id'))
+        for grupo in confiabilidad.evaluar(agrupar='empresa', hasta=hasta)['grupos']:
+            esperadas = sum(total for pk, total in fallas.items() if empresas[pk] == grupo['grupo'])
+            self.assertEqual(grupo['ventanas'][-1]['fallas'], esperadas)
+
+        desde = hasta - timedelta(days=365)
+        self.assertEqual(
+            por_equipo['flota'][-1]['fallas'],
+            confiabilidad.fallas().filter(fecha_inicio__gte=desde, fecha_inicio__lt=hasta).count(),
+        )
+
+    def test_endpoint_equipo(self):
+        respuesta = self.client.get(
+            f'/api/equipos/{self.equipo.pk}/confiabilidad/', {'ventanas': '90,30', 'hasta': self.hasta.isoformat()}
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        datos = json.loads(respuesta.content)
+        self.assertEqual(datos['equipo'], self.equipo.pk)
+        self.assertEqual([ventana['dias'] for ventana in datos['ventanas']], [30, 90])
+        self.assertEqual(datos['ventanas'][0]['mtbf_horas'], 169.75)
+
+        self.assertEqual(self.client.get('/api/equipos/999999/confiabilidad/').status_code, 404)
+        respuesta = self.client.get(f'/api/equipos/{self.equipo.pk}/confiabilidad/', {'ventanas': 'abc'})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('ventanas', json.loads(respuesta.content))
+
+    def test_endpoint_flota(self):
+        parametros = {'ventanas': '30', 'hasta': self.hasta.isoformat()}
+        datos = json.loads(self.client.get('/api/equipos/confiabilidad/', {**parametros, 'agrupar': 'tipo'}).content)
+        self.assertEqual(datos['agrupar'], 'tipo')
+        self.assertEqual([grupo['grupo'] for grupo in datos['grupos']], ['Bomba', 'Motor'])
+        self.assertEqual(datos['flota'][0]['fallas'], 4)
+        self.assertEqual(datos['flota'][0]['horas_operacion'], 679.0 + 240.0)
+
+        respuesta = self.client.get('/api/equipos/confiabilidad/', {**parametros, 'agrupar': 'equipo', 'page_size': 1})
+        datos = json.loads(respuesta.content)
+        self.assertEqual(datos['count'], 2)
+        self.assertEqual(len(datos['results']), 1)
+        self.assertEqual(datos['flota'][0]['fallas'], 4)
+
+        respuesta = self.client.get('/api/equipos/confiabilidad/', {'agrupar': 'planta'})
+        self.assertEqual(respuesta.status_code, 400)
+
+
+    @override_settings(MANTENIMIENTO_CACHE_TIMEOUT=300, MANTENIMIENTO_DASHBOARD_TIMEOUT=30)
+    def test_cache_con_vigencia_corta(self):
+        cache = cache_respuestas.obtener_cache()
+        for url in (f'/api/equipos/{self.equipo.pk}/confiabilidad/', '/api/equipos/confiabilidad/'):
+            with mock.patch.object(cache, 'set', wraps=cache.set) as guardar:
+                self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+            self.assertEqual(guardar.call_args.kwargs['timeout'], 30)
+            self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+class PronosticoTests(TestCase):
+    """Próxima fecha de los planes predictivos desde los tiempos entre fallas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = crear_empresa()
+        cls.equipo = crear_equipo(cls.empresa)
+        cls.sin_fallas = crear_equipo(cls.empresa, codigo='EQ-002')
+        cls.hoy = timezone.localdate()
+        cls.inicio = timezone.now() - timedelta(days=200)
+
+        def plan(equipo, nombre, tipo='predictivo'):
+            return Plan.objects.create(
+                empresa=cls.empresa, equipo=equipo, nombre=nombre, tipo=tipo, frecuencia='mensual',
+                tareas='Medir vibraciones', fecha_inicio=datetime.date(2025, 1, 1),
+                fecha_proximo_mantenimiento=cls.hoy + timedelta(days=30),
+            )
+
+        cls.predictivo = plan(cls.equipo, 'Vibraciones')
+        cls.preventivo = plan(cls.equipo, 'Lubricación', tipo='preventivo')
+        cls.predictivo_sin_fallas = plan(cls.sin_fallas, 'Termografía')
+        cls.dias_fallas = [0, 20, 55, 70, 110, 130]
+        for dias in cls.dias_fallas:
+            cls.falla(cls.equipo, cls.inicio + timedelta(days=dias))
+
+    @classmethod
+    def falla(cls, equipo, inicio, **kwargs):
+        orden = crear_orden(cls.empresa, equipo, **kwargs)
+        Orden.objects.filter(pk=orden.pk).update(
+            estado='completada', fecha_inicio=inicio, fecha_termino=inicio + timedelta(hours=5),
+        )
+        return orden
+
+    def test_ajuste_recupera_parametros(self):
+        rng = np.random.default_rng(7)
+        parametros = [(0.8, 15.0), (2.0, 40.0), (3.5, 90.0)]
+        equipos, inicios = [], []
+        for i, (forma, escala) in enumerate(parametros):
+            intervalos = escala * rng.weibull(forma, size=2000)
+            equipos.append(np.full(len(intervalos) + 1, i))
+            inicios.append(np.concatenate(([0.0], np.cumsum(intervalos))) * 86400)
+        forma, escala, n, weibull = pronostico.ajustar(np.concatenate(equipos), np.concatenate(inicios), 4)
+        self.assertEqual(n.tolist(), [2000, 2000, 2000, 0])
+        self.assertEqual(weibull.tolist(), [True, True, True, False])
+        for i, (esperada, escala_esperada) in enumerate(parametros):
+            self.assertAlmostEqual(forma[i], esperada, delta=esperada * 0.1)
+            self.assertAlmostEqual(escala[i], escala_esperada, delta=escala_esperada * 0.1)
+        self.assertTrue(np.isnan(forma[3]) and np.isnan(escala[3]))
+
+    def test_pocos_intervalos_usan_exponencial(self):
+        forma, escala, n, weibull = pronostico.ajustar(
+            np.array([0, 0, 0, 1]), np.array([0.0, 10.0, 40.0, 5.0]) * 86400, 2
+        )
+        self.assertEqual(n.tolist(), [2, 0])
+        self.assertFalse(weibull[0])
+        self.assertEqual((forma[0], escala[0]), (1.0, 20.0))
+        self.assertTrue(np.isnan(escala[1]))
+
+    @override_settings(MANTENIMIENTO_PRONOSTICO_CONFIABILIDAD=0.5)
+    def test_pronostico_desde_la_ultima_falla(self):
+        # Con hoy en el pasado la propuesta no se acota a la fecha actual
+        hoy = timezone.localdate(self.inicio)
+        propuestas = pronostico.calcular([self.equipo.pk, self.sin_fallas.pk], hoy=hoy)
+        self.assertEqual([propuesta['plan'] for propuesta in propuestas],
+                         [self.predictivo.pk, self.predictivo_sin_fallas.pk])
+        propuesta, sin_fallas = propuestas
+
+        intervalos = np.diff(self.dias_fallas)
+        forma, escala, n, _ = pronostico.ajustar(np.zeros(len(self.dias_fallas), dtype=int),
+                                                 np.array(self.dias_fallas, dtype=float) * 86400, 1)
+        self.assertEqual(propuesta['intervalos'], len(intervalos))
+        self.assertEqual(propuesta['modelo'], 'weibull')
+        self.assertEqual(propuesta['forma'], round(float(forma[0]), 4))
+        ultima = self.inicio + timedelta(days=self.dias_fallas[-1], hours=5)
+        dias = pronostico.dias_hasta_objetivo(forma[0], escala[0], 0.5)
+        esperada = timezone.localdate(ultima + timedelta(days=float(dias)))
+        self.assertLessEqual(abs((propuesta['propuesta'] - esperada).days), 1)
+        self.assertIsNone(sin_fallas['propuesta'])
+
+        # Una ejecución posterior del plan renueva el equipo
+        ejecucion = crear_orden(self.empresa, self.equipo, plan=self.predictivo)
+        Orden.objects.filter(pk=ejecucion.pk).update(estado='completada', fecha_termino=ultima + timedelta(days=40))
+        posterior = pronostico.calcular([self.equipo.pk], hoy=hoy)[0]
+        self.assertEqual((posterior['propuesta'] - propuesta['propuesta']).days, 40)
+
+    def test_pronosticar_guarda_solo_los_planes_predictivos(self):
+        resultado = pronostico.pronosticar(tamano_lote=1)
+        self.assertEqual(resultado, {'planes': 2, 'weibull': 1, 'exponencial': 0, 'sin_datos': 1, 'actualizados': 1})
+        propuesta = pronostico.calcular([self.equipo.pk])[0]['propuesta']
+        self.predictivo.refresh_from_db()
+        self.preventivo.refresh_from_db()
+        self.predictivo_sin_fallas.refresh_from_db()
+        self.assertEqual(self.predictivo.fecha_proximo_mantenimiento, propuesta)
+        self.assertEqual(self.preventivo.fecha_proximo_mantenimiento, self.hoy + timedelta(days=30))
+        self.assertEqual(self.predictivo_sin_fallas.fecha_proximo_mantenimiento, self.hoy + timedelta(days=30))
+        # Sin cambios no se vuelve a escribir
+        self.assertEqual(pronostico.pronosticar()['actualizados'], 0)
+
+    def test_comando_simular(self):
+        salida = StringIO()
+        call_command('pronosticar_planes', '--simular', stdout=salida)
+        self.assertIn('2 planes predictivos evaluados', salida.getvalue())
+        self.predictivo.refresh_from_db()
+        self.assertEqual(self.predictivo.fecha_proximo_mantenimiento, self.hoy + timedelta(days=30))
+
+    def test_completar_falla_actualiza_el_plan(self):
+        orden = crear_orden(self.empresa, self.equipo, estado='en_progreso',
+                            fecha_inicio=self.inicio + timedelta(days=160))
+        orden = Orden.objects.get(pk=orden.pk)
+        orden.estado = 'completada'
+        orden.fecha_termino = orden.fecha_inicio + timedelta(hours=3)
+        orden.save()
+        self.predictivo.refresh_from_db()
+        self.assertEqual(
+            self.predictivo.fecha_proximo_mantenimiento, pronostico.calcular([self.equipo.pk])[0]['propuesta']
+        )
+        self.assertEqual(pronostico.calcular([self.equipo.pk])[0]['intervalos'], len(self.dias_fallas))
+
+    def test_solo_las_fallas_completadas_disparan_el_pronostico(self):
+        with mock.patch.object(pronostico, 'actualizar_equipos') as actualizar:
+            crear_orden(self.empresa, self.equipo, plan=self.preventivo, estado='completada')
+            crear_orden(self.empresa, self.equipo, estado='en_progreso')
+            with override_settings(MANTENIMIENTO_PRONOSTICO_AUTOMATICO=False):
+                crear_orden(self.empresa, self.equipo, estado='completada')
+            actualizar.assert_not_called()
+            crear_orden(self.empresa, self.equipo, estado='completada')
+            actualizar.assert_called_once_with([self.equipo.pk])
+
+    def test_completar_una_ejecucion_predictiva_dispara_el_pronostico(self):
+        orden = crear_orden(self.empresa, self.equipo, plan=self.predictivo, estado='en_progreso',
+                            fecha_inicio=self.inicio + timedelta(days=150))
+        orden = Orden.objects.get(pk=orden.pk)
+        with mock.patch.object(pronostico, 'actualizar_equipos') as actualizar:
+            orden.estado = 'completada'
+            orden.fecha_termino = orden.fecha_inicio + timedelta(hours=2)
+            orden.save()
+            # Volver a guardar una orden ya completada no recalcula
+            orden.save()
+        actualizar.assert_called_once_with([self.equipo.pk])
+
+    def test_operaciones_masivas_con_ejecuciones_predictivas(self):
+        en_progreso = crear_orden(self.empresa, self.equipo, plan=self.predictivo, estado='en_progreso')
+        with mock.patch.object(pronostico, 'actualizar_equipos') as actualizar:
+            transiciones.transicionar('completar', Orden.objects.all(), ids=[en_progreso.pk])
+        actualizar.assert_called_once_with({self.equipo.pk})
+
+        with mock.patch.object(pronostico, 'actualizar_equipos') as actualizar:
+            resultado = carga_masiva.cargar_ordenes([{
+                'empresa': self.empresa.pk, 'equipo': self.equipo.pk, 'plan': self.predictivo.pk,
+                'descripcion': 'Medición', 'fecha_programada': timezone.now(), 'estado': 'completada',
+            }])
+        self.assertEqual(resultado['creadas'], 1)
+        actualizar.assert_called_once_with({self.equipo.pk})
+
+    def test_transicion_masiva_actualiza_el_plan(self):
+        orden = crear_orden(self.empresa, self.equipo, estado='en_progreso')
+        with mock.patch.object(pronostico, 'actualizar_equipos') as actualizar:
+            transiciones.transicionar('completar', Orden.objects.all(), ids=[orden.pk])
+        actualizar.assert_called_once_with({self.equipo.pk})
@@ -0,0 +1,187 @@
+"""
+Transiciones de estado de las órdenes de trabajo.
+
+``TRANSICIONES`` define, para cada acción (``iniciar``, ``completar``,
+``pausar`` y ``cancelar``), el estado de destino, los estados de origen
+permitidos y el mensaje de error cuando la orden no puede transicionar.
+Lo usan las acciones individuales de ``OrdenViewSet`` y ``transicionar``,
+que aplica una acción a muchas órdenes:
+
+- Una consulta (con bloqueo de filas) lee el estado de todas las órdenes
+  y valida la transición de cada una.
+- Las órdenes válidas se actualizan con un ``UPDATE`` por lote de ids. Al
+  completar, ``horas_trabajadas`` se calcula en SQL desde ``fecha_inicio``
+  cuando no fue ingresada (``HorasEntre``).
+- Como ``update()`` no dispara señales, se recalculan los resúmenes de los
+  equipos afectados (y, al completar, las fechas de sus planes
+  predictivos) y se invalida la caché de respuestas.
+"""
+from decimal import Decimal
+
+from django.db import NotSupportedError, transaction
+from django.db.models import Case, DateTimeField, DecimalField, F, Func, Q, Value, When
+from django.utils import timezone
+
+from . import cache_respuestas, pronostico, rollups
+from .models import Orden
+
+ESTADOS = [estado for estado, _ in Orden.ESTADO_CHOICES]
+
+TRANSICIONES = {
+    'iniciar': {
+        'destino': 'en_progreso',
+        'origen': ['programada'],
+        'error': 'Solo se pueden iniciar órdenes programadas',
+    },
+    'completar': {
+        'destino': 'completada',
+        'origen': [estado for estado in ESTADOS if estado != 'completada'],
+        'error': 'La orden ya está completada',
+    },
+    'pausar': {
+        'destino': 'pausada',
+        'origen': ['en_progreso'],
+        'error': 'Solo se pueden pausar órdenes en progreso',
+    },
+    'cancelar': {
+        'destino': 'cancelada',
+        'origen': [estado for estado in ESTADOS if estado != 'completada'],
+        'error': 'No se puede cancelar una orden completada',
+    },
+}
+
+# Acciones que cambian el aporte de la orden al resumen de su equipo
+ACCIONES_ROLLUP = {'completar'}
+
+TAMANO_LOTE = 1000
+
+
+class HorasEntre(Func):
+    """Horas entre dos fechas (``inicio``, ``fin``) redondeadas a 2 decimales"""
+    arity = 2
+    output_field = DecimalField(max_digits=6, decimal_places=2)
+
+    def _compilar(self, compiler):
+        """SQL y parámetros de ``inicio`` y de ``fin``"""
+        return [compiler.compile(expresion) for expresion in self.get_source_expressions()]
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        (inicio, parametros_inicio), (fin, parametros_fin) = self._compilar(compiler)
+        sql = f'ROUND((julianday({fin}) - julianday({inicio})) * 24, 2)'
+        return sql, (*parametros_fin, *parametros_inicio)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        (inicio, parametros_inicio), (fin, parametros_fin) = self._compilar(compiler)
+        sql = f'ROUND(CAST(EXTRACT(EPOCH FROM ({fin} - {inicio})) / 3600 AS numeric), 2)'
+        return sql, (*parametros_fin, *parametros_inicio)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        (inicio, parametros_inicio), (fin, parametros_fin) = self._compilar(compiler)
+        sql = f'ROUND(TIMESTAMPDIFF(MICROSECOND, {inicio}, {fin}) / 3600000000, 2)'
+        return sql, (*parametros_inicio, *parametros_fin)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(f'HorasEntre no está implementado para {connection.vendor}')
+
+
+def validar(accion, estado):
+    """Mensaje de error si una orden en ``estado`` no admite ``accion``, o ``None``"""
+    transicion = TRANSICIONES[accion]
+    return None if estado in transicion['origen'] else transicion['error']
+
+
+def aplicar(orden, accion, ahora=None):
+    """
+    Aplica ``accion`` a una instancia en memoria (sin validar ni guardar) y
+    retorna los campos modificados para ``save(update_fields=...)``.
+    """
+    ahora = ahora or timezone.now()
+    orden.estado = TRANSICIONES[accion]['destino']
+    campos = ['estado', 'fecha_actualizacion']
+    if accion == 'iniciar':
+        orden.fecha_inicio = ahora
+        campos.append('fecha_inicio')
+    elif accion == 'completar':
+        orden.fecha_termino = ahora
+        campos.append('fecha_termino')
+        # Calcular horas si no están ingresadas
+        if not orden.horas_trabajadas and orden.fecha_inicio:
+            horas = Decimal((orden.fecha_termino - orden.fecha_inicio).total_seconds() / 3600)
+            orden.horas_trabajadas = horas.quantize(Decimal('0.01'))
+            campos.append('horas_trabajadas')
+    return campos
+
+
+def _cambios(accion, ahora):
+    """Asignaciones del ``UPDATE`` masivo equivalentes a ``aplicar``"""
+    cambios = {'estado': TRANSICIONES[accion]['destino'], 'fecha_actualizacion': ahora}
+    if accion == 'iniciar':
+        cambios['fecha_inicio'] = ahora
+    elif accion == 'completar':
+        cambios['fecha_termino'] = ahora
+        cambios['horas_trabajadas'] = Case(
+            When(
+                (Q(horas_trabajadas__isnull=True) | Q(horas_trabajadas=0)) & Q(fecha_inicio__isnull=False),
+                then=HorasEntre('fecha_inicio', Value(ahora, output_field=DateTimeField())),
+            ),
+            default=F('horas_trabajadas'),
+        )
+    return cambios
+
+
+def transicionar(accion, ordenes, ids=None):
+    """
+    Aplica ``accion`` a las órdenes de ``ordenes`` (queryset de Orden), o
+    solo a las de ``ids`` si se indican.
+
+    Retorna un diccionario con ``actualizadas``, ``errores`` y los
+    ``resultados`` por orden, ordenados por id. Los ids que no existen en
+    ``ordenes`` se informan como errores.
+    """
+    if accion not in TRANSICIONES:
+        raise ValueError(f'Acción inválida: {accion}')
+    if ids is not None:
+        ordenes = ordenes.filter(pk__in=ids)
+
+    ahora = timezone.now()
+    with transaction.atomic():
+        filas = list(
+            ordenes.select_for_update(of=('self',))
+            .order_by('pk')
+            .values_list('pk', 'estado', 'empresa_id', 'equipo_id')
+        )
+        validas, resultados = [], []
+        for pk, estado, empresa_id, equipo_id in filas:
+            error = validar(accion, estado)
+            if error:
+                resultados.append({'id': pk, 'ok': False, 'estado': estado, 'error': error})
+            else:
+                validas.append((pk, empresa_id, equipo_id))
+                resultados.append({'id': pk, 'ok': True, 'estado': TRANSICIONES[accion]['destino']})
+
+        cambios = _cambios(accion, ahora)
+        for inicio in range(0, len(validas), TAMANO_LOTE):
+            lote = [pk for pk, _, _ in validas[inicio:inicio + TAMANO_LOTE]]
+            Orden.objects.filter(pk__in=lote).update(**cambios)
+
+        if validas:
+            # update() no dispara señales: resúmenes y caché se actualizan aquí
+            if accion in ACCIONES_ROLLUP:
+                rollups.recalcular_equipos({equipo_id for _, _, equipo_id in validas})
+            if accion == 'completar' and pronostico.automatico():
+                pronostico.actualizar_equipos({equipo_id for _, _, equipo_id in validas})
+            etiquetas = cache_respuestas.etiquetas_ordenes(
+                (empresa_id, equipo_id) for _, empresa_id, equipo_id in validas
+            )
+            cache_respuestas.invalidar(etiquetas | {f'orden:{pk}' for pk, _, _ in validas})
+
+    encontradas = {fila[0] for fila in filas}
+    for pk in sorted(set(ids or ()) - encontradas):
+        resultados.append({'id': pk, 'ok': False, 'error': 'Orden no encontrada'})
+    resultados.sort(key=lambda resultado: resultado['id'])
+    return {
+        'accion': accion,
+        'actualizadas': len(validas),
+        'errores': len(resultados) - len(validas),
+        'resultados': resultados,
+    }
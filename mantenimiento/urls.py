@@ -1,8 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import vistas_async
 from .views import (
     EmpresaViewSet, EquipoViewSet, TecnicoViewSet,
-    PlanViewSet, OrdenViewSet
+    PlanViewSet, OrdenViewSet, EstadisticasCacheView, DashboardView
 )
 
 # Crear router y registrar ViewSets
@@ -15,6 +16,30 @@ router.register(r'ordenes', OrdenViewSet, basename='orden')
 
 app_name = 'mantenimiento'
 
+# Lecturas con el ORM asíncrono para servir con ASGI (ver vistas_async)
+RECURSOS_ASYNC = (
+    ('empresas', EmpresaViewSet, 'empresa'),
+    ('equipos', EquipoViewSet, 'equipo'),
+    ('tecnicos', TecnicoViewSet, 'tecnico'),
+    ('planes', PlanViewSet, 'plan'),
+    ('ordenes', OrdenViewSet, 'orden'),
+)
+
+urlpatterns_async = [
+    path('async/empresas/<int:pk>/estadisticas/', vistas_async.estadisticas_empresa(EmpresaViewSet),
+         name='async-empresa-estadisticas'),
+    path('async/equipos/<int:pk>/estadisticas/', vistas_async.estadisticas_equipo(EquipoViewSet),
+         name='async-equipo-estadisticas'),
+]
+for prefijo, viewset, basename in RECURSOS_ASYNC:
+    urlpatterns_async += [
+        path(f'async/{prefijo}/', vistas_async.listado(viewset), name=f'async-{basename}-list'),
+        path(f'async/{prefijo}/<int:pk>/', vistas_async.detalle(viewset), name=f'async-{basename}-detail'),
+    ]
+
 urlpatterns = [
+    path('cache/', EstadisticasCacheView.as_view(), name='cache-estadisticas'),
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    *urlpatterns_async,
     path('', include(router.urls)),
 ]
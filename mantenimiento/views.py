@@ -1,13 +1,28 @@
 from rest_framework import viewsets, status, filters
+from rest_framework.permissions import SAFE_METHODS, IsAdminUser
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.views import APIView
+from django.db import transaction
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Sum, Q
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
 from django.utils import timezone
 from datetime import timedelta
 
-from .models import Empresa, Equipo, Tecnico, Plan, Orden
+from . import (
+    asignacion, cache_respuestas, condicionales, confiabilidad, dashboard, listados_valores, programador,
+    transiciones,
+)
+from .cache_respuestas import cachear_respuesta, etiqueta_detalle, etiquetas_parametro
+from .carga_masiva import MODOS, MODO_PARCIAL, cargar_ordenes
+from .condicionales import etag_coincide, no_modificado, validadores_detalle, validadores_listado
+from .consultas import planificar_consulta
+from .estadisticas import anotar_estadisticas_empresa, datos_estadisticas_equipo, proximo_plan_activo
+from .exportacion import COLUMNAS_EQUIPO, COLUMNAS_ORDEN, FORMATOS, FORMATO_CSV, respuesta_exportacion
+from .filters import BusquedaTextoFilter
+from .models import Empresa, Equipo, EquipoEstadistica, Tecnico, Plan, Orden
+from .pagination import OrdenPagination, StandardResultsSetPagination
+from .parsers import JSONRapidoParser, NDJSONParser
 from .serializers import (
     EmpresaSerializer, EmpresaDetailSerializer,
     EquipoSerializer, EquipoDetailSerializer,
@@ -15,17 +30,175 @@ from .serializers import (
     PlanSerializer, PlanDetailSerializer,
     OrdenListSerializer, OrdenSerializer, OrdenDetailSerializer,
     OrdenCrearActualizarSerializer,
-    EstadisticasEmpresaSerializer, EstadisticasEquipoSerializer
+    EstadisticasEmpresaSerializer, EstadisticasEmpresaMultipleSerializer,
+    EstadisticasEquipoSerializer, GenerarOrdenesSerializer, AsignacionAutomaticaSerializer,
+    TransicionMasivaSerializer, DashboardParametrosSerializer, DashboardSerializer,
+    ConfiabilidadVentanasSerializer, ConfiabilidadParametrosSerializer,
+    ConfiabilidadEquipoSerializer, ConfiabilidadFlotaSerializer
 )
 
 
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+class ConsultaPlanificadaMixin:
+    """
+    Ajusta el queryset de cada acción de lectura con los select_related,
+    prefetch_related y only() que requiere su serializador.
+
+    Las acciones que no serializan el modelo (p. ej. estadísticas) se
+    excluyen con ``acciones_sin_planificacion``.
+    """
+    acciones_sin_planificacion = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if (self.request is None or self.request.method not in SAFE_METHODS
+                or self.action in self.acciones_sin_planificacion):
+            return queryset
+        return planificar_consulta(queryset, self.get_serializer())
+
+
+class PeticionCondicionalMixin:
+    """
+    Agrega ETag y Last-Modified al listado y al detalle, calculados con una
+    consulta de agregados antes de serializar (ver ``condicionales``).
+
+    - GET con If-None-Match / If-Modified-Since vigente: 304 sin serializar.
+    - PUT/PATCH con If-Match que no coincide con el detalle actual: 412.
+
+    Los filtros (búsqueda y orden) se aplican una vez por petición: los
+    validadores, la página y ``get_object`` usan el mismo queryset.
+    """
+
+    def _queryset_filtrado(self):
+        if not hasattr(self, '_filtrado'):
+            self._filtrado = self.filter_queryset(self.get_queryset())
+        return self._filtrado
+
+    def get_object(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        objeto = get_object_or_404(self._queryset_filtrado(), **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(self.request, objeto)
+        return objeto
+
+    def _serializer_detalle(self):
+        accion, self.action = self.action, 'retrieve'
+        try:
+            return self.get_serializer()
+        finally:
+            self.action = accion
+
+    def _validadores_detalle(self, request):
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return validadores_detalle(request, self._queryset_filtrado(), pk, self._serializer_detalle())
+
+    def _listar(self, queryset):
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self._queryset_filtrado()
+        if not condicionales.activos():
+            return self._listar(queryset)
+        validadores = validadores_listado(request, queryset, self.get_serializer())
+        if no_modificado(request, validadores):
+            return validadores.aplicar(Response(status=status.HTTP_304_NOT_MODIFIED))
+        return validadores.aplicar(self._listar(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not condicionales.activos():
+            return super().retrieve(request, *args, **kwargs)
+        validadores = self._validadores_detalle(request)
+        if validadores is None:
+            return super().retrieve(request, *args, **kwargs)
+        if no_modificado(request, validadores):
+            return validadores.aplicar(Response(status=status.HTTP_304_NOT_MODIFIED))
+        return validadores.aplicar(super().retrieve(request, *args, **kwargs))
+
+    def update(self, request, *args, **kwargs):
+        si_coincide = request.headers.get('If-Match')
+        with transaction.atomic():
+            if si_coincide is not None:
+                pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+                # Bloquea la fila para que nadie la modifique entre la comparación y el guardado
+                list(self.get_queryset().select_for_update().filter(pk=pk).values_list('pk'))
+                validadores = self._validadores_detalle(request)
+                if validadores is not None and not etag_coincide(si_coincide, validadores.etag):
+                    return Response(
+                        {'error': 'El recurso fue modificado; obtenga la versión actual'},
+                        status=status.HTTP_412_PRECONDITION_FAILED
+                    )
+            respuesta = super().update(request, *args, **kwargs)
+
+        if respuesta.status_code == status.HTTP_200_OK:
+            validadores = self._validadores_detalle(request)
+            if validadores is not None:
+                validadores.aplicar(respuesta)
+        return respuesta
+
+
+class ListadoValoresMixin:
+    """
+    Sirve los listados desde ``values_list()`` con el plan que
+    ``listados_valores.compilar`` arma desde el serializador de la acción,
+    sin instanciar modelos. Si el serializador no es traducible (p. ej. con
+    ``?expand=``) se usa el camino normal.
+
+    ``columnas_listado`` son las columnas que además necesita la paginación,
+    que cuenta el total sobre el queryset original: el COUNT no necesita los
+    JOIN de las columnas relacionadas. Las acciones de ``acciones_sin_planificacion`` no serializan el modelo y
+    paginan con el camino normal.
+    """
+    columnas_listado = ('pk',)
+
+    def _plan_valores(self):
+        if (self.request.method not in SAFE_METHODS or self.action == 'retrieve'
+                or self.action in getattr(self, 'acciones_sin_planificacion', ())
+                or not listados_valores.activos()):
+            return None
+        if not hasattr(self, '_plan_valores_compilado'):
+            self._plan_valores_compilado = listados_valores.compilar(self.get_serializer())
+        return self._plan_valores_compilado
+
+    def paginate_queryset(self, queryset):
+        plan = self._plan_valores()
+        if plan is None or self.paginator is None:
+            return super().paginate_queryset(queryset)
+        filas = plan.queryset(queryset, extra=self.columnas_listado)
+        return self.paginator.paginate_queryset(filas, self.request, view=self, conteo=queryset)
+
+    def get_serializer(self, *args, **kwargs):
+        plan = getattr(self, '_plan_valores_compilado', None)
+        if (plan is not None and kwargs.get('many') and args and isinstance(args[0], list)
+                and all(isinstance(fila, tuple) for fila in args[0][:1])):
+            return listados_valores.SerializadorValores(plan, args[0])
+        return super().get_serializer(*args, **kwargs)
+
+
+class ExportacionMixin:
+    """
+    Acción ``export`` que descarga el listado completo (con los mismos
+    filtros de búsqueda y orden) en CSV o NDJSON, sin paginar.
+    """
+    columnas_exportacion = ()
+    nombre_exportacion = 'export'
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Exportar el listado filtrado en CSV (?formato=csv) o NDJSON (?formato=ndjson)"""
+        formato = request.query_params.get('formato', FORMATO_CSV)
+        if formato not in FORMATOS:
+            return Response(
+                {'error': f"formato debe ser uno de: {', '.join(FORMATOS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        return respuesta_exportacion(queryset, self.columnas_exportacion, formato, self.nombre_exportacion)
 
 
-class EmpresaViewSet(viewsets.ModelViewSet):
+class EmpresaViewSet(ConsultaPlanificadaMixin, PeticionCondicionalMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar Empresas.
     
@@ -36,14 +209,16 @@ class EmpresaViewSet(viewsets.ModelViewSet):
     - PUT /empresas/{id}/ - Actualizar empresa
     - DELETE /empresas/{id}/ - Eliminar empresa
     - GET /empresas/{id}/estadisticas/ - Obtener estadísticas
+    - GET /empresas/estadisticas/?ids=1,2 - Estadísticas de varias empresas
     """
     queryset = Empresa.objects.all()
     serializer_class = EmpresaSerializer
     pagination_class = StandardResultsSetPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.OrderingFilter, BusquedaTextoFilter]
     search_fields = ['nombre', 'rut', 'email', 'ciudad']
     ordering_fields = ['nombre', 'fecha_creacion']
     ordering = ['-fecha_creacion']
+    acciones_sin_planificacion = ('estadisticas', 'estadisticas_multiples')
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -51,30 +226,36 @@ class EmpresaViewSet(viewsets.ModelViewSet):
         return EmpresaSerializer
 
     @action(detail=True, methods=['get'])
+    @cachear_respuesta(etiquetas=etiqueta_detalle('empresa'))
     def estadisticas(self, request, pk=None):
         """Obtener estadísticas de la empresa"""
-        empresa = self.get_object()
-        
-        ordenes = empresa.ordenes.all()
-        
-        estadisticas = {
-            'total_equipos': empresa.equipos.count(),
-            'total_planes': empresa.planes.count(),
-            'total_ordenes': ordenes.count(),
-            'ordenes_pendientes': ordenes.filter(estado='programada').count(),
-            'ordenes_en_progreso': ordenes.filter(estado='en_progreso').count(),
-            'ordenes_completadas': ordenes.filter(estado='completada').count(),
-            'costo_total_ordenes': ordenes.aggregate(Sum('costo_real'))['costo_real__sum'] or 0,
-            'horas_totales_trabajadas': ordenes.aggregate(Sum('horas_trabajadas'))['horas_trabajadas__sum'] or 0,
-        }
-        
-        serializer = EstadisticasEmpresaSerializer(estadisticas)
+        empresa = get_object_or_404(anotar_estadisticas_empresa(self.get_queryset()), pk=pk)
+        self.check_object_permissions(request, empresa)
+
+        serializer = EstadisticasEmpresaSerializer(empresa)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='estadisticas')
+    @cachear_respuesta(etiquetas=etiquetas_parametro('empresa', 'ids'))
+    def estadisticas_multiples(self, request):
+        """Obtener estadísticas de varias empresas (?ids=1,2,3) en una consulta"""
+        ids = request.query_params.get('ids', '')
+        try:
+            ids = [int(valor) for valor in ids.split(',') if valor.strip()]
+        except ValueError:
+            return Response({'error': 'ids debe ser una lista de enteros separados por coma'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return Response({'error': 'ids parameter required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        empresas = anotar_estadisticas_empresa(self.get_queryset().filter(pk__in=ids)).order_by('pk')
+        serializer = EstadisticasEmpresaMultipleSerializer(empresas, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def activas(self, request):
         """Obtener solo empresas activas"""
-        empresas = self.queryset.filter(activa=True)
+        empresas = self.get_queryset().filter(activa=True)
         page = self.paginate_queryset(empresas)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -83,7 +264,8 @@ class EmpresaViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class EquipoViewSet(viewsets.ModelViewSet):
+class EquipoViewSet(ConsultaPlanificadaMixin, PeticionCondicionalMixin, ListadoValoresMixin, ExportacionMixin,
+                    viewsets.ModelViewSet):
     """
     ViewSet para gestionar Equipos.
     
@@ -95,14 +277,20 @@ class EquipoViewSet(viewsets.ModelViewSet):
     - DELETE /equipos/{id}/ - Eliminar equipo
     - GET /equipos/{id}/estadisticas/ - Estadísticas del equipo
     - GET /equipos/por-empresa/{empresa_id}/ - Equipos por empresa
+    - GET /equipos/export/?formato=csv|ndjson - Exportar listado completo
+    - GET /equipos/{id}/confiabilidad/ - MTBF, MTTR y disponibilidad del equipo
+    - GET /equipos/confiabilidad/ - Confiabilidad de la flota por empresa, tipo o equipo
     """
     queryset = Equipo.objects.all()
     serializer_class = EquipoSerializer
     pagination_class = StandardResultsSetPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.OrderingFilter, BusquedaTextoFilter]
     search_fields = ['nombre', 'codigo', 'tipo', 'marca']
     ordering_fields = ['nombre', 'estado', 'fecha_ultimo_mantenimiento']
     ordering = ['-fecha_creacion']
+    acciones_sin_planificacion = ('estadisticas', 'export', 'confiabilidad', 'confiabilidad_flota')
+    columnas_exportacion = COLUMNAS_EQUIPO
+    nombre_exportacion = 'equipos'
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -110,38 +298,75 @@ class EquipoViewSet(viewsets.ModelViewSet):
         return EquipoSerializer
 
     @action(detail=True, methods=['get'])
+    @cachear_respuesta(etiquetas=etiqueta_detalle('equipo'))
     def estadisticas(self, request, pk=None):
-        """Obtener estadísticas del equipo"""
-        equipo = self.get_object()
-        ordenes = equipo.ordenes.all()
-        
-        fecha_proximo = equipo.planes.filter(
-            activo=True
-        ).values_list('fecha_proximo_mantenimiento', flat=True).first()
-        
-        dias_sin_mantenimiento = 0
-        if equipo.fecha_ultimo_mantenimiento:
-            dias_sin_mantenimiento = (timezone.now().date() - equipo.fecha_ultimo_mantenimiento).days
-        
-        estadisticas = {
-            'nombre_equipo': equipo.nombre,
-            'total_ordenes': ordenes.count(),
-            'ordenes_completadas': ordenes.filter(estado='completada').count(),
-            'dias_sin_mantenimiento': dias_sin_mantenimiento,
-            'proxima_mantencion': fecha_proximo,
-            'costo_total_mantenimiento': ordenes.aggregate(Sum('costo_real'))['costo_real__sum'] or 0,
-            'horas_totales_trabajadas': ordenes.aggregate(Sum('horas_trabajadas'))['horas_trabajadas__sum'] or 0,
-        }
-        
+        """Obtener estadísticas del equipo desde su resumen materializado"""
+        equipo = get_object_or_404(
+            self.get_queryset().select_related('estadistica').annotate(
+                proxima_mantencion=Subquery(proximo_plan_activo(OuterRef('pk')))
+            ),
+            pk=pk
+        )
+        self.check_object_permissions(request, equipo)
+        resumen = getattr(equipo, 'estadistica', None) or EquipoEstadistica(equipo=equipo)
+
+        estadisticas = datos_estadisticas_equipo(equipo, resumen, equipo.proxima_mantencion)
         serializer = EstadisticasEquipoSerializer(estadisticas)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    # Sin ?hasta= los indicadores dependen de la hora actual: vigencia corta
+    @cachear_respuesta(modelos=('plan',), etiquetas=etiqueta_detalle('equipo'), timeout=dashboard.timeout)
+    def confiabilidad(self, request, pk=None):
+        """Indicadores de confiabilidad del equipo por ventana (?ventanas=30,90,365&hasta=)"""
+        parametros = ConfiabilidadVentanasSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        equipo = get_object_or_404(self.get_queryset().only('pk'), pk=pk)
+        self.check_object_permissions(request, equipo)
+
+        hasta = parametros.validated_data.get('hasta') or timezone.now()
+        resultado = confiabilidad.evaluar(
+            Equipo.objects.filter(pk=equipo.pk), ventanas=parametros.validated_data['ventanas'], hasta=hasta
+        )
+        datos = {'equipo': equipo.pk, 'hasta': hasta, 'ventanas': resultado['grupos'][0]['ventanas']}
+        return Response(ConfiabilidadEquipoSerializer(datos).data)
+
+    @action(detail=False, methods=['get'], url_path='confiabilidad')
+    @cachear_respuesta(modelos=('equipo', 'orden', 'plan'), timeout=dashboard.timeout)
+    def confiabilidad_flota(self, request):
+        """
+        Indicadores de confiabilidad de la flota y por grupo
+        (?agrupar=empresa|tipo|equipo&empresa=&ventanas=30,90,365&hasta=).
+        Por equipo, los grupos se paginan.
+        """
+        parametros = ConfiabilidadParametrosSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        datos = parametros.validated_data
+        equipos = self.get_queryset()
+        if 'empresa' in datos:
+            equipos = equipos.filter(empresa_id=datos['empresa'])
+
+        hasta = datos.get('hasta') or timezone.now()
+        resultado = confiabilidad.evaluar(equipos, ventanas=datos['ventanas'], agrupar=datos['agrupar'], hasta=hasta)
+        grupos = resultado['grupos']
+        pagina = self.paginate_queryset(grupos) if datos['agrupar'] == 'equipo' else None
+        serializer = ConfiabilidadFlotaSerializer({
+            'hasta': hasta, 'agrupar': datos['agrupar'], 'flota': resultado['flota'],
+            'grupos': grupos if pagina is None else pagina,
+        })
+        if pagina is None:
+            return Response(serializer.data)
+        datos_flota = dict(serializer.data)
+        respuesta = self.get_paginated_response(datos_flota.pop('grupos'))
+        respuesta.data.update(datos_flota)
+        return respuesta
+
     @action(detail=False, methods=['get'])
     def por_empresa(self, request):
         """Obtener equipos filtrados por empresa"""
         empresa_id = request.query_params.get('empresa', None)
         if empresa_id:
-            equipos = self.queryset.filter(empresa_id=empresa_id)
+            equipos = self.get_queryset().filter(empresa_id=empresa_id)
             page = self.paginate_queryset(equipos)
             if page is not None:
                 serializer = self.get_serializer(page, many=True)
@@ -151,9 +376,10 @@ class EquipoViewSet(viewsets.ModelViewSet):
         return Response({'error': 'empresa parameter required'}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'])
+    @cachear_respuesta(modelos=('equipo', 'empresa'))
     def operativos(self, request):
         """Obtener solo equipos operativos"""
-        equipos = self.queryset.filter(estado='operativo', activo=True)
+        equipos = self.get_queryset().filter(estado='operativo', activo=True)
         page = self.paginate_queryset(equipos)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -162,7 +388,7 @@ class EquipoViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class TecnicoViewSet(viewsets.ModelViewSet):
+class TecnicoViewSet(ConsultaPlanificadaMixin, PeticionCondicionalMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar Técnicos.
     
@@ -178,7 +404,7 @@ class TecnicoViewSet(viewsets.ModelViewSet):
     queryset = Tecnico.objects.all()
     serializer_class = TecnicoSerializer
     pagination_class = StandardResultsSetPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.OrderingFilter, BusquedaTextoFilter]
     search_fields = ['nombre', 'apellido', 'rut', 'email', 'especialidad']
     ordering_fields = ['apellido', 'experiencia_anos', 'fecha_contratacion']
     ordering = ['apellido']
@@ -193,7 +419,7 @@ class TecnicoViewSet(viewsets.ModelViewSet):
         """Obtener técnicos de una empresa específica"""
         empresa_id = request.query_params.get('empresa', None)
         if empresa_id:
-            tecnicos = self.queryset.filter(empresas__id=empresa_id).distinct()
+            tecnicos = self.get_queryset().filter(empresas__id=empresa_id).distinct()
             page = self.paginate_queryset(tecnicos)
             if page is not None:
                 serializer = self.get_serializer(page, many=True)
@@ -207,7 +433,7 @@ class TecnicoViewSet(viewsets.ModelViewSet):
         """Obtener técnicos por especialidad"""
         especialidad = request.query_params.get('especialidad', None)
         if especialidad:
-            tecnicos = self.queryset.filter(especialidad=especialidad, activo=True)
+            tecnicos = self.get_queryset().filter(especialidad=especialidad, activo=True)
             page = self.paginate_queryset(tecnicos)
             if page is not None:
                 serializer = self.get_serializer(page, many=True)
@@ -217,9 +443,11 @@ class TecnicoViewSet(viewsets.ModelViewSet):
         return Response({'error': 'especialidad parameter required'}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'])
+    # ?expand=empresas incluye los datos de las empresas en la respuesta
+    @cachear_respuesta(modelos=('tecnico', 'empresa'))
     def disponibles(self, request):
         """Obtener técnicos disponibles (activos)"""
-        tecnicos = self.queryset.filter(activo=True)
+        tecnicos = self.get_queryset().filter(activo=True)
         page = self.paginate_queryset(tecnicos)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -228,7 +456,7 @@ class TecnicoViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class PlanViewSet(viewsets.ModelViewSet):
+class PlanViewSet(ConsultaPlanificadaMixin, PeticionCondicionalMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar Planes de Mantenimiento.
     
@@ -239,12 +467,14 @@ class PlanViewSet(viewsets.ModelViewSet):
     - PUT /planes/{id}/ - Actualizar plan
     - DELETE /planes/{id}/ - Eliminar plan
     - GET /planes/por-equipo/{equipo_id}/ - Planes de un equipo
+    - GET /planes/por-empresa/{empresa_id}/ - Planes de una empresa
     - GET /planes/activos/ - Solo planes activos
+    - POST /planes/generar_ordenes/ - Generar órdenes de los planes por vencer
     """
     queryset = Plan.objects.all()
     serializer_class = PlanSerializer
     pagination_class = StandardResultsSetPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.OrderingFilter, BusquedaTextoFilter]
     search_fields = ['nombre', 'tipo', 'frecuencia']
     ordering_fields = ['nombre', 'tipo', 'fecha_inicio']
     ordering = ['-fecha_creacion']
@@ -259,7 +489,7 @@ class PlanViewSet(viewsets.ModelViewSet):
         """Obtener planes de un equipo específico"""
         equipo_id = request.query_params.get('equipo', None)
         if equipo_id:
-            planes = self.queryset.filter(equipo_id=equipo_id)
+            planes = self.get_queryset().filter(equipo_id=equipo_id)
             page = self.paginate_queryset(planes)
             if page is not None:
                 serializer = self.get_serializer(page, many=True)
@@ -269,9 +499,24 @@ class PlanViewSet(viewsets.ModelViewSet):
         return Response({'error': 'equipo parameter required'}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'])
+    def por_empresa(self, request):
+        """Obtener planes de una empresa específica"""
+        empresa_id = request.query_params.get('empresa', None)
+        if empresa_id:
+            planes = self.get_queryset().filter(empresa_id=empresa_id)
+            page = self.paginate_queryset(planes)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            serializer = self.get_serializer(planes, many=True)
+            return Response(serializer.data)
+        return Response({'error': 'empresa parameter required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['get'])
+    @cachear_respuesta(modelos=('plan', 'equipo', 'empresa'))
     def activos(self, request):
         """Obtener solo planes activos"""
-        planes = self.queryset.filter(activo=True)
+        planes = self.get_queryset().filter(activo=True)
         page = self.paginate_queryset(planes)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -283,7 +528,7 @@ class PlanViewSet(viewsets.ModelViewSet):
     def proximos_vencimientos(self, request):
         """Obtener planes próximos a vencer (próximos 7 días)"""
         hoy = timezone.now().date()
-        planes = self.queryset.filter(
+        planes = self.get_queryset().filter(
             activo=True,
             fecha_proximo_mantenimiento__lte=hoy + timedelta(days=7),
             fecha_proximo_mantenimiento__gte=hoy
@@ -295,8 +540,26 @@ class PlanViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(planes, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'])
+    def generar_ordenes(self, request):
+        """Generar las órdenes de los planes que vencen dentro del horizonte"""
+        parametros = GenerarOrdenesSerializer(data=request.data)
+        parametros.is_valid(raise_exception=True)
+        planes = self.get_queryset()
+        empresa = parametros.validated_data.get('empresa')
+        if empresa is not None:
+            planes = planes.filter(empresa=empresa)
+
+        resultado = programador.generar_ordenes(
+            horizonte_dias=parametros.validated_data['horizonte_dias'],
+            planes=planes,
+        )
+        codigo = status.HTTP_201_CREATED if resultado['ordenes_creadas'] else status.HTTP_200_OK
+        return Response(resultado, status=codigo)
 
-class OrdenViewSet(viewsets.ModelViewSet):
+
+class OrdenViewSet(ConsultaPlanificadaMixin, PeticionCondicionalMixin, ListadoValoresMixin, ExportacionMixin,
+                   viewsets.ModelViewSet):
     """
     ViewSet para gestionar Órdenes de Trabajo.
     
@@ -308,16 +571,30 @@ class OrdenViewSet(viewsets.ModelViewSet):
     - DELETE /ordenes/{id}/ - Eliminar orden
     - GET /ordenes/{id}/iniciar/ - Iniciar orden
     - GET /ordenes/{id}/completar/ - Completar orden
+    - POST /ordenes/transicion-masiva/ - Iniciar, completar, pausar o cancelar varias órdenes
     - GET /ordenes/por-tecnico/{tecnico_id}/ - Órdenes por técnico
+    - GET /ordenes/por-empresa/{empresa_id}/ - Órdenes por empresa
+    - GET /ordenes/por-equipo/{equipo_id}/ - Órdenes por equipo
+    - GET /ordenes/por-plan/{plan_id}/ - Órdenes por plan
     - GET /ordenes/pendientes/ - Órdenes pendientes
+    - POST /ordenes/bulk/ - Carga masiva de órdenes (JSON o NDJSON)
+    - GET /ordenes/export/?formato=csv|ndjson - Exportar listado completo
+    - POST /ordenes/asignar-automatico/ - Asignar técnicos a órdenes sin asignar
+
+    Los listados aceptan ?paginacion=cursor para paginar por cursor sobre
+    (fecha_programada, id) en lugar de por número de página.
     """
     queryset = Orden.objects.all()
     serializer_class = OrdenSerializer
-    pagination_class = StandardResultsSetPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = OrdenPagination
+    filter_backends = [filters.OrderingFilter, BusquedaTextoFilter]
     search_fields = ['numero_orden', 'equipo__nombre', 'descripcion']
     ordering_fields = ['fecha_programada', 'prioridad', 'estado']
-    ordering = ['-fecha_programada']
+    ordering = ['-fecha_programada', '-id']
+    acciones_sin_planificacion = ('export',)
+    columnas_listado = ('pk', 'fecha_programada')
+    columnas_exportacion = COLUMNAS_ORDEN
+    nombre_exportacion = 'ordenes'
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -326,88 +603,108 @@ class OrdenViewSet(viewsets.ModelViewSet):
             return OrdenCrearActualizarSerializer
         return OrdenListSerializer if self.action == 'list' else OrdenSerializer
 
-    @action(detail=True, methods=['post'])
-    def iniciar(self, request, pk=None):
-        """Iniciar la ejecución de una orden"""
-        orden = self.get_object()
-        
-        if orden.estado != 'programada':
+    @action(detail=False, methods=['post'], parser_classes=[JSONRapidoParser, NDJSONParser])
+    def bulk(self, request):
+        """Crear órdenes de forma masiva desde un arreglo JSON o NDJSON"""
+        modo = request.query_params.get('modo', MODO_PARCIAL)
+        if modo not in MODOS:
             return Response(
-                {'error': 'Solo se pueden iniciar órdenes programadas'},
+                {'error': f"modo debe ser uno de: {', '.join(MODOS)}"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        orden.estado = 'en_progreso'
-        orden.fecha_inicio = timezone.now()
-        orden.save()
-        
-        serializer = OrdenSerializer(orden)
-        return Response(serializer.data)
 
-    @action(detail=True, methods=['post'])
-    def completar(self, request, pk=None):
-        """Completar una orden"""
-        orden = self.get_object()
-        
-        if orden.estado == 'completada':
+        filas = request.data
+        if not isinstance(filas, list):
             return Response(
-                {'error': 'La orden ya está completada'},
+                {'error': 'Se esperaba un arreglo de órdenes'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        orden.estado = 'completada'
-        orden.fecha_termino = timezone.now()
-        
-        # Calcular horas si no están ingresadas
-        if not orden.horas_trabajadas and orden.fecha_inicio:
-            horas = (orden.fecha_termino - orden.fecha_inicio).total_seconds() / 3600
-            orden.horas_trabajadas = round(horas, 2)
-        
-        orden.save()
-        
+
+        resultado = cargar_ordenes(filas, modo=modo)
+        if resultado['errores'] and not resultado['creadas']:
+            codigo = status.HTTP_400_BAD_REQUEST
+        elif resultado['creadas']:
+            codigo = status.HTTP_201_CREATED
+        else:
+            codigo = status.HTTP_200_OK
+        return Response(resultado, status=codigo)
+
+    @action(detail=False, methods=['post'], url_path='asignar-automatico')
+    def asignar_automatico(self, request):
+        """Asignar técnicos a las órdenes abiertas sin técnico"""
+        parametros = AsignacionAutomaticaSerializer(data=request.data)
+        parametros.is_valid(raise_exception=True)
+        ordenes = self.get_queryset()
+        if 'ordenes' in parametros.validated_data:
+            ordenes = ordenes.filter(pk__in=parametros.validated_data['ordenes'])
+        if 'empresa' in parametros.validated_data:
+            ordenes = ordenes.filter(empresa=parametros.validated_data['empresa'])
+
+        resultado = asignacion.asignar_tecnicos(ordenes, simular=parametros.validated_data['simular'])
+        return Response(resultado)
+
+    def _transicionar(self, accion):
+        orden = self.get_object()
+
+        error = transiciones.validar(accion, orden.estado)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Solo se escriben las columnas que cambian
+        orden.save(update_fields=transiciones.aplicar(orden, accion))
+
         serializer = OrdenSerializer(orden)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['post'])
+    def iniciar(self, request, pk=None):
+        """Iniciar la ejecución de una orden"""
+        return self._transicionar('iniciar')
+
+    @action(detail=True, methods=['post'])
+    def completar(self, request, pk=None):
+        """Completar una orden"""
+        return self._transicionar('completar')
+
     @action(detail=True, methods=['post'])
     def pausar(self, request, pk=None):
         """Pausar una orden en progreso"""
-        orden = self.get_object()
-        
-        if orden.estado != 'en_progreso':
-            return Response(
-                {'error': 'Solo se pueden pausar órdenes en progreso'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        orden.estado = 'pausada'
-        orden.save()
-        
-        serializer = OrdenSerializer(orden)
-        return Response(serializer.data)
+        return self._transicionar('pausar')
 
     @action(detail=True, methods=['post'])
     def cancelar(self, request, pk=None):
         """Cancelar una orden"""
-        orden = self.get_object()
-        
-        if orden.estado == 'completada':
-            return Response(
-                {'error': 'No se puede cancelar una orden completada'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        orden.estado = 'cancelada'
-        orden.save()
-        
-        serializer = OrdenSerializer(orden)
-        return Response(serializer.data)
+        return self._transicionar('cancelar')
+
+    @action(detail=False, methods=['post'], url_path='transicion-masiva')
+    def transicion_masiva(self, request):
+        """Iniciar, completar, pausar o cancelar varias órdenes (por ids o por filtros)"""
+        parametros = TransicionMasivaSerializer(data=request.data)
+        parametros.is_valid(raise_exception=True)
+        datos = parametros.validated_data
+        ordenes = self.get_queryset()
+        for campo in ('empresa', 'equipo', 'tecnico_asignado', 'estado'):
+            if campo in datos:
+                ordenes = ordenes.filter(**{campo: datos[campo]})
+
+        if 'ordenes' not in datos:
+            # Por filtros se aplica el mismo límite que a la lista de ids
+            maximo = TransicionMasivaSerializer.MAXIMO_ORDENES
+            if ordenes.order_by()[:maximo + 1].count() > maximo:
+                return Response(
+                    {'error': f'Los filtros alcanzan más de {maximo} órdenes; acote por empresa, equipo o estado'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        resultado = transiciones.transicionar(datos['accion'], ordenes, ids=datos.get('ordenes'))
+        return Response(resultado)
 
     @action(detail=False, methods=['get'])
     def por_tecnico(self, request):
         """Obtener órdenes asignadas a un técnico"""
         tecnico_id = request.query_params.get('tecnico', None)
         if tecnico_id:
-            ordenes = self.queryset.filter(tecnico_asignado_id=tecnico_id)
+            ordenes = self.get_queryset().filter(tecnico_asignado_id=tecnico_id)
             page = self.paginate_queryset(ordenes)
             if page is not None:
                 serializer = self.get_serializer(page, many=True)
@@ -416,10 +713,52 @@ class OrdenViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
         return Response({'error': 'tecnico parameter required'}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['get'])
+    def por_empresa(self, request):
+        """Obtener órdenes de una empresa"""
+        empresa_id = request.query_params.get('empresa', None)
+        if empresa_id:
+            ordenes = self.get_queryset().filter(empresa_id=empresa_id)
+            page = self.paginate_queryset(ordenes)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            serializer = self.get_serializer(ordenes, many=True)
+            return Response(serializer.data)
+        return Response({'error': 'empresa parameter required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['get'])
+    def por_equipo(self, request):
+        """Obtener órdenes de un equipo"""
+        equipo_id = request.query_params.get('equipo', None)
+        if equipo_id:
+            ordenes = self.get_queryset().filter(equipo_id=equipo_id)
+            page = self.paginate_queryset(ordenes)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            serializer = self.get_serializer(ordenes, many=True)
+            return Response(serializer.data)
+        return Response({'error': 'equipo parameter required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['get'])
+    def por_plan(self, request):
+        """Obtener órdenes generadas por un plan"""
+        plan_id = request.query_params.get('plan', None)
+        if plan_id:
+            ordenes = self.get_queryset().filter(plan_id=plan_id)
+            page = self.paginate_queryset(ordenes)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            serializer = self.get_serializer(ordenes, many=True)
+            return Response(serializer.data)
+        return Response({'error': 'plan parameter required'}, status=status.HTTP_400_BAD_REQUEST)
+
     @action(detail=False, methods=['get'])
     def pendientes(self, request):
         """Obtener órdenes pendientes (programadas o en progreso)"""
-        ordenes = self.queryset.filter(estado__in=['programada', 'en_progreso', 'pausada'])
+        ordenes = self.get_queryset().filter(estado__in=Orden.ESTADOS_ABIERTOS)
         page = self.paginate_queryset(ordenes)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -430,9 +769,9 @@ class OrdenViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def urgentes(self, request):
         """Obtener órdenes urgentes pendientes"""
-        ordenes = self.queryset.filter(
+        ordenes = self.get_queryset().filter(
             prioridad='urgente',
-            estado__in=['programada', 'en_progreso', 'pausada']
+            estado__in=Orden.ESTADOS_ABIERTOS
         )
         page = self.paginate_queryset(ordenes)
         if page is not None:
@@ -444,7 +783,7 @@ class OrdenViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def vencidas(self, request):
         """Obtener órdenes vencidas (programadas para fecha pasada)"""
-        ordenes = self.queryset.filter(
+        ordenes = self.get_queryset().filter(
             fecha_programada__lt=timezone.now(),
             estado__in=['programada', 'pendiente']
         )
@@ -455,3 +794,25 @@ class OrdenViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(ordenes, many=True)
         return Response(serializer.data)
 
+
+class EstadisticasCacheView(APIView):
+    """Aciertos y fallos de la caché de respuestas por vista"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_respuestas.contadores())
+
+
+class DashboardView(APIView):
+    """
+    Panel de operaciones de todas las empresas activas: equipos por estado,
+    órdenes abiertas, vencidas y urgentes, costo y horas del mes y próximos
+    mantenimientos (?dias=30&limite=5), en un número fijo de consultas.
+    """
+
+    @cachear_respuesta(modelos=('empresa', 'equipo', 'plan', 'orden'), timeout=dashboard.timeout)
+    def get(self, request):
+        parametros = DashboardParametrosSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        datos = dashboard.datos_dashboard(**parametros.validated_data)
+        return Response(DashboardSerializer(datos).data)
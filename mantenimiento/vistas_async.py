@@ -0,0 +1,194 @@
+"""
+Vistas asíncronas de solo lectura para servir con ASGI.
+
+Exponen bajo ``/api/async/`` el listado, el detalle y las estadísticas de
+los cinco recursos reutilizando los ViewSets (queryset planificado,
+filtros, permisos y serializadores), pero leyendo con el ORM asíncrono:
+``acount`` para el total de la paginación, ``aiterator`` para la página y
+``aget`` / ``aaggregate`` para el detalle y las estadísticas. Los agregados
+independientes de las estadísticas se lanzan juntos con ``asyncio.gather``.
+
+Diferencias con las rutas síncronas:
+
+- Solo responden JSON y no calculan ETag / Last-Modified ni usan la caché
+  de respuestas.
+- El ORM asíncrono ejecuta el SQL en el hilo del ORM (``sync_to_async``
+  sensible al hilo): las consultas de una petición no corren en paralelo
+  en la base, pero el event loop atiende otras peticiones mientras tanto.
+- La búsqueda (``?search=``), la autenticación con credenciales y la
+  paginación por cursor de órdenes, que consultan desde código síncrono,
+  se ejecutan con ``sync_to_async``.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import InvalidPage, Paginator
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .estadisticas import agregados_ordenes, datos_estadisticas_equipo, proximo_plan_activo
+from .models import Equipo, EquipoEstadistica, Orden, Plan
+from .pagination import OrdenPagination
+from .renderers import dumps
+from .serializers import EstadisticasEmpresaSerializer, EstadisticasEquipoSerializer
+
+# Filas que aiterator trae de la base por lote (una página completa como máximo)
+TAMANO_LOTE = 100
+
+
+def _respuesta(datos, status=200):
+    return HttpResponse(dumps(datos), status=status, content_type='application/json')
+
+
+async def _vista(clase, request, accion, **kwargs):
+    """Instancia del ViewSet con la petición de DRF autenticada y los permisos verificados"""
+    vista = clase(action_map={'get': accion}, kwargs=kwargs, args=(), format_kwarg=None)
+    vista.headers = {}
+    drf = vista.initialize_request(request, **kwargs)
+    vista.request = drf
+    if 'Authorization' in request.headers or request.session.session_key:
+        # JWT y sesión consultan al usuario en la base
+        await sync_to_async(vista.perform_authentication)(drf)
+    else:
+        drf.user = AnonymousUser()
+    vista.check_permissions(drf)
+    return vista
+
+
+def _ejecutar(manejador):
+    """Convierte las excepciones de DRF en respuestas JSON, como ``APIView.handle_exception``"""
+    async def envoltura(request, *args, **kwargs):
+        try:
+            return await manejador(request, *args, **kwargs)
+        except APIException as error:
+            detalle = error.detail if isinstance(error.detail, (list, dict)) else {'detail': error.detail}
+            return _respuesta(detalle, status=error.status_code)
+    return envoltura
+
+
+async def _queryset_filtrado(vista):
+    queryset = vista.get_queryset()
+    if vista.request.query_params.get('search'):
+        # La búsqueda de texto consulta el índice desde código síncrono
+        return await sync_to_async(vista.filter_queryset)(queryset)
+    return vista.filter_queryset(queryset)
+
+
+async def _pagina(vista, queryset):
+    """Datos paginados con el mismo formato que la paginación del ViewSet"""
+    request = vista.request
+    paginador = vista.pagination_class()
+    if isinstance(paginador, OrdenPagination) and paginador.usa_cursor(request):
+        pagina = await sync_to_async(paginador.paginate_queryset)(queryset, request, vista)
+        return paginador.get_paginated_response(vista.get_serializer(pagina, many=True).data).data
+
+    tamano = paginador.get_page_size(request)
+    total = await queryset.acount()
+    # Paginator sobre un rango solo valida el número de página con el total ya contado
+    numeros = Paginator(range(total), tamano)
+    numero = request.query_params.get(paginador.page_query_param) or 1
+    if numero in paginador.last_page_strings:
+        numero = numeros.num_pages
+    try:
+        pagina = numeros.page(numero)
+    except InvalidPage as error:
+        raise NotFound(paginador.invalid_page_message.format(page_number=numero, message=str(error)))
+
+    filas = pagina.object_list
+    objetos = [objeto async for objeto in queryset[filas.start:filas.stop].aiterator(chunk_size=TAMANO_LOTE)]
+
+    url = request.build_absolute_uri()
+    siguiente = anterior = None
+    if pagina.has_next():
+        siguiente = replace_query_param(url, paginador.page_query_param, pagina.next_page_number())
+    if pagina.has_previous():
+        previo = pagina.previous_page_number()
+        anterior = (remove_query_param(url, paginador.page_query_param) if previo == 1
+                    else replace_query_param(url, paginador.page_query_param, previo))
+    return {
+        'count': total,
+        'next': siguiente,
+        'previous': anterior,
+        'results': vista.get_serializer(objetos, many=True).data,
+    }
+
+
+async def _objeto(vista, queryset, pk):
+    try:
+        objeto = await queryset.aget(pk=pk)
+    except queryset.model.DoesNotExist:
+        # Mismo mensaje que get_object_or_404 en las rutas síncronas
+        raise NotFound(f'No {queryset.model._meta.object_name} matches the given query.')
+    vista.check_object_permissions(vista.request, objeto)
+    return objeto
+
+
+def listado(clase):
+    """``GET /api/async/<recurso>/``"""
+    @require_GET
+    @_ejecutar
+    async def vista_listado(request):
+        vista = await _vista(clase, request, 'list')
+        return _respuesta(await _pagina(vista, await _queryset_filtrado(vista)))
+
+    vista_listado.__name__ = f'{clase.__name__}Async'
+    vista_listado.actions = {'get': 'list'}
+    return vista_listado
+
+
+def detalle(clase):
+    """``GET /api/async/<recurso>/<id>/``"""
+    @require_GET
+    @_ejecutar
+    async def vista_detalle(request, pk):
+        vista = await _vista(clase, request, 'retrieve', pk=pk)
+        objeto = await _objeto(vista, await _queryset_filtrado(vista), pk)
+        return _respuesta(vista.get_serializer(objeto).data)
+
+    vista_detalle.__name__ = f'{clase.__name__}Async'
+    vista_detalle.actions = {'get': 'retrieve'}
+    return vista_detalle
+
+
+def estadisticas_empresa(clase):
+    """``GET /api/async/empresas/<id>/estadisticas/``"""
+    @require_GET
+    @_ejecutar
+    async def vista_estadisticas(request, pk):
+        vista = await _vista(clase, request, 'estadisticas', pk=pk)
+        _, total_equipos, total_planes, ordenes = await asyncio.gather(
+            _objeto(vista, vista.get_queryset().only('pk'), pk),
+            Equipo.objects.filter(empresa_id=pk).acount(),
+            Plan.objects.filter(empresa_id=pk).acount(),
+            Orden.objects.filter(empresa_id=pk).aaggregate(**agregados_ordenes()),
+        )
+        estadisticas = {'total_equipos': total_equipos, 'total_planes': total_planes, **ordenes}
+        return _respuesta(EstadisticasEmpresaSerializer(estadisticas).data)
+
+    vista_estadisticas.__name__ = f'{clase.__name__}Async'
+    vista_estadisticas.actions = {'get': 'estadisticas'}
+    return vista_estadisticas
+
+
+def estadisticas_equipo(clase):
+    """``GET /api/async/equipos/<id>/estadisticas/``"""
+    @require_GET
+    @_ejecutar
+    async def vista_estadisticas(request, pk):
+        vista = await _vista(clase, request, 'estadisticas', pk=pk)
+        equipo, proxima_mantencion = await asyncio.gather(
+            _objeto(vista, vista.get_queryset().select_related('estadistica'), pk),
+            proximo_plan_activo(pk).afirst(),
+        )
+        resumen = getattr(equipo, 'estadistica', None) or EquipoEstadistica(equipo=equipo)
+        if proxima_mantencion is not None:
+            proxima_mantencion = proxima_mantencion['fecha_proximo_mantenimiento']
+        estadisticas = datos_estadisticas_equipo(equipo, resumen, proxima_mantencion)
+        return _respuesta(EstadisticasEquipoSerializer(estadisticas).data)
+
+    vista_estadisticas.__name__ = f'{clase.__name__}Async'
+    vista_estadisticas.actions = {'get': 'estadisticas'}
+    return vista_estadisticas